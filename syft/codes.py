@@ -9,6 +9,7 @@ class MSGTYPE(object):
     SEARCH = 8
     FORCE_OBJ_DEL = 9
     PLAN_CMD = 10
+    BATCH = 11
 
 
 class PLAN_CMDS(object):
@@ -1,5 +1,14 @@
+from collections import defaultdict
+from collections import deque
+import hashlib
+import os
+import threading
+
+import numpy
 import torch
 from typing import Callable
+
+import syft as sy
 from syft.workers.abstract import AbstractWorker
 
 
@@ -27,7 +36,334 @@ def request_triple(
     a = torch.randint(field, a_size)
     b = torch.randint(field, b_size)
     c = cmd(a, b)
-    a_shared = a.share(*locations, field=field, crypto_provider=crypto_provider).child
-    b_shared = b.share(*locations, field=field, crypto_provider=crypto_provider).child
-    c_shared = c.share(*locations, field=field, crypto_provider=crypto_provider).child
-    return a_shared, b_shared, c_shared
+    return _share_triple(crypto_provider, field, (a, b, c), locations)
+
+
+def get_triple(
+    crypto_provider: AbstractWorker,
+    cmd: Callable,
+    field: int,
+    a_size: tuple,
+    b_size: tuple,
+    locations: list,
+):
+    """Returns a multiplication triple from the triple pool of the crypto provider,
+    or generates one with request_triple if it has no pool.
+
+    Args: see request_triple
+
+    Returns:
+        A triple of AdditiveSharedTensors such that c_shared = cmd(a_shared, b_shared).
+    """
+    pool = getattr(crypto_provider, "triple_pool", None)
+    if pool is None:
+        return request_triple(crypto_provider, cmd, field, a_size, b_size, locations)
+    return pool.get(crypto_provider, cmd, field, a_size, b_size, locations)
+
+
+def refill_triple_pool(crypto_provider: AbstractWorker):
+    """Refills the triple pool of the crypto provider, if it has one with auto_refill
+    set, which is refilled after each multiplication.
+
+    The pool isn't refilled while ids are recorded, as when a Plan is built, so that
+    the triples shared are not recorded as part of the plan.
+    """
+    pool = getattr(crypto_provider, "triple_pool", None)
+    if pool is not None and pool.auto_refill and not sy.ID_PROVIDER.record_ids:
+        pool.refill()
+
+
+def _share_triple(crypto_provider: AbstractWorker, field: int, triple: tuple, locations: list):
+    """Shares the three tensors of a plaintext triple between the locations."""
+    return tuple(
+        tensor.share(*locations, field=field, crypto_provider=crypto_provider).child
+        for tensor in triple
+    )
+
+
+class TriplePool:
+    """Multiplication triples generated ahead of the multiplications which use them.
+
+    The pool keeps up to max_size triples already shared between their locations per
+    (op, field, sizes, locations). Once set as the triple_pool attribute of a crypto
+    provider, spdz_mul takes its triples from the pool and only generates them on
+    demand when the pool is empty.
+
+    Sharing a triple sends messages to its locations, so it is kept off the
+    multiplications: the pool is filled by prefetch and refill, which are meant to be
+    called between two batches of multiplications (for example between two training
+    batches). refill replaces the triples used since the last refill. If background
+    is True, the plaintext triples are generated ahead in a background thread, which
+    only runs torch operations, and refill shares the triples ready between their
+    locations. Otherwise, refill also generates the triples. If auto_refill is True,
+    spdz_mul refills the pool at the end of each multiplication, which puts the
+    sharing of the triples back on the thread doing the multiplications.
+
+    If storage_dir is given, the plaintext triples are generated batch_size at a
+    time into memory-mapped .npy files in this directory, instead of one at a time in
+    memory. The index of the next triple of each file is saved before the triple is
+    used, so that a new pool on the same directory never uses a triple twice. The
+    files of a batch are removed once it is used up.
+
+    The counters attribute holds the number of triples taken from the pool already
+    shared (hits), taken from the plaintext triples generated in the background and
+    shared on demand (plaintext_hits), generated on demand (misses) and shared ahead
+    of time (prefetched).
+
+    Args:
+        max_size: the max number of triples kept per key.
+        storage_dir: an optional directory for the plaintext triples.
+        batch_size: the number of plaintext triples per file in storage_dir.
+        background: whether to generate the plaintext triples in a background thread.
+        auto_refill: whether spdz_mul refills the pool after each multiplication.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 8,
+        storage_dir: str = None,
+        batch_size: int = 64,
+        background: bool = True,
+        auto_refill: bool = False,
+    ):
+        self.max_size = max_size
+        self.storage_dir = storage_dir
+        self.batch_size = batch_size
+        self.background = background
+        self.auto_refill = auto_refill
+
+        self.triples = defaultdict(deque)
+        # the plaintext triples generated in the background, not shared yet
+        self.plaintexts = defaultdict(deque)
+        self.counters = {"hits": 0, "plaintext_hits": 0, "misses": 0, "prefetched": 0}
+
+        self._lock = threading.RLock()
+        self._pending_refills = {}
+        # the arguments of the plaintext triples to generate in the background, by key
+        self._wanted = {}
+        self._generator = None
+
+    @staticmethod
+    def _key(cmd: Callable, field: int, a_size: tuple, b_size: tuple, locations: list):
+        return (
+            cmd.__name__,
+            field,
+            tuple(a_size),
+            tuple(b_size),
+            tuple(worker.id for worker in locations),
+        )
+
+    def get(
+        self,
+        crypto_provider: AbstractWorker,
+        cmd: Callable,
+        field: int,
+        a_size: tuple,
+        b_size: tuple,
+        locations: list,
+    ):
+        """Takes a triple from the pool. If none is shared, shares a plaintext triple
+        generated in the background, or generates one if there is none either.
+
+        Args: see request_triple
+
+        Returns:
+            A triple of AdditiveSharedTensors such that c_shared = cmd(a_shared, b_shared).
+        """
+        key = self._key(cmd, field, a_size, b_size, locations)
+        triple = plaintext = None
+        with self._lock:
+            if self.triples[key]:
+                self.counters["hits"] += 1
+                triple = self.triples[key].popleft()
+            elif self.plaintexts[key]:
+                self.counters["plaintext_hits"] += 1
+                plaintext = self.plaintexts[key].popleft()
+            else:
+                self.counters["misses"] += 1
+
+        if plaintext is not None:
+            triple = _share_triple(crypto_provider, field, plaintext, locations)
+        elif triple is None:
+            triple = self._generate(crypto_provider, cmd, field, a_size, b_size, locations)
+
+        with self._lock:
+            self._pending_refills[key] = (crypto_provider, cmd, field, a_size, b_size, locations)
+        if self.background:
+            self._generate_in_background(key, cmd, field, a_size, b_size)
+
+        return triple
+
+    def prefetch(
+        self,
+        crypto_provider: AbstractWorker,
+        cmd: Callable,
+        field: int,
+        a_size: tuple,
+        b_size: tuple,
+        locations: list,
+        n_triples: int = None,
+    ):
+        """Shares triples until the pool holds n_triples (max_size by default) of them
+        for these arguments, generating the plaintext triples which are not ready.
+
+        Args: see request_triple, and
+            n_triples: the number of triples the pool should hold, at most max_size
+        """
+        key = self._key(cmd, field, a_size, b_size, locations)
+        n_triples = self.max_size if n_triples is None else min(n_triples, self.max_size)
+        args = (crypto_provider, cmd, field, a_size, b_size, locations)
+        self._fill(key, args, n_triples, generate=True)
+
+    def refill(self):
+        """Replaces, on the calling thread, the triples used since the last refill.
+
+        If background is True, only the plaintext triples already generated are
+        shared, the others are shared by the next refills.
+        """
+        with self._lock:
+            pending_refills, self._pending_refills = self._pending_refills, {}
+        for key, args in pending_refills.items():
+            if not self._fill(key, args, self.max_size, generate=not self.background):
+                with self._lock:
+                    self._pending_refills.setdefault(key, args)
+
+    def wait(self):
+        """Waits for the background thread to generate the plaintext triples needed."""
+        generator = self._generator
+        if generator is not None:
+            generator.join()
+
+    def hit_rate(self) -> float:
+        """Returns the share of the triples used which were taken from the pool already
+        shared."""
+        total = self.counters["hits"] + self.counters["plaintext_hits"] + self.counters["misses"]
+        return self.counters["hits"] / total if total else 0.0
+
+    def reset_counters(self):
+        """Resets the counters, the triples in the pool are kept."""
+        for name in self.counters:
+            self.counters[name] = 0
+
+    def _fill(self, key, args: tuple, n_triples: int, generate: bool) -> bool:
+        """Shares triples until the pool holds n_triples of them for key.
+
+        Returns:
+            False if it stopped because no plaintext triple was ready and generate is
+            False, True otherwise
+        """
+        crypto_provider, cmd, field, a_size, b_size, locations = args
+        while len(self.triples[key]) < n_triples:
+            with self._lock:
+                plaintext = self.plaintexts[key].popleft() if self.plaintexts[key] else None
+            if plaintext is None:
+                if not generate:
+                    return False
+                plaintext = self._generate_plaintext(cmd, field, a_size, b_size)
+
+            triple = _share_triple(crypto_provider, field, plaintext, locations)
+            with self._lock:
+                self.triples[key].append(triple)
+                self.counters["prefetched"] += 1
+        return True
+
+    def _generate_in_background(self, key, cmd: Callable, field: int, a_size: tuple, b_size: tuple):
+        """Asks the background thread to generate the plaintext triples missing for key,
+        starting it if it isn't running."""
+        with self._lock:
+            self._wanted[key] = (cmd, field, a_size, b_size)
+            if self._generator is None:
+                self._generator = threading.Thread(
+                    target=self._generate_plaintexts, name="syft-triple-pool", daemon=True
+                )
+                self._generator.start()
+
+    def _generate_plaintexts(self):
+        """Runs in the background thread, until every key asked for holds max_size
+        triples shared or plaintext. It doesn't use syft, only torch."""
+        while True:
+            with self._lock:
+                for key, plaintext_args in list(self._wanted.items()):
+                    if len(self.triples[key]) + len(self.plaintexts[key]) < self.max_size:
+                        break
+                    del self._wanted[key]
+                else:
+                    self._generator = None
+                    return
+
+            plaintext = self._generate_plaintext(*plaintext_args)
+            with self._lock:
+                self.plaintexts[key].append(plaintext)
+
+    def _generate(
+        self,
+        crypto_provider: AbstractWorker,
+        cmd: Callable,
+        field: int,
+        a_size: tuple,
+        b_size: tuple,
+        locations: list,
+    ):
+        triple = self._generate_plaintext(cmd, field, a_size, b_size)
+        return _share_triple(crypto_provider, field, triple, locations)
+
+    def _generate_plaintext(self, cmd: Callable, field: int, a_size: tuple, b_size: tuple):
+        """Returns a plaintext triple (a, b, cmd(a, b))."""
+        if self.storage_dir is not None:
+            return self._next_stored_triple(cmd, field, a_size, b_size)
+
+        a = torch.randint(field, a_size)
+        b = torch.randint(field, b_size)
+        return a, b, cmd(a, b)
+
+    def _next_stored_triple(self, cmd: Callable, field: int, a_size: tuple, b_size: tuple):
+        """Reads the next plaintext triple from storage_dir, generating a new batch of
+        triples when the current one is used up."""
+        name = hashlib.sha1(
+            repr((cmd.__name__, field, tuple(a_size), tuple(b_size))).encode()
+        ).hexdigest()
+        paths = [os.path.join(self.storage_dir, f"{name}_{part}.npy") for part in "abc"]
+        cursor_path = os.path.join(self.storage_dir, f"{name}.cursor")
+
+        with self._lock:
+            if os.path.exists(cursor_path):
+                with open(cursor_path) as cursor_file:
+                    cursor = int(cursor_file.read())
+            else:
+                cursor = self.batch_size
+
+            if cursor >= self.batch_size:
+                self._generate_batch(cmd, field, a_size, b_size, paths)
+                cursor = 0
+
+            # The cursor is saved first so that the triple can't be used again
+            with open(cursor_path, "w") as cursor_file:
+                cursor_file.write(str(cursor + 1))
+
+            triple = tuple(
+                torch.from_numpy(numpy.array(numpy.load(path, mmap_mode="r")[cursor]))
+                for path in paths
+            )
+            if cursor + 1 == self.batch_size:
+                for path in paths:
+                    os.remove(path)
+
+        return triple
+
+    def _generate_batch(self, cmd: Callable, field: int, a_size: tuple, b_size: tuple, paths):
+        a_batch = torch.randint(field, (self.batch_size, *a_size))
+        b_batch = torch.randint(field, (self.batch_size, *b_size))
+        c_size = cmd(a_batch[0], b_batch[0]).shape
+
+        arrays = [
+            numpy.lib.format.open_memmap(path, mode="w+", dtype=numpy.int64, shape=shape)
+            for path, shape in zip(
+                paths, [a_batch.shape, b_batch.shape, (self.batch_size, *c_size)]
+            )
+        ]
+        for i in range(self.batch_size):
+            arrays[0][i] = a_batch[i].numpy()
+            arrays[1][i] = b_batch[i].numpy()
+            arrays[2][i] = cmd(a_batch[i], b_batch[i]).numpy()
+        for array in arrays:
+            array.flush()
@@ -0,0 +1,112 @@
+"""
+Pseudo-random shares expanded from short seeds.
+
+A SeededShare is a random share described by a 128-bit seed drawn with secrets. Its
+values are expanded from the seed with SHAKE-256, which is used as a cryptographically
+secure pseudo-random generator: they can't be told apart from uniformly random values
+without the seed. Sending a SeededShare to a worker only sends its seed, and the worker
+expands the share again, so that sending a random share costs a few bytes whatever its
+size. The tensors expanded are regular tensors, which can be modified freely.
+"""
+import hashlib
+import secrets
+
+import numpy
+import torch
+
+import syft as sy
+from syft.generic.tensor import initialize_tensor
+from syft.workers.abstract import AbstractWorker
+
+# Size of the seeds, in bytes
+SEED_BYTES = 16
+
+
+def expand_seed(seed: bytes, shape: tuple, field: int) -> torch.LongTensor:
+    """Expands a seed into a tensor of uniformly random values in [0, field).
+
+    The values are read from the output of SHAKE-256 keyed by the seed and a block
+    counter. Each value is made of 8 bytes masked to the bit length of field - 1, and
+    the values which are not below field are rejected, so that there is no modulo bias.
+
+    Args:
+        seed: the seed of the generator
+        shape: the shape of the tensor
+        field: 1 + the max value of the tensor
+
+    Returns:
+        a LongTensor which is the same for a given seed, shape and field
+    """
+    n_values = int(numpy.prod(shape, dtype=numpy.int64))
+    mask = numpy.uint64((1 << (field - 1).bit_length()) - 1)
+    bound = numpy.uint64(field)
+
+    blocks = [numpy.empty(0, dtype=numpy.uint64)]
+    n_drawn, counter = 0, 0
+    while n_drawn < n_values:
+        stream = hashlib.shake_256(seed + counter.to_bytes(8, "little"))
+        values = numpy.frombuffer(stream.digest(8 * (n_values - n_drawn)), dtype="<u8") & mask
+        values = values[values < bound]
+        blocks.append(values)
+        n_drawn += len(values)
+        counter += 1
+
+    values = numpy.concatenate(blocks)[:n_values].astype(numpy.int64)
+    return torch.from_numpy(values).reshape(tuple(shape))
+
+
+class SeededShare:
+    """A random share, which is sent as the seed it is expanded from.
+
+    Args:
+        seed: the seed of the share, a random one is drawn if None
+        shape: the shape of the share
+        field: 1 + the max value for a share
+        id: the id of the share once it is expanded by its owner
+    """
+
+    def __init__(self, seed: bytes = None, shape: tuple = (), field: int = 2 ** 62, id=None):
+        self.seed = secrets.token_bytes(SEED_BYTES) if seed is None else seed
+        self.shape = tuple(shape)
+        self.field = field
+        self.id = sy.ID_PROVIDER.pop() if id is None else id
+
+    def expand(self) -> torch.LongTensor:
+        """Returns the values of the share."""
+        return expand_seed(self.seed, self.shape, self.field)
+
+    def send(self, location: AbstractWorker, owner: AbstractWorker = None):
+        """Sends the seed to location, which expands the share.
+
+        Args:
+            location: the worker receiving the share
+            owner: the worker owning the pointer returned, the local worker by default
+
+        Returns:
+            A PointerTensor to the share, which is not wrapped
+        """
+        if owner is None:
+            owner = location.hook.local_worker
+        pointer = sy.PointerTensor(
+            location=location,
+            id_at_location=self.id,
+            owner=owner,
+            id=sy.ID_PROVIDER.pop(),
+            shape=torch.Size(self.shape),
+        )
+        owner.send_obj(self, location)
+        return pointer
+
+    @staticmethod
+    def simplify(share: "SeededShare") -> tuple:
+        return (share.seed, sy.serde._simplify(share.shape), share.field, share.id)
+
+    @staticmethod
+    def detail(worker: AbstractWorker, share_tuple: tuple) -> torch.LongTensor:
+        """Expands the share received, whose tensor is returned."""
+        seed, shape, field, share_id = share_tuple
+        tensor = expand_seed(seed, sy.serde._detail(worker, shape), field)
+        initialize_tensor(
+            hook_self=sy.torch.hook, cls=tensor, is_tensor=True, owner=worker, id=share_id
+        )
+        return tensor
@@ -490,53 +490,96 @@ def division(x_sh, y_sh, bit_len_max=Q_BITS // 2):
         return q
 
 
-def maxpool(x_sh):
+def tournament_max(x_sh, ind_sh, dim, select):
+    """Reduces x_sh along dim with a tournament: the elements are compared pairwise,
+    the winners are compared pairwise again and so on, so a max over n elements takes
+    log2(n) batched comparisons. Ties are won by the highest index, as in a scan
+    keeping the last element which is greater or equal to the max.
+
+    Args:
+        x_sh (AdditiveSharingTensor): the private tensor on which the op applies
+        ind_sh (AdditiveSharingTensor): the index of each element of x_sh along dim
+        dim (int): the dimension reduced, between 0 and x_sh.dim() - 1
+        select: a function (beta_sh, a_sh, b_sh) returning a_sh where the bit
+            beta_sh is 0 and b_sh where it is 1
+
+    Returns:
+        maximum value along dim as an AdditiveSharingTensor
+        index of this value along dim as an AdditiveSharingTensor
+    """
+    n = x_sh.shape[dim]
+    # Indexes along dim, the other dimensions are kept
+    prefix = (slice(None),) * dim
+    while n > 1:
+        n_pairs = n // 2
+        left = prefix + (slice(0, 2 * n_pairs, 2),)
+        right = prefix + (slice(1, 2 * n_pairs, 2),)
+
+        # the right element wins if it is greater or equal
+        beta_sh = relu_deriv(x_sh[right] - x_sh[left])
+        max_sh = select(beta_sh, x_sh[left], x_sh[right])
+        max_ind_sh = select(beta_sh, ind_sh[left], ind_sh[right])
+
+        # the last element of an odd number of elements goes to the next round
+        if n % 2 == 1:
+            last = prefix + (slice(n - 1, n),)
+            max_sh = torch.cat([max_sh, x_sh[last]], dim=dim)
+            max_ind_sh = torch.cat([max_ind_sh, ind_sh[last]], dim=dim)
+
+        x_sh, ind_sh = max_sh, max_ind_sh
+        n = n_pairs + n % 2
+
+    return x_sh[prefix + (0,)], ind_sh[prefix + (0,)]
+
+
+def maxpool(x_sh, dim=None):
     """ Compute MaxPool: returns fresh shares of the max value in the input tensor
     and the index of this value in the flattened tensor
 
+    The max is computed with tournament_max, so ties are won by the highest index.
+
     Args:
         x_sh (AdditiveSharingTensor): the private tensor on which the op applies
+        dim (None or int): if not None, the max is computed along this dimension for
+            all the other positions at once, for example over the windows of a feature
+            map gathered in one dimension
 
     Returns:
         maximum value as an AdditiveSharingTensor
-        index of this value in the flattened tensor as an AdditiveSharingTensor
+        index of this value in the flattened tensor (or along dim) as an
+            AdditiveSharingTensor
     """
     alice, bob = x_sh.locations
     crypto_provider = x_sh.crypto_provider
     L = x_sh.field
 
-    input_shape = x_sh.shape
-    x_sh = x_sh.view(-1)
+    if dim is None:
+        x_sh = x_sh.view(-1)
+        dim = 0
+    n_dim = len(x_sh.shape)
+    assert -n_dim <= dim < n_dim, f"Dim overflow  {-n_dim} <= {dim} < {n_dim}"
+    dim = dim % n_dim
 
     # Common Randomness
     u_sh = _shares_of_zero(1, L, crypto_provider, alice, bob)
     v_sh = _shares_of_zero(1, L, crypto_provider, alice, bob)
 
-    # 1)
-    max_sh = x_sh[0]
-    ind_sh = torch.tensor([0]).share(
-        alice, bob, crypto_provider=crypto_provider, **no_wrap
-    )  # I did not manage to create an AST with 0 and 0 as shares
-
-    for i in range(1, len(x_sh)):
-        # 3)
-        w_sh = x_sh[i] - max_sh
-
-        # 4)
-        beta_sh = relu_deriv(w_sh)
-
-        # 5)
-        max_sh = select_share(beta_sh, max_sh, x_sh[i])
+    ind_sh = indexes_along(x_sh.shape, dim).share(
+        alice, bob, field=L, crypto_provider=crypto_provider, **no_wrap
+    )
+    max_sh, ind_sh = tournament_max(x_sh, ind_sh, dim, select_share)
 
-        # 6)
-        k = torch.tensor([i]).share(
-            alice, bob, crypto_provider=crypto_provider, **no_wrap
-        )  # I did not manage to create an AST with 0 and i as shares
+    return max_sh + u_sh, ind_sh + v_sh
 
-        # 7)
-        ind_sh = select_share(beta_sh, ind_sh, k)
 
-    return max_sh + u_sh, ind_sh + v_sh
+def indexes_along(shape, dim):
+    """Returns a tensor of the given shape holding the index of each element along dim."""
+    n_dim = len(shape)
+    return (
+        torch.arange(shape[dim])
+        .view([-1 if d == dim else 1 for d in range(n_dim)])
+        .repeat([1 if d == dim else size for d, size in enumerate(shape)])
+    )
 
 
 def maxpool_deriv(x_sh):
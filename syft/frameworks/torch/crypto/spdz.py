@@ -3,7 +3,8 @@ from typing import Callable
 import torch
 
 import syft as sy
-from syft.frameworks.torch.crypto.beaver import request_triple
+from syft.frameworks.torch.crypto.beaver import get_triple
+from syft.frameworks.torch.crypto.beaver import refill_triple_pool
 from syft.workers.abstract import AbstractWorker
 
 no_wrap = {"no_wrap": True}
@@ -27,8 +28,8 @@ def spdz_mul(cmd: Callable, x_sh, y_sh, crypto_provider: AbstractWorker, field:
 
     locations = x_sh.locations
 
-    # Get triples
-    a, b, a_mul_b = request_triple(crypto_provider, cmd, field, x_sh.shape, y_sh.shape, locations)
+    # Get triples, from the triple pool of the crypto provider if it has one
+    a, b, a_mul_b = get_triple(crypto_provider, cmd, field, x_sh.shape, y_sh.shape, locations)
 
     delta = x_sh - a
     epsilon = y_sh - b
@@ -49,4 +50,10 @@ def spdz_mul(cmd: Callable, x_sh, y_sh, crypto_provider: AbstractWorker, field:
     delta_b = cmd(delta, b)
     a_epsilon = cmd(a, epsilon)
 
-    return delta_epsilon * j + delta_b + a_epsilon + a_mul_b
+    result = delta_epsilon * j + delta_b + a_epsilon + a_mul_b
+
+    # Replace the triple used if the pool is refilled after each multiplication, now
+    # that the messages of the multiplication are sent
+    refill_triple_pool(crypto_provider)
+
+    return result
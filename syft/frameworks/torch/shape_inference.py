@@ -0,0 +1,340 @@
+"""Infers locally the shape and the dtype of the results of the torch commands sent to
+remote workers, so that the pointers to these results know their shape without asking
+it to the remote worker (see PointerTensor.shape).
+
+The rules below cover the usual commands: elementwise and broadcasting operations,
+matrix products, views and reductions. Commands they don't cover, or whose arguments
+have an unknown shape, return None and the shape is requested when it is needed.
+"""
+import torch
+
+from syft.generic.pointers.pointer_tensor import PointerTensor
+
+# dtype of the results of comparisons, which depends on the version of torch
+COMPARISON_DTYPE = (torch.zeros(1) == 0).dtype
+
+CONVERSION_DTYPES = {
+    "float": torch.float32,
+    "double": torch.float64,
+    "half": torch.float16,
+    "long": torch.int64,
+    "int": torch.int32,
+    "short": torch.int16,
+    "char": torch.int8,
+    "byte": torch.uint8,
+}
+
+UNARY_COMMANDS = {
+    "abs",
+    "neg",
+    "relu",
+    "sigmoid",
+    "tanh",
+    "exp",
+    "log",
+    "sqrt",
+    "rsqrt",
+    "sin",
+    "cos",
+    "sign",
+    "floor",
+    "ceil",
+    "round",
+    "trunc",
+    "reciprocal",
+    "clamp",
+    "clone",
+    "copy",
+    "contiguous",
+    "detach",
+    "softmax",
+    "log_softmax",
+    "dropout",
+    "fix_precision",
+    "fix_prec",
+    "float_precision",
+    "float_prec",
+    *CONVERSION_DTYPES,
+}
+
+BROADCASTING_COMMANDS = {
+    "add",
+    "sub",
+    "mul",
+    "div",
+    "truediv",
+    "pow",
+    "fmod",
+    "remainder",
+    "mod",
+    "and",
+    "or",
+    "xor",
+}
+
+COMPARISON_COMMANDS = {"eq", "ne", "lt", "le", "gt", "ge"}
+
+# Names of the positional arguments of the reductions. std and var also accept a
+# single unbiased flag, see _reduction_args
+REDUCTION_COMMANDS = {
+    "sum": ("dim", "keepdim"),
+    "mean": ("dim", "keepdim"),
+    "prod": ("dim", "keepdim"),
+    "argmax": ("dim", "keepdim"),
+    "argmin": ("dim", "keepdim"),
+    "norm": ("p", "dim", "keepdim"),
+    "std": ("dim", "unbiased", "keepdim"),
+    "var": ("dim", "unbiased", "keepdim"),
+}
+
+REFLECTED_COMMANDS = {"radd", "rsub", "rmul", "rdiv", "rtruediv", "rpow", "rmatmul", "rmod"}
+
+
+def infer_result(command: tuple):
+    """Infers the shape and the dtype of the result of a command.
+
+    Args:
+        command: a command as sent by send_command, (name, self, args, kwargs)
+
+    Returns:
+        A tuple (shape, dtype), where each one is None if it is unknown.
+    """
+    name, _self, args, kwargs = command
+    name = name.split(".")[-1]
+    if name.startswith("__") and name.endswith("__"):
+        name = name[2:-2]
+
+    if _self is None:
+        # functions like torch.add(x, y), with the tensor as first argument
+        if not args:
+            return None, None
+        _self, args = args[0], args[1:]
+    elif name in REFLECTED_COMMANDS:
+        name = name[1:]
+        _self, args = args[0], (_self,) + tuple(args[1:])
+
+    self_shape, self_dtype = shape_of(_self), dtype_of(_self)
+
+    try:
+        shape = _infer_shape(name, self_shape, args, kwargs)
+    except (TypeError, ValueError, IndexError, RuntimeError):
+        shape = None
+
+    if name in CONVERSION_DTYPES:
+        dtype = CONVERSION_DTYPES[name]
+    elif name in COMPARISON_COMMANDS:
+        dtype = COMPARISON_DTYPE
+    elif name in ("argmax", "argmin"):
+        dtype = torch.int64
+    elif name == "type_as":
+        dtype = dtype_of(args[0]) if args else None
+    else:
+        dtype = self_dtype
+
+    return shape, dtype
+
+
+def shape_of(obj) -> torch.Size:
+    """Returns the shape of a command argument known locally, or None."""
+    if isinstance(obj, (int, float, bool)):
+        return torch.Size([])
+    if hasattr(obj, "child") and isinstance(obj.child, PointerTensor):
+        obj = obj.child
+    if isinstance(obj, PointerTensor):
+        return obj._shape
+    if isinstance(obj, torch.Tensor) and not hasattr(obj, "child"):
+        return obj.shape
+    return None
+
+
+def dtype_of(obj) -> torch.dtype:
+    """Returns the dtype of a command argument known locally, or None."""
+    if hasattr(obj, "child") and isinstance(obj.child, PointerTensor):
+        obj = obj.child
+    if isinstance(obj, PointerTensor):
+        return obj._dtype
+    if isinstance(obj, torch.Tensor) and not hasattr(obj, "child"):
+        return obj.dtype
+    return None
+
+
+def broadcast_shapes(*shapes) -> torch.Size:
+    """Returns the shape of the broadcast of tensors with these shapes."""
+    n_dims = max(len(shape) for shape in shapes)
+    result = []
+    for i in range(-n_dims, 0):
+        dims = {shape[i] for shape in shapes if len(shape) >= -i} - {1}
+        if len(dims) > 1:
+            raise ValueError(f"Shapes {shapes} can't be broadcast")
+        result.append(dims.pop() if dims else 1)
+    return torch.Size(result)
+
+
+def _sizes(args) -> list:
+    """Returns the sizes given as varargs (x.view(2, 3)) or as a sequence (x.view((2, 3)))."""
+    if len(args) == 1 and isinstance(args[0], (tuple, list, torch.Size)):
+        return list(args[0])
+    return list(args)
+
+
+def _dim(dim: int, n_dims: int) -> int:
+    return dim + n_dims if dim < 0 else dim
+
+
+def _infer_shape(name: str, shape: torch.Size, args: tuple, kwargs: dict) -> torch.Size:
+    if shape is None:
+        return None
+
+    if name in UNARY_COMMANDS or (name.endswith("_") and not name.startswith("_")):
+        # inplace methods return self
+        return shape
+
+    if name in BROADCASTING_COMMANDS or name in COMPARISON_COMMANDS:
+        other = args[0] if args else kwargs.get("other")
+        other_shape = shape_of(other)
+        return None if other_shape is None else broadcast_shapes(shape, other_shape)
+
+    if name in ("matmul", "mm", "bmm", "mv", "dot"):
+        other_shape = shape_of(args[0])
+        return None if other_shape is None else _matmul_shape(shape, other_shape)
+
+    if name in REDUCTION_COMMANDS:
+        reduction_args = _reduction_args(name, args, kwargs)
+        dim, keepdim = reduction_args.get("dim"), reduction_args.get("keepdim", False)
+        if not _is_dim(dim) or not isinstance(keepdim, bool):
+            return None
+        if dim is None:
+            return torch.Size([])
+        dims = {_dim(d, len(shape)) for d in (dim if isinstance(dim, (tuple, list)) else [dim])}
+        if keepdim:
+            return torch.Size(1 if i in dims else s for i, s in enumerate(shape))
+        return torch.Size(s for i, s in enumerate(shape) if i not in dims)
+
+    if name == "t":
+        return torch.Size(reversed(shape))
+
+    if name == "transpose":
+        dim0, dim1 = (_dim(d, len(shape)) for d in args[:2])
+        result = list(shape)
+        result[dim0], result[dim1] = result[dim1], result[dim0]
+        return torch.Size(result)
+
+    if name == "permute":
+        return torch.Size(shape[d] for d in _sizes(args))
+
+    if name in ("view", "reshape"):
+        return _view_shape(shape, _sizes(args))
+
+    if name in ("view_as", "reshape_as", "expand_as", "type_as"):
+        other_shape = shape_of(args[0])
+        return shape if name == "type_as" else other_shape
+
+    if name == "expand":
+        sizes = _sizes(args)
+        offset = len(sizes) - len(shape)
+        return torch.Size(shape[i - offset] if s == -1 else s for i, s in enumerate(sizes))
+
+    if name == "repeat":
+        sizes = _sizes(args)
+        padded = [1] * (len(sizes) - len(shape)) + list(shape)
+        return torch.Size(s * r for s, r in zip(padded, sizes))
+
+    if name == "squeeze":
+        dim = args[0] if args else kwargs.get("dim")
+        if dim is None:
+            return torch.Size(s for s in shape if s != 1)
+        dim = _dim(dim, len(shape))
+        return torch.Size(s for i, s in enumerate(shape) if i != dim or s != 1)
+
+    if name == "unsqueeze":
+        dim = args[0] if args else kwargs["dim"]
+        dim = dim + len(shape) + 1 if dim < 0 else dim
+        return torch.Size(list(shape[:dim]) + [1] + list(shape[dim:]))
+
+    if name == "flatten":
+        start = _dim(args[0] if args else kwargs.get("start_dim", 0), len(shape))
+        end = _dim(args[1] if len(args) > 1 else kwargs.get("end_dim", -1), len(shape))
+        flat = 1
+        for s in shape[start : end + 1]:
+            flat *= s
+        return torch.Size(list(shape[:start]) + [flat] + list(shape[end + 1 :]))
+
+    if name == "getitem":
+        return _getitem_shape(shape, args[0])
+
+    return None
+
+
+def _reduction_args(name: str, args: tuple, kwargs: dict) -> dict:
+    """Returns the arguments of a reduction by name."""
+    arg_names = REDUCTION_COMMANDS[name]
+    if name in ("std", "var") and args and isinstance(args[0], bool):
+        # std(unbiased) and var(unbiased)
+        arg_names = ("unbiased",)
+    if len(args) > len(arg_names):
+        raise TypeError(f"Too many arguments for {name}")
+    reduction_args = dict(zip(arg_names, args))
+    reduction_args.update(kwargs)
+    return reduction_args
+
+
+def _is_dim(dim) -> bool:
+    """Returns whether dim is None, a dimension or a sequence of dimensions."""
+    if dim is None:
+        return True
+    dims = dim if isinstance(dim, (tuple, list)) else [dim]
+    return all(isinstance(d, int) and not isinstance(d, bool) for d in dims)
+
+
+def _matmul_shape(shape: torch.Size, other_shape: torch.Size) -> torch.Size:
+    if len(shape) == 0 or len(other_shape) == 0:
+        raise ValueError("matmul arguments can't be scalars")
+    if len(shape) == 1 and len(other_shape) == 1:
+        return torch.Size([])
+    if len(shape) == 1:
+        return torch.Size(list(other_shape[:-2]) + [other_shape[-1]])
+    if len(other_shape) == 1:
+        return torch.Size(shape[:-1])
+    batch = broadcast_shapes(shape[:-2], other_shape[:-2])
+    return torch.Size(list(batch) + [shape[-2], other_shape[-1]])
+
+
+def _view_shape(shape: torch.Size, sizes: list) -> torch.Size:
+    numel = 1
+    for s in shape:
+        numel *= s
+    if -1 in sizes:
+        known = 1
+        for s in sizes:
+            if s != -1:
+                known *= s
+        sizes = [numel // known if s == -1 else s for s in sizes]
+    return torch.Size(sizes)
+
+
+def _getitem_shape(shape: torch.Size, indices) -> torch.Size:
+    if not isinstance(indices, tuple):
+        indices = (indices,)
+    if sum(index is Ellipsis for index in indices) > 1:
+        return None
+
+    n_indexed = sum(index is not None and index is not Ellipsis for index in indices)
+    result = []
+    dim = 0
+    for index in indices:
+        if index is None:
+            result.append(1)
+        elif index is Ellipsis:
+            n_skipped = len(shape) - n_indexed
+            result.extend(shape[dim : dim + n_skipped])
+            dim += n_skipped
+        elif isinstance(index, int):
+            dim += 1
+        elif isinstance(index, slice):
+            result.append(len(range(*index.indices(shape[dim]))))
+            dim += 1
+        else:
+            # tensor indices
+            return None
+    result.extend(shape[dim:])
+    return torch.Size(result)
@@ -1,9 +1,13 @@
+import functools
 import math
 import torch
 
 import syft as sy
+from syft.frameworks.torch.crypto import prg
 from syft.frameworks.torch.crypto import spdz
 from syft.frameworks.torch.crypto import securenn
+from syft.generic.dispatch import get_shares
+from syft.generic.dispatch import map_shares
 from syft.generic.tensor import AbstractTensor
 from syft.generic.frameworks.hook import hook_args
 from syft.generic.frameworks.overload import overloaded
@@ -12,7 +16,51 @@ from syft.workers.abstract import AbstractWorker
 no_wrap = {"no_wrap": True}
 
 
+@functools.lru_cache(maxsize=128)
+def _im2col_index(
+    input_shape: tuple, kernel_shape: tuple, output_shape: tuple, stride: tuple, dilation: tuple
+) -> torch.LongTensor:
+    """Builds the index gathering the unfolded image of a convolution (or of a max
+    pooling) from a flattened and already padded image. The result is cached, so it must
+    not be modified.
+
+    Args:
+        input_shape: number of channels, rows and columns of the padded image
+        kernel_shape: number of rows and columns of the kernel
+        output_shape: number of rows and columns of the output
+        stride: stride of the convolution along the rows and the columns
+        dilation: spacing between kernel elements along the rows and the columns
+
+    Returns:
+        a LongTensor of shape (nb_rows_out * nb_cols_out, nb_channels_in * kernel size),
+        holding on each row the positions of the values used for one output value
+    """
+    nb_channels_in, nb_rows_in, nb_cols_in = input_shape
+    nb_rows_kernel, nb_cols_kernel = kernel_shape
+    nb_rows_out, nb_cols_out = output_shape
+
+    # Relative positions of the values used by one filter convolution, which are the
+    # positions of the values used for the top left convolution
+    channels = torch.arange(nb_channels_in) * nb_rows_in * nb_cols_in
+    rows = torch.arange(nb_rows_kernel) * nb_cols_in * dilation[0]
+    cols = torch.arange(nb_cols_kernel) * dilation[1]
+    pattern = (channels.view(-1, 1, 1) + rows.view(1, -1, 1) + cols.view(1, 1, -1)).view(-1)
+
+    # For each output value, we just need to shift the receptive field
+    rows_out = torch.arange(nb_rows_out) * stride[0] * nb_cols_in
+    cols_out = torch.arange(nb_cols_out) * stride[1]
+    offsets = (rows_out.view(-1, 1) + cols_out.view(1, -1)).view(-1)
+
+    return offsets.view(-1, 1) + pattern.view(1, -1)
+
+
 class AdditiveSharingTensor(AbstractTensor):
+    # If True, init_shares sends a short seed instead of each random share, and only
+    # the last owner receives a full tensor (see crypto/prg.py). This applies to all
+    # the tensors shared with .share(), including the shares of zero and the Beaver
+    # triples.
+    seeded_shares = False
+
     def __init__(
         self,
         shares: dict = None,
@@ -112,13 +160,7 @@ class AdditiveSharingTensor(AbstractTensor):
     def get(self):
         """Fetches all shares and returns the plaintext tensor they represent"""
 
-        shares = list()
-
-        for share in self.child.values():
-            if isinstance(share, sy.PointerTensor):
-                shares.append(share.get())
-            else:
-                shares.append(share)
+        shares = list(get_shares(self.child).values())
 
         res_field = sum(shares) % self.field
 
@@ -156,19 +198,25 @@ class AdditiveSharingTensor(AbstractTensor):
 
             """
         shares = self.generate_shares(
-            self.child, n_workers=len(owners), field=self.field, random_type=torch.LongTensor
+            self.child,
+            n_workers=len(owners),
+            field=self.field,
+            random_type=torch.LongTensor,
+            seeded=self.seeded_shares,
         )
 
-        shares_dict = {}
-        for share, owner in zip(shares, owners):
-            share_ptr = share.send(owner, **no_wrap)
-            shares_dict[share_ptr.location.id] = share_ptr
+        def send_share(owner, share):
+            if isinstance(share, prg.SeededShare):
+                return share.send(owner, owner=self.owner)
+            return share.send(owner, **no_wrap)
+
+        share_ptrs = map_shares(send_share, dict(zip(owners, shares)), locations=owners)
 
-        self.child = shares_dict
+        self.child = {share_ptr.location.id: share_ptr for share_ptr in share_ptrs.values()}
         return self
 
     @staticmethod
-    def generate_shares(secret, n_workers, field, random_type):
+    def generate_shares(secret, n_workers, field, random_type, seeded=False):
         """The cryptographic method for generating shares given a secret tensor.
 
         Args:
@@ -178,11 +226,24 @@ class AdditiveSharingTensor(AbstractTensor):
             field: 1 + the max value for a share
             random_type: the torch type shares should be encoded in (use the smallest possible
                 given the choise of mod"
+            seeded: if True, the n_workers - 1 first shares are SeededShares, which
+                are sent as their seed (see crypto/prg.py), and the last share is the
+                correction share, a LongTensor.
             """
 
         if not isinstance(secret, random_type):
             secret = secret.type(random_type)
 
+        if seeded:
+            shares = [
+                prg.SeededShare(shape=secret.shape, field=field) for _ in range(n_workers - 1)
+            ]
+            correction_share = secret % field
+            for share in shares:
+                correction_share = (correction_share - share.expand()) % field
+            shares.append(correction_share)
+            return shares
+
         random_shares = [random_type(secret.shape) for _ in range(n_workers - 1)]
 
         for share in random_shares:
@@ -214,11 +275,13 @@ class AdditiveSharingTensor(AbstractTensor):
         ptr_to_sh = self.wrap().send(workers[0], **no_wrap)
         pointer = ptr_to_sh.remote_get()
 
-        pointers = [pointer]
-        for worker in workers[1:]:
-            pointers.append(pointer.copy().move(worker))
+        copies = map_shares(
+            lambda worker, _: pointer.copy().move(worker),
+            {worker: None for worker in workers[1:]},
+            locations=workers[1:],
+        )
 
-        return sy.MultiPointerTensor(children=pointers)
+        return sy.MultiPointerTensor(children=[pointer] + list(copies.values()))
 
     def zero(self):
         """
@@ -338,11 +401,7 @@ class AdditiveSharingTensor(AbstractTensor):
 
         # matches each share which needs to be added according
         # to the location of the share
-        new_shares = {}
-        for k, v in shares.items():
-            new_shares[k] = (other[k] + v) % self.field
-
-        return new_shares
+        return map_shares(lambda k, v: (other[k] + v) % self.field, shares)
 
     def __add__(self, other, **kwargs):
         """Adds two tensors. Forwards command to add. See add() for more details."""
@@ -387,11 +446,7 @@ class AdditiveSharingTensor(AbstractTensor):
 
         # matches each share which needs to be added according
         # to the location of the share
-        new_shares = {}
-        for k, v in shares.items():
-            new_shares[k] = (v - other[k]) % self.field
-
-        return new_shares
+        return map_shares(lambda k, v: (v - other[k]) % self.field, shares)
 
     def __sub__(self, *args, **kwargs):
         """Subtracts two tensors. Forwards command to sub. See .sub() for details."""
@@ -442,9 +497,7 @@ class AdditiveSharingTensor(AbstractTensor):
         assert equation == "mul" or equation == "matmul"
         cmd = getattr(torch, equation)
         if isinstance(other, dict):
-            return {
-                worker: (cmd(share, other[worker]) % self.field) for worker, share in shares.items()
-            }
+            return map_shares(lambda worker, share: cmd(share, other[worker]) % self.field, shares)
         else:
             other_is_zero = False
             if isinstance(other, (torch.LongTensor, torch.IntTensor)):
@@ -455,14 +508,12 @@ class AdditiveSharingTensor(AbstractTensor):
 
             if other_is_zero:
                 zero_shares = self.zero().child
-                return {
-                    worker: ((cmd(share, other) + zero_shares[worker]) % self.field)
-                    for worker, share in shares.items()
-                }
+                return map_shares(
+                    lambda worker, share: (cmd(share, other) + zero_shares[worker]) % self.field,
+                    shares,
+                )
             else:
-                return {
-                    worker: (cmd(share, other) % self.field) for worker, share in shares.items()
-                }
+                return map_shares(lambda worker, share: cmd(share, other) % self.field, shares)
 
     def mul(self, other):
         """Multiplies two tensors together
@@ -542,19 +593,20 @@ class AdditiveSharingTensor(AbstractTensor):
     @overloaded.method
     def _public_div(self, shares: dict, divisor):
         # TODO: how to correctly handle division in Zq?
-        divided_shares = {}
-        for i_worker, (location, pointer) in enumerate(shares.items()):
+        i_workers = {location: i_worker for i_worker, location in enumerate(shares)}
+
+        def divide_share(location, pointer):
             # Still no solution to perform a real division on a additive shared tensor
             # without a heavy crypto protocol.
             # For now, the solution works in most cases when the tensor is shared between 2 workers
             # The idea is to compute Q - (Q - pointer) / divisor for as many worker
             # as the number of times the sum of shares "crosses" Q/2.
-            if i_worker % 2 == 0:
-                divided_shares[location] = self.field - (self.field - pointer) / divisor
+            if i_workers[location] % 2 == 0:
+                return self.field - (self.field - pointer) / divisor
             else:
-                divided_shares[location] = pointer / divisor
+                return pointer / divisor
 
-        return divided_shares
+        return map_shares(divide_share, shares)
 
     def div(self, divisor):
         if isinstance(divisor, AdditiveSharingTensor):
@@ -568,11 +620,7 @@ class AdditiveSharingTensor(AbstractTensor):
     def mod(self, shares: dict, modulus: int):
         assert isinstance(modulus, int)
 
-        moded_shares = {}
-        for location, pointer in shares.items():
-            moded_shares[location] = pointer % modulus
-
-        return moded_shares
+        return map_shares(lambda location, pointer: pointer % modulus, shares)
 
     def __mod__(self, *args, **kwargs):
         return self.mod(*args, **kwargs)
@@ -783,6 +831,72 @@ class AdditiveSharingTensor(AbstractTensor):
 
                 module.pad = pad
 
+                def max_pool2d(
+                    input,
+                    kernel_size,
+                    stride=None,
+                    padding=0,
+                    dilation=1,
+                    ceil_mode=False,
+                    return_indices=False,
+                ):
+                    """Overloads torch.nn.functional.max_pool2d on shared feature maps.
+
+                    The windows of each feature map are gathered along one dimension,
+                    like the unfolded image of a convolution, and their max is computed
+                    for all of them at once with a tournament (see AST.max), which takes
+                    log2(window size) rounds of comparisons.
+                    """
+                    assert not ceil_mode, "ceil_mode is not supported on shared tensors"
+                    assert not return_indices, "return_indices is not supported on shared tensors"
+                    assert len(input.shape) == 4
+
+                    kernel_size = torch.nn.modules.utils._pair(kernel_size)
+                    stride = kernel_size if stride is None else torch.nn.modules.utils._pair(stride)
+                    padding = torch.nn.modules.utils._pair(padding)
+                    dilation = torch.nn.modules.utils._pair(dilation)
+
+                    batch_size, nb_channels, nb_rows_in, nb_cols_in = input.shape
+                    nb_rows_out = (
+                        nb_rows_in + 2 * padding[0] - dilation[0] * (kernel_size[0] - 1) - 1
+                    ) // stride[0] + 1
+                    nb_cols_out = (
+                        nb_cols_in + 2 * padding[1] - dilation[1] * (kernel_size[1] - 1) - 1
+                    ) // stride[1] + 1
+
+                    if padding != (0, 0):
+                        # The padding values must never win, like the -inf used by torch:
+                        # the values are shifted up by a public offset so that the zeros
+                        # of the padding are below all of them
+                        offset = torch.LongTensor([input.field // 8])
+                        input = torch.nn.functional.pad(
+                            input + offset, (padding[1], padding[1], padding[0], padding[0])
+                        )
+                        nb_rows_in += 2 * padding[0]
+                        nb_cols_in += 2 * padding[1]
+
+                    # Each feature map is flattened and its windows are gathered along the
+                    # last dimension
+                    windows = input.view(batch_size * nb_channels, -1)[
+                        :,
+                        _im2col_index(
+                            (1, nb_rows_in, nb_cols_in),
+                            kernel_size,
+                            (nb_rows_out, nb_cols_out),
+                            stride,
+                            dilation,
+                        ),
+                    ]
+                    result, _ = windows.max(dim=2)
+                    result = result.view(batch_size, nb_channels, nb_rows_out, nb_cols_out)
+
+                    if padding != (0, 0):
+                        result = result - offset
+
+                    return result
+
+                module.max_pool2d = max_pool2d
+
             module.functional = functional
 
         module.nn = nn
@@ -834,6 +948,10 @@ class AdditiveSharingTensor(AbstractTensor):
         """
         Return the maximum value of an additive shared tensor
 
+        The elements are compared in a tournament (see securenn.tournament_max),
+        which takes log2(n) rounds of comparisons for n elements. Ties are won by the
+        last element.
+
         Args:
             dim (None or int): if not None, the dimension on which
                 the comparison should be done
@@ -848,27 +966,20 @@ class AdditiveSharingTensor(AbstractTensor):
         values = self
         n_dim = self.dim()
 
-        # Make checks and transformation
-        assert dim is None or (0 <= dim < n_dim), f"Dim overflow  0 <= {dim} < {n_dim}"
-        # FIXME make it cleaner and robust for more options
-        if n_dim == 2:
-            if dim == None:
-                values = values.view(-1)
-            elif dim == 1:
-                values = values.t()
-        assert n_dim <= 2, "Max on tensor with len(shape) > 2 is not supported."
-
-        # Init max vals and idx to the first element
-        max_value = values[0]
-        max_index = torch.tensor([0]).share(
+        assert dim is None or -n_dim <= dim < n_dim, f"Dim overflow  {-n_dim} <= {dim} < {n_dim}"
+        if dim is None:
+            values = values.view(-1)
+        reduced_dim = 0 if dim is None else dim % n_dim
+
+        max_index = securenn.indexes_along(values.shape, reduced_dim).share(
             *self.locations, field=self.field, crypto_provider=self.crypto_provider, **no_wrap
         )
-
-        for i in range(1, len(values)):
-            a = values[i]
-            beta = a >= max_value
-            max_index = max_index + beta * (-max_index + i)  # TODO i - max_index doesn't work
-            max_value = max_value + beta * (a - max_value)
+        max_value, max_index = securenn.tournament_max(
+            values, max_index, reduced_dim, lambda beta, a, b: a + beta * (b - a)
+        )
+        if max_index.dim() == 0:
+            # the index of a max over a whole tensor is a tensor of size 1
+            max_index = max_index.view(1)
 
         if dim is None and return_idx is False:
             return max_value
@@ -508,6 +508,8 @@ class TorchTensor(AbstractTensor):
             local_autograd,
             preinitialize_grad,
         )
+        if not self.is_wrapper:
+            ptr.dtype = self.dtype
 
         return ptr
 
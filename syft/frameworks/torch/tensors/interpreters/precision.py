@@ -6,6 +6,7 @@ from syft.generic.frameworks.hook import hook_args
 from syft.generic.pointers.multi_pointer import MultiPointerTensor
 from syft.generic.tensor import AbstractTensor
 from syft.frameworks.torch.tensors.interpreters.additive_shared import AdditiveSharingTensor
+from syft.frameworks.torch.tensors.interpreters.additive_shared import _im2col_index
 from syft.generic.frameworks.overload import overloaded
 
 
@@ -616,30 +617,24 @@ class FixedPrecisionTensor(AbstractTensor):
                 nb_rows_in += 2 * padding[0]
                 nb_cols_in += 2 * padding[1]
 
-            # We want to get relative positions of values in the input tensor that are used by one filter convolution.
-            # It basically is the position of the values used for the top left convolution.
-            pattern_ind = []
-            for ch in range(nb_channels_in):
-                for r in range(nb_rows_kernel):
-                    for c in range(nb_cols_kernel):
-                        pixel = r * nb_cols_in * dilation[0] + c * dilation[1]
-                        pattern_ind.append(pixel + ch * nb_rows_in * nb_cols_in)
-
             # The image tensor is reshaped for the matrix multiplication:
             # on each row of the new tensor will be the input values used for each filter convolution
             # We will get a matrix [[in values to compute out value 0],
             #                       [in values to compute out value 1],
             #                       ...
             #                       [in values to compute out value nb_rows_out*nb_cols_out]]
+            # for each image of the batch, gathered in one indexing operation
             im_flat = input.view(batch_size, -1)
-            im_reshaped = []
-            for cur_row_out in range(nb_rows_out):
-                for cur_col_out in range(nb_cols_out):
-                    # For each new output value, we just need to shift the receptive field
-                    offset = cur_row_out * stride[0] * nb_cols_in + cur_col_out * stride[1]
-                    tmp = [ind + offset for ind in pattern_ind]
-                    im_reshaped.append(im_flat[:, tmp])
-            im_reshaped = torch.stack(im_reshaped).permute(1, 0, 2)
+            im_reshaped = im_flat[
+                :,
+                _im2col_index(
+                    (nb_channels_in, nb_rows_in, nb_cols_in),
+                    (nb_rows_kernel, nb_cols_kernel),
+                    (nb_rows_out, nb_cols_out),
+                    stride,
+                    dilation,
+                ),
+            ]
 
             # The convolution kernels are also reshaped for the matrix multiplication
             # We will get a matrix [[weights for out channel 0],
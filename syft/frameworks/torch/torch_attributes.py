@@ -4,6 +4,7 @@ from typing import Callable
 from typing import Any
 
 from syft.generic.frameworks.attributes import FrameworkAttributes
+from syft.frameworks.torch import shape_inference
 from syft.frameworks.torch.tensors.interpreters.native import TorchTensor
 
 
@@ -161,6 +162,18 @@ class TorchAttributes(FrameworkAttributes):
             self.inplace_methods[method_name] = is_inplace
             return is_inplace
 
+    def infer_result(self, command: tuple) -> tuple:
+        """Infers locally the shape and the dtype of the result of a command.
+
+        See syft.frameworks.torch.shape_inference for the commands supported.
+
+        Args:
+            command: a command as sent by send_command, (name, self, args, kwargs)
+        Returns:
+            A tuple (shape, dtype), where each one is None if it is unknown.
+        """
+        return shape_inference.infer_result(command)
+
     @staticmethod
     def apply_fix16922(torch):
         """
@@ -0,0 +1,176 @@
+"""Sends the share-wise commands of tensors held by several workers to all of them at once.
+
+Tensors like AdditiveSharingTensor and MultiPointerTensor hold one pointer per
+location, and apply each operation to every pointer. Each message blocks until its
+location answers, so when the locations are reached through a network, the operation
+would take sum(RTT). map_shares and get_shares open a pipeline instead, in the thread
+calling them: the messages for all the locations are sent with send_msg_async first,
+and their responses are waited for at the end, so that the operation takes max(RTT)
+with workers able to have several messages in flight, like WebsocketClientWorker.
+
+While a pipeline is open:
+
+    * the commands sent to the locations are deferred in a CommandBatch per location,
+      and the pointers to their results are returned right away. The batches are sent
+      when the pipeline is closed, or before another message is sent to the location,
+    * the objects sent to the locations (as by init_shares) don't wait for their
+      response,
+    * the remote objects whose pointers are garbage collected are deleted when the
+      pipeline is closed, after the commands deferred,
+    * the objects requested by get_shares are requested to all the locations before
+      their .get() is called.
+
+Pipelines are only opened for at least two locations with dispatch_concurrently set,
+and not while ids are recorded (as when a Plan is built, since its commands must be
+recorded one by one). A map_shares called inside a pipeline runs in it.
+"""
+from contextlib import contextmanager
+import threading
+from typing import Callable
+
+import syft as sy
+from syft.messaging.message import ForceObjectDeleteMessage
+
+_dispatch_thread = threading.local()
+
+
+class Pipeline:
+    """The messages sent with send_msg_async while shares are dispatched, whose
+    responses are waited for once all of them are sent.
+
+    A pipeline is open in the thread dispatching the shares, see current_pipeline().
+    """
+
+    def __init__(self):
+        # the CommandBatches deferring the commands sent to the locations
+        self.command_batches = []
+        # the ResponseFutures of the messages whose response is not used
+        self.responses = []
+        # the ResponseFutures of the objects requested, by (location id, object id),
+        # which BaseWorker.request_obj takes instead of requesting the object again
+        self.requests = {}
+        # the ids of the remote objects to delete, by location id
+        self._deletions = {}
+
+    def delete(self, sender, id_at_location, location):
+        """Deletes a remote object when the pipeline is closed."""
+        self._deletions.setdefault(location.id, (sender, location, []))[2].append(id_at_location)
+
+    def close(self):
+        """Sends the commands deferred and the deletions to all the locations, then
+        waits for all the responses which were not taken."""
+        command_batches, self.command_batches = self.command_batches, []
+        for command_batch in command_batches:
+            command_batch.location.command_batch = None
+        for command_batch in command_batches:
+            command_batch.flush(wait=False)
+
+        deletions, self._deletions = self._deletions, {}
+        for sender, location, ids in deletions.values():
+            self.responses.append(
+                sender.send_msg_async(ForceObjectDeleteMessage(tuple(ids)), location)
+            )
+
+        for command_batch in command_batches:
+            command_batch.collect()
+
+        responses, self.responses = self.responses, []
+        requests, self.requests = self.requests, {}
+        for response in responses + list(requests.values()):
+            response.result()
+
+
+def current_pipeline() -> Pipeline:
+    """Returns the pipeline open in this thread, or None."""
+    return getattr(_dispatch_thread, "pipeline", None)
+
+
+@contextmanager
+def _open_pipeline():
+    pipeline = Pipeline()
+    _dispatch_thread.pipeline = pipeline
+    try:
+        yield pipeline
+    finally:
+        _dispatch_thread.pipeline = None
+        pipeline.close()
+
+
+def map_shares(function: Callable, shares: dict, locations: list = None) -> dict:
+    """Applies function to each share of a dict {location: share}.
+
+    The calls are run in a pipeline if at least two of the locations are workers with
+    dispatch_concurrently set, for example WebsocketClientWorkers, so that the
+    messages they send are all sent before waiting for the first response.
+
+    Args:
+        function: a function taking a key of shares and its share
+        shares: a dict {location: share}, where location can be a worker or its id
+        locations: the workers the commands are sent to, by default the locations of
+            the shares which are pointers
+
+    Returns:
+        the dict {location: function(location, share)}, in the order of shares
+    """
+    if locations is None:
+        locations = [getattr(share, "location", None) for share in shares.values()]
+
+    if not _pipelined(locations):
+        return {location: function(location, share) for location, share in shares.items()}
+
+    with _open_pipeline():
+        return {location: function(location, share) for location, share in shares.items()}
+
+
+def get_shares(shares: dict) -> dict:
+    """Gets the shares of a dict {location: share} which are pointers, the other
+    shares are kept as they are.
+
+    When at least two of the pointers are held by workers with dispatch_concurrently
+    set, the objects are requested to all of them with send_msg_async before waiting
+    for the first one.
+
+    Args:
+        shares: a dict {location: share}, where location can be a worker or its id
+
+    Returns:
+        the dict {location: share.get()}, in the order of shares
+    """
+    pointers = {location: _pointer(share) for location, share in shares.items()}
+    locations = [pointer.location for pointer in pointers.values() if pointer is not None]
+
+    def get_share(location, share):
+        return share.get() if pointers[location] is not None else share
+
+    if not _pipelined(locations):
+        return {location: get_share(location, share) for location, share in shares.items()}
+
+    with _open_pipeline() as pipeline:
+        for pointer in pointers.values():
+            if (
+                pointer is not None
+                and getattr(pointer.location, "dispatch_concurrently", False)
+                and pointer.location != pointer.owner
+                and pointer.point_to_attr is None
+            ):
+                key = (pointer.location.id, pointer.id_at_location)
+                pipeline.requests[key] = pointer.owner.request_obj_async(
+                    pointer.id_at_location, pointer.location
+                )
+
+        return {location: get_share(location, share) for location, share in shares.items()}
+
+
+def _pointer(share):
+    """Returns share if it is a PointerTensor, or the PointerTensor it wraps."""
+    if getattr(share, "is_wrapper", False):
+        share = share.child
+    return share if isinstance(share, sy.PointerTensor) else None
+
+
+def _pipelined(locations: list) -> bool:
+    if current_pipeline() is not None or sy.ID_PROVIDER.record_ids:
+        return False
+
+    n_remote = sum(getattr(location, "dispatch_concurrently", False) for location in locations)
+    return n_remote > 1
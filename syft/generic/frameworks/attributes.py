@@ -40,6 +40,18 @@ class FrameworkAttributes(ABC):
         """
         pass
 
+    def infer_result(self, command: tuple) -> tuple:
+        """Infers locally the shape and the dtype of the result of a command.
+
+        Framework-dependent, see subclasses for details.
+
+        Args:
+            command: a command as sent by send_command, (name, self, args, kwargs)
+        Returns:
+            A tuple (shape, dtype), where each one is None if it is unknown.
+        """
+        return None, None
+
     def _command_guard(
         self, command: str, get_native: bool = False
     ) -> Union[Callable[..., Any], str]:
@@ -7,6 +7,7 @@ import types
 from typing import List
 
 import syft
+from syft.generic.dispatch import map_shares
 from syft.generic.frameworks.hook import hook_args
 from syft.generic.pointers.pointer_tensor import PointerTensor
 from syft.generic.pointers.multi_pointer import MultiPointerTensor
@@ -478,9 +479,10 @@ class FrameworkHook(ABC):
                 attr, self, args, kwargs
             )
 
-            results = {}
-            for k, v in new_self.items():
-                results[k] = v.__getattribute__(attr)(*dispatch(new_args, k), **new_kwargs)
+            results = map_shares(
+                lambda k, v: v.__getattribute__(attr)(*dispatch(new_args, k), **new_kwargs),
+                new_self,
+            )
 
             # Put back MultiPointerTensor on the tensors found in the response
             response = hook_args.hook_response(
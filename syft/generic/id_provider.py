@@ -1,48 +1,88 @@
-import random
+import os
+import threading
 from typing import List
+import weakref
+
 from syft import exceptions
 
+# Ids are made of a random prefix followed by a counter: each IdProvider issues ids from
+# a block of 2 ** COUNTER_BITS ids sharing a prefix, and draws a new prefix when the
+# block is used up. The ids stay below 2 ** 53 so that they are exact as floats. Most
+# of the bits go to the prefix, since the ids of two processes can only collide when
+# they draw the same prefix: with 2 ** 32 prefixes, it takes tens of thousands of
+# blocks drawn for a collision to become likely.
+PREFIX_BITS = 32
+COUNTER_BITS = 21
+BLOCK_SIZE = 2 ** COUNTER_BITS
+
 
-def create_random_id():
-    return int(10e10 * random.random())
+def create_random_prefix():
+    # os.urandom doesn't depend on the seed of random, which can be the same in
+    # several processes
+    return int.from_bytes(os.urandom(4), "little") % 2 ** PREFIX_BITS
 
 
 class IdProvider:
     """Provides Id to all syft objects.
 
-    Generate id and store the list of ids generated
-    Can take a pre set list in input and will complete
-    when it's empty.
+    Generate unique ids, from blocks of ids sharing a random prefix (see
+    COUNTER_BITS) so that the ids generated don't need to be stored to check that
+    they are unique. Can take a pre set list in input and will complete
+    when it's empty. The ids of this list which were popped are stored.
 
     An instance of IdProvider is accessible via sy.ID_PROVIDER.
     """
 
     def __init__(self, given_ids=None):
         self.given_ids = given_ids if given_ids is not None else list()
-        self.generated = set()
         self.record_ids = False
         self.recorded_ids = []
+        self.popped_given_ids = set()
+
+        # the prefixes of the blocks used so far, and the next id of the current block
+        self.prefixes = set()
+        self._prefix = None
+        self._next_id = None
+        self._block_end = None
+        self._lock = threading.Lock()
+        self._new_block()
+
+        _providers.add(self)
 
     def pop(self, *args) -> int:
-        """Provides random ids and store them.
+        """Provides a new id, and records it if the recording is on.
 
         The syntax .pop() mimics the list syntax for convenience
         and not the generator syntax.
 
         Returns:
-            Random Id.
+            Unique Id.
         """
         if len(self.given_ids):
-            random_id = self.given_ids.pop(-1)
+            new_id = self.given_ids.pop(-1)
+            self.popped_given_ids.add(new_id)
         else:
-            random_id = create_random_id()
-            while random_id in self.generated:
-                random_id = create_random_id()
-        self.generated.add(random_id)
+            with self._lock:
+                if self._next_id == self._block_end:
+                    self._new_block()
+                new_id = self._next_id
+                self._next_id += 1
+
         if self.record_ids:
-            self.recorded_ids.append(random_id)
+            self.recorded_ids.append(new_id)
+
+        return new_id
 
-        return random_id
+    def is_generated(self, obj_id) -> bool:
+        """Returns True if obj_id was generated by this provider (the ids given with
+        set_next_ids are not taken into account)."""
+        if not isinstance(obj_id, int) or obj_id < 0:
+            return False
+
+        prefix = obj_id >> COUNTER_BITS
+        if prefix == self._prefix:
+            return obj_id < self._next_id
+        return prefix in self.prefixes
 
     def set_next_ids(self, given_ids: List, check_ids: bool = True):
         """Sets the next ids returned by the id provider
@@ -51,11 +91,16 @@ class IdProvider:
 
         Args:
             given_ids: List, next ids returned by the id provider
-            check_ids: bool, check whether these ids conflict with already generated ids
+            check_ids: bool, check whether these ids conflict with already generated ids,
+                or with ids given before which were already popped
 
         """
         if check_ids:
-            intersect = self.generated.intersection(set(given_ids))
+            intersect = {
+                given_id
+                for given_id in given_ids
+                if given_id in self.popped_given_ids or self.is_generated(given_id)
+            }
             if len(intersect) > 0:
                 message = "Provided IDs {} are contained in already generated IDs".format(intersect)
                 raise exceptions.IdNotUniqueError(message)
@@ -82,3 +127,29 @@ class IdProvider:
             self.record_ids = False
             self.recorded_ids = list()
         return ret_val
+
+    def _new_block(self):
+        """Starts issuing the ids of a block with a prefix not used before."""
+        prefix = create_random_prefix()
+        while prefix in self.prefixes:
+            prefix = create_random_prefix()
+
+        self.prefixes.add(prefix)
+        self._prefix = prefix
+        self._next_id = prefix << COUNTER_BITS
+        self._block_end = self._next_id + BLOCK_SIZE
+
+
+# A process forked from another one gets a copy of its IdProviders, which would
+# issue the same ids in both processes
+_providers = weakref.WeakSet()
+
+
+def _new_blocks_after_fork():
+    for provider in _providers:
+        provider._lock = threading.Lock()
+        provider._new_block()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_new_blocks_after_fork)
@@ -67,6 +67,7 @@ class AbstractObject(ABC):
 
     def describe(self, description: str) -> "AbstractObject":
         self.description = description
+        self._update_search_index()
         return self
 
     def tag(self, *_tags: str) -> "AbstractObject":
@@ -75,8 +76,17 @@ class AbstractObject(ABC):
 
         for new_tag in _tags:
             self.tags.add(new_tag)
+        self._update_search_index()
         return self
 
+    def _update_search_index(self):
+        """Updates the index of the tags and descriptions of the owner, if self is
+        registered by it."""
+        owner = getattr(self, "owner", None)
+        objects = getattr(owner, "_objects", None)
+        if objects is not None and objects.get(self.id) is self:
+            owner.index_obj(self)
+
     @property
     def shape(self):
         return self.child.shape
@@ -1,19 +1,38 @@
+from collections import defaultdict
+import re
 from typing import List
 from typing import Union
 
 from syft.generic.frameworks.types import FrameworkTensorType
 from syft.generic.tensor import AbstractTensor
 
+# The words of the descriptions which are indexed
+TOKEN_PATTERN = re.compile(r"\w+")
+
 
 class ObjectStorage:
     """A storage of objects identifiable by their id.
 
     A wrapper object to a collection of objects where all objects
-    are stored using their IDs as keys.
+    are stored using their IDs as keys. The tags and the words of the descriptions
+    of the objects are indexed, to find the objects matching a query without looking
+    at all of them (see search_ids).
+
+    The index is updated when an object is registered, and when tag() or describe()
+    is called on a registered object. Tags and descriptions assigned directly to the
+    attributes of a registered object (as in obj.tags = {"#mnist"}) are not indexed,
+    so searches don't find the object by them until tag() or describe() is called, or
+    until the object is registered again.
     """
 
     def __init__(self):
         self._objects = {}
+        # Inverted indexes {tag: ids} and {word of description: ids}, where ids is a
+        # dict {id: None} used as an ordered set
+        self._tag_index = defaultdict(dict)
+        self._description_index = defaultdict(dict)
+        # Dict {id: (tags, words)} of the terms under which each object is indexed
+        self._indexed_terms = {}
 
     def register_obj(self, obj: object, obj_id: Union[str, int] = None):
         """Registers the specified object with the current worker node.
@@ -94,6 +113,7 @@ class ObjectStorage:
             obj: A torch or syft tensor with an id.
         """
         self._objects[obj.id] = obj
+        self.index_obj(obj)
 
     def rm_obj(self, remote_key: Union[str, int]):
         """Removes an object.
@@ -106,6 +126,7 @@ class ObjectStorage:
         """
         if remote_key in self._objects:
             del self._objects[remote_key]
+            self._unindex_obj(remote_key)
 
     def force_rm_obj(self, remote_key: Union[str, int]):
         """Forces object removal.
@@ -122,6 +143,7 @@ class ObjectStorage:
             if hasattr(obj, "child") and obj.child is not None:
                 obj.child.garbage_collect_data = True
             del self._objects[remote_key]
+            self._unindex_obj(remote_key)
 
     def clear_objects(self, return_self: bool = True):
         """Removes all objects from the object storage.
@@ -136,8 +158,119 @@ class ObjectStorage:
 
         """
         self._objects.clear()
+        self._tag_index.clear()
+        self._description_index.clear()
+        self._indexed_terms.clear()
         return self if return_self else None
 
     def current_objects(self):
         """Returns a copy of the objects in the object storage."""
         return self._objects.copy()
+
+    def index_obj(self, obj: object):
+        """Indexes the tags and the description of a registered object.
+
+        It is called by set_obj, and by tag() and describe() when the object is already
+        registered.
+
+        Args:
+            obj: An object registered in the object storage.
+        """
+        self._unindex_obj(obj.id)
+
+        tags = tuple(getattr(obj, "tags", None) or ())
+        description = getattr(obj, "description", None)
+        words = set(TOKEN_PATTERN.findall(description)) if isinstance(description, str) else ()
+        if not tags and not words:
+            return
+
+        for tag in tags:
+            self._tag_index[tag][obj.id] = None
+        for word in words:
+            self._description_index[word][obj.id] = None
+        self._indexed_terms[obj.id] = (tags, words)
+
+    def _unindex_obj(self, obj_id: Union[str, int]):
+        terms = self._indexed_terms.pop(obj_id, None)
+        if terms is None:
+            return
+
+        tags, words = terms
+        for index, keys in ((self._tag_index, tags), (self._description_index, words)):
+            for key in keys:
+                ids = index[key]
+                ids.pop(obj_id, None)
+                if not ids:
+                    del index[key]
+
+    def search_ids(self, query: List[Union[str, int]]) -> List[Union[str, int]]:
+        """Returns the ids of the objects matching all the items of a query.
+
+        An item matches an object if it is its id, one of its tags, or a part of its
+        description. The words of the item which are delimited on both sides within
+        it are looked up in the index of the descriptions. The descriptions are
+        scanned when there is no such word, as in "MNIS" or "MNIST training".
+
+        Only the tags and descriptions indexed are searched, see ObjectStorage.
+
+        Args:
+            query: A list of strings or ints to match against.
+
+        Returns:
+            A list of ids, all the ids of the object storage if the query is empty.
+        """
+        if not query:
+            return list(self._objects)
+
+        matches = []
+        for query_item in query:
+            # If deserialization produced a bytes object instead of a string,
+            # make sure it's turned back to a string or a fair comparison.
+            if isinstance(query_item, bytes):
+                query_item = query_item.decode("ascii")
+            item_matches = self._match_ids(str(query_item))
+            if not item_matches:
+                return []
+            matches.append(item_matches)
+
+        # intersect the matches, starting from the smallest
+        matches.sort(key=len)
+        return [obj_id for obj_id in matches[0] if all(obj_id in ids for ids in matches[1:])]
+
+    def _match_ids(self, query_item: str) -> dict:
+        """Returns the ids of the objects matching one item of a query, as a dict {id: None}."""
+        matches = {}
+
+        for obj_id in (query_item, int(query_item) if query_item.isdigit() else None):
+            if obj_id in self._objects:
+                matches[obj_id] = None
+
+        for obj_id in self._tag_index.get(query_item, ()):
+            # the tags may have been changed without calling tag(), and the object
+            # removed from _objects directly
+            obj = self._objects.get(obj_id)
+            if obj is not None and query_item in (getattr(obj, "tags", None) or ()):
+                matches[obj_id] = None
+
+        # the words of the item with a delimiter on both sides are whole words of the
+        # descriptions containing it, the first and the last words may be parts of words
+        words = {
+            match.group()
+            for match in TOKEN_PATTERN.finditer(query_item)
+            if match.start() > 0 and match.end() < len(query_item)
+        }
+        if words:
+            postings = sorted((self._description_index.get(word, {}) for word in words), key=len)
+            candidates = [
+                obj_id for obj_id in postings[0] if all(obj_id in ids for ids in postings[1:])
+            ]
+        else:
+            candidates = [obj_id for obj_id, (_, words) in self._indexed_terms.items() if words]
+
+        for obj_id in candidates:
+            obj = self._objects.get(obj_id)
+            description = getattr(obj, "description", None)
+            if isinstance(description, str) and query_item in description:
+                matches[obj_id] = None
+
+        return matches
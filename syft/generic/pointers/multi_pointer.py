@@ -2,6 +2,8 @@ from typing import List
 from typing import Union
 
 import syft as sy
+from syft.generic.dispatch import get_shares
+from syft.generic.dispatch import map_shares
 from syft.generic.frameworks.hook import hook_args
 from syft.generic.frameworks.overload import overloaded
 from syft.generic.frameworks.types import FrameworkShapeType
@@ -123,9 +125,7 @@ class MultiPointerTensor(AbstractTensor):
 
     def get(self, sum_results: bool = False) -> FrameworkTensor:
 
-        results = list()
-        for v in self.child.values():
-            results.append(v.get())
+        results = list(get_shares(self.child).values())
 
         if sum_results:
             return sum(results)
@@ -195,8 +195,7 @@ class MultiPointerTensor(AbstractTensor):
         # Replace all LoggingTensor with their child attribute
         new_args, new_kwargs, new_type = hook_args.unwrap_args_from_function(cmd, args, kwargs)
 
-        results = {}
-        for worker, share in new_args[0].items():
+        def send_command(worker, share):
             new_type = type(share)
             new_args_worker = tuple(MultiPointerTensor.dispatch(new_args, worker))
 
@@ -204,7 +203,9 @@ class MultiPointerTensor(AbstractTensor):
             new_command = (cmd, None, new_args_worker, new_kwargs)
 
             # Send it to the appropriate class and get the response
-            results[worker] = new_type.handle_func_command(new_command)
+            return new_type.handle_func_command(new_command)
+
+        results = map_shares(send_command, new_args[0])
 
         # Put back MultiPointerTensor on the tensors found in the response
         response = hook_args.hook_response(
@@ -4,7 +4,6 @@ from typing import TYPE_CHECKING
 
 import syft
 from syft import exceptions
-from syft.messaging.message import ForceObjectDeleteMessage
 from syft.generic.frameworks.hook import hook_args
 from syft.generic.object import AbstractObject
 
@@ -217,7 +216,7 @@ class ObjectPointer(AbstractObject):
         if hasattr(self, "owner") and self.garbage_collect_data:
             # attribute pointers are not in charge of GC
             if self.point_to_attr is None:
-                self.owner.send_msg(ForceObjectDeleteMessage(self.id_at_location), self.location)
+                self.owner.garbage_collect(self.id_at_location, self.location)
 
     def _create_attr_name_string(self, attr_name):
         if self.point_to_attr is not None:
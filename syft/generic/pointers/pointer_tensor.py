@@ -94,6 +94,8 @@ class PointerTensor(ObjectPointer, AbstractTensor):
             description=description,
         )
         self._shape = shape
+        # dtype of the tensor pointed to, None if it is unknown
+        self._dtype = None
 
     def get_shape(self):
         """Request information about the shape to the remote worker"""
@@ -117,6 +119,19 @@ class PointerTensor(ObjectPointer, AbstractTensor):
     def shape(self, new_shape):
         self._shape = new_shape
 
+    @property
+    def dtype(self):
+        """Returns the dtype of the data being pointed to, if it is known locally.
+
+        Unlike the shape, it is not requested to the remote worker so it is None
+        when it is unknown.
+        """
+        return self._dtype
+
+    @dtype.setter
+    def dtype(self, new_dtype):
+        self._dtype = new_dtype
+
     @property
     def grad(self):
         if not hasattr(self, "_grad"):
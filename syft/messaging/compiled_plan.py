@@ -0,0 +1,345 @@
+"""Compiles the readable plan of a Plan into steps which run directly on a worker.
+
+The readable plan stores the messages sent to the plan while it was built, in their
+simplified form. Running it message by message means serializing each message and
+having the worker deserialize, detail and route it again, on every call of the plan.
+
+A CompiledPlan details each command once: the functions called are resolved, the
+pointers to the objects of the worker running the plan are replaced by Slots, which
+are looked up by id when the step runs, and the tensors given as is (like the
+constants computed by plan_optimizer.fold_constants) are replaced by Constants.
+The ids of the arguments and of the results, which change from one call to another,
+are mapped through an id map instead of being replaced in the plan.
+"""
+from typing import List
+from typing import Union
+
+import syft as sy
+from syft.codes import MSGTYPE
+from syft.generic.frameworks.types import FrameworkShape
+from syft.generic.frameworks.types import FrameworkTensor
+from syft.generic.pointers.pointer_tensor import PointerTensor
+
+
+class NotCompilableError(Exception):
+    """Raised when a message of a plan can't be compiled to a CommandStep."""
+
+
+class Slot:
+    """A reference to an object of the worker running a plan, by its id in the plan.
+
+    Args:
+        id: the id of the object in the readable plan
+        attrs: the chain of attributes of the object pointed to, as in
+            PointerTensor.point_to_attr
+    """
+
+    __slots__ = ("id", "attrs")
+
+    def __init__(self, id: Union[str, int], attrs: tuple = ()):
+        self.id = id
+        self.attrs = attrs
+
+    def resolve(self, worker: "sy.workers.BaseWorker", id_map: dict) -> object:
+        """Returns the object referenced, like PointerTensor.detail on its location."""
+        obj = worker.get_obj(id_map.get(self.id, self.id))
+
+        if self.attrs and obj is not None:
+            for attr in self.attrs:
+                obj = getattr(obj, attr)
+            if obj is not None and not obj.is_wrapper and not isinstance(obj, FrameworkTensor):
+                obj = obj.wrap()
+
+        return obj
+
+    def __repr__(self):
+        return f"Slot({self.id}{''.join('.' + attr for attr in self.attrs)})"
+
+
+class Constant:
+    """A tensor given as is in a command of a plan.
+
+    Each call of the plan gets a copy of it, as it got a new tensor when the message
+    was deserialized, so that the commands modifying it don't change the plan.
+
+    Args:
+        value: the tensor
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def resolve(self) -> object:
+        value = self.value.detach().clone()
+        if self.value.requires_grad:
+            value.requires_grad_()
+        return value
+
+    def __repr__(self):
+        return f"Constant({self.value})"
+
+
+class CommandStep:
+    """A command of a plan, with its arguments detailed.
+
+    Args:
+        command_name: the name of the method or of the function called
+        function: the function called, None for a method
+        _self: the template of the object whose method is called
+        args: the template of the arguments
+        kwargs: the template of the keyword arguments
+        return_ids: the ids of the results in the readable plan
+    """
+
+    __slots__ = ("command_name", "function", "_self", "args", "kwargs", "return_ids")
+
+    def __init__(self, command_name, function, _self, args, kwargs, return_ids):
+        self.command_name = command_name
+        self.function = function
+        self._self = _self
+        self.args = args
+        self.kwargs = kwargs
+        self.return_ids = tuple(return_ids)
+
+    def run(self, worker: "sy.workers.BaseWorker", id_map: dict):
+        """Runs the command on worker, with BaseWorker.run_command as
+        BaseWorker.execute_command does."""
+        _self = None
+        if self.function is None:
+            _self = worker if self._self == "self" else self._self.resolve(worker, id_map)
+            if _self is None:
+                return
+
+        args = _bind(self.args, worker, id_map)
+        kwargs = _bind(self.kwargs, worker, id_map)
+        return_ids = tuple(id_map.get(return_id, return_id) for return_id in self.return_ids)
+        worker.run_command(self.command_name, _self, self.function, args, kwargs, return_ids)
+
+    def __repr__(self):
+        return f"CommandStep({self.command_name}, {self._self}, {self.args}, {self.kwargs})"
+
+
+class MessageStep:
+    """A message of a plan which isn't compiled, and which is sent to the worker as in
+    Plan._execute_plan.
+
+    Args:
+        message: the simplified message, as stored in the readable plan
+    """
+
+    __slots__ = ("message", "return_ids")
+
+    def __init__(self, message: tuple):
+        self.message = message
+        _, (msg_type, contents) = message
+        self.return_ids = tuple(contents[1]) if msg_type == MSGTYPE.CMD else ()
+
+    def run(self, worker: "sy.workers.BaseWorker", id_map: dict):
+        message = _map_ids(self.message, id_map) if id_map else self.message
+        bin_message = sy.serde.serialize(message, simplified=True)
+        worker.recv_msg(bin_message)
+
+    def __repr__(self):
+        return f"MessageStep({self.message})"
+
+
+class CompiledPlan:
+    """The steps of a readable plan, compiled for a given worker.
+
+    Args:
+        steps: the CommandSteps and MessageSteps, in order
+        source: the readable plan compiled
+        worker: the worker the plan is compiled for
+        lifetimes: for each step, the ids of the intermediate results removed from
+            the worker after it (see plan_optimizer.intermediate_lifetimes), or None
+            to keep them
+    """
+
+    def __init__(self, steps: List, source: List = None, worker=None, lifetimes: List = None):
+        self.steps = steps
+        self.source = source
+        self.worker = worker
+        self.frees_intermediates = lifetimes is not None
+        self.lifetimes = lifetimes if lifetimes is not None else [()] * len(steps)
+
+    @staticmethod
+    def compile(
+        readable_plan: List, worker: "sy.workers.BaseWorker", lifetimes: List = None
+    ) -> "CompiledPlan":
+        """Compiles a readable plan to run on worker.
+
+        The commands whose arguments are made of pointers to worker and of simple
+        values (strings, slices, sizes, collections of them...) are compiled to
+        CommandSteps, the other messages are kept as MessageSteps.
+        """
+        steps = []
+        for message in readable_plan:
+            try:
+                steps.append(_compile_command(message, worker))
+            except NotCompilableError:
+                steps.append(MessageStep(message))
+        return CompiledPlan(steps, source=readable_plan, worker=worker, lifetimes=lifetimes)
+
+    def run(self, worker: "sy.workers.BaseWorker", id_map: dict = None, memory_report=None):
+        """Runs the steps on worker.
+
+        Args:
+            worker: the worker running the plan
+            id_map: a dict {id in the plan: id to use instead}, for the arguments and
+                the results of the plan
+            memory_report: a plan_optimizer.MemoryReport recording the results of the
+                steps, or None
+        """
+        id_map = id_map if id_map is not None else {}
+        for step, dead_ids in zip(self.steps, self.lifetimes):
+            step.run(worker, id_map)
+
+            if memory_report is not None:
+                for return_id in step.return_ids:
+                    return_id = id_map.get(return_id, return_id)
+                    if return_id in worker._objects:
+                        memory_report.add(return_id, worker._objects[return_id])
+
+            for dead_id in dead_ids:
+                worker.rm_obj(dead_id)
+                if memory_report is not None:
+                    memory_report.remove(dead_id)
+
+    def __len__(self):
+        return len(self.steps)
+
+
+def _compile_command(message: tuple, worker: "sy.workers.BaseWorker") -> CommandStep:
+    _, (msg_type, contents) = message
+    if msg_type != MSGTYPE.CMD:
+        raise NotCompilableError(f"Message of type {msg_type}")
+
+    simple_command, return_ids = contents
+    command_name, _self, args, kwargs = _compile_value(simple_command, worker)
+
+    if not isinstance(command_name, str):
+        raise NotCompilableError(f"Command {command_name}")
+
+    if _self is None:
+        sy.framework.command_guard(command_name)
+        function = worker
+        for path in command_name.split("."):
+            function = getattr(function, path)
+    else:
+        function = None
+        if type(_self) == int:
+            _self = Slot(_self)
+        elif _self != "self" and not isinstance(_self, Slot):
+            raise NotCompilableError(f"Method called on {_self}")
+
+    return CommandStep(command_name, function, _self, args, kwargs, return_ids)
+
+
+# The serde codes of the types handled by _compile_value, filled by _type_codes() as
+# serde can't be imported here
+_TYPE_CODES = {}
+
+
+def _type_codes() -> dict:
+    if not _TYPE_CODES:
+        simplifiers = sy.serde.serde.simplifiers
+        for name, curr_type in (("tuple", tuple), ("list", list), ("dict", dict)):
+            _TYPE_CODES[name] = simplifiers[curr_type][0]
+        _TYPE_CODES["pointer"] = simplifiers[PointerTensor][0]
+        # tensors, without their subclasses like parameters
+        tensor_types = [
+            tensor_type
+            for tensor_type in FrameworkTensor
+            if not any(
+                tensor_type is not other and issubclass(tensor_type, other)
+                for other in FrameworkTensor
+            )
+        ]
+        _TYPE_CODES["tensors"] = {
+            simplifiers[tensor_type][0]
+            for tensor_type in tensor_types
+            if tensor_type in simplifiers
+        }
+        # types detailed to values which don't depend on the worker
+        value_types = (str, range, slice, type(Ellipsis)) + FrameworkShape
+        _TYPE_CODES["values"] = {
+            simplifiers[value_type][0] for value_type in value_types if value_type in simplifiers
+        }
+    return _TYPE_CODES
+
+
+def _compile_value(obj: object, worker: "sy.workers.BaseWorker") -> object:
+    """Details a simplified object, where the pointers to worker are replaced by Slots
+    and the tensors by Constants.
+
+    Raises:
+        NotCompilableError: if the object holds pointers to other workers, tensors
+            with children or other syft objects, which are detailed at each call.
+    """
+    if type(obj) not in (list, tuple):
+        return obj
+
+    codes = _type_codes()
+    code, payload = obj
+    if code == codes["tuple"]:
+        return tuple(_compile_value(item, worker) for item in payload)
+    if code == codes["list"]:
+        return [_decode(_compile_value(item, worker)) for item in payload]
+    if code == codes["dict"]:
+        return {
+            _decode(_compile_value(key, worker)): _decode(_compile_value(value, worker))
+            for key, value in payload
+        }
+    if code == codes["pointer"]:
+        return _compile_pointer(payload, worker)
+    if code in codes["tensors"]:
+        tensor = sy.serde._detail(worker, obj)
+        if hasattr(tensor, "child"):
+            raise NotCompilableError("Tensor with children")
+        return Constant(tensor)
+    if code in codes["values"]:
+        return sy.serde._detail(worker, obj)
+
+    raise NotCompilableError(f"Object of type code {code}")
+
+
+def _compile_pointer(payload: tuple, worker: "sy.workers.BaseWorker") -> Slot:
+    _, id_at_location, worker_id, point_to_attr, _, _ = payload
+    if _decode(worker_id) != worker.id:
+        raise NotCompilableError(f"Pointer to {worker_id}")
+
+    attrs = ()
+    if point_to_attr is not None:
+        attrs = tuple(attr for attr in _decode(point_to_attr).split(".") if len(attr) > 0)
+    return Slot(id_at_location, attrs)
+
+
+def _decode(obj: object) -> object:
+    return obj.decode("utf-8") if isinstance(obj, bytes) else obj
+
+
+def _bind(template: object, worker: "sy.workers.BaseWorker", id_map: dict) -> object:
+    """Returns the arguments of a step, where the Slots are replaced by the objects they
+    reference."""
+    if isinstance(template, Slot):
+        return template.resolve(worker, id_map)
+    if isinstance(template, Constant):
+        return template.resolve()
+    if type(template) == tuple:
+        return tuple(_bind(item, worker, id_map) for item in template)
+    if type(template) == list:
+        return [_bind(item, worker, id_map) for item in template]
+    if type(template) == dict:
+        return {key: _bind(value, worker, id_map) for key, value in template.items()}
+    return template
+
+
+def _map_ids(obj: object, id_map: dict) -> object:
+    """Replaces the ids of id_map in a simplified message, like Plan.replace_ids."""
+    if isinstance(obj, (list, tuple)):
+        return tuple(_map_ids(item, id_map) for item in obj)
+    if isinstance(obj, int) and obj in id_map:
+        return id_map[obj]
+    return obj
@@ -175,6 +175,68 @@ class Operation(Message):
         return Operation(sy.serde._detail(worker, msg_tuple[1][0]), msg_tuple[1][1])
 
 
+class BatchMessage(Message):
+    """Send several operations to another worker in a single message.
+
+    The operations are executed in order by the receiving worker, which sends back the
+    responses of all of them in a single response. This saves a round trip and a
+    serialization per operation when a client issues a burst of commands whose
+    results it doesn't need right away (see BaseWorker.batch).
+    """
+
+    def __init__(self, operations: list):
+        """Initialize a BatchMessage.
+
+        Args:
+            operations (list): the Operation messages to execute, in order.
+        """
+        super().__init__(codes.MSGTYPE.BATCH)
+
+        self.operations = operations
+
+    @property
+    def contents(self):
+        """Return the list of operations (backwards compatability)."""
+        return self.operations
+
+    @staticmethod
+    def simplify(ptr: "BatchMessage") -> tuple:
+        """
+        This function takes the attributes of a BatchMessage and saves them in a tuple
+        Args:
+            ptr (BatchMessage): a Message
+        Returns:
+            tuple: a tuple holding the unique attributes of the message
+        """
+        return (
+            ptr.msg_type,
+            tuple(
+                (sy.serde._simplify(operation.message), operation.return_ids)
+                for operation in ptr.operations
+            ),
+        )
+
+    @staticmethod
+    def detail(worker: AbstractWorker, msg_tuple: tuple) -> "BatchMessage":
+        """
+        This function takes the simplified tuple version of this message and converts
+        it into a BatchMessage. The simplify() method runs the inverse of this method.
+
+        Args:
+            worker (AbstractWorker): a reference to the worker necessary for detailing. Read
+                syft/serde/serde.py for more information on why this is necessary.
+            msg_tuple (Tuple): the raw information being detailed.
+        Returns:
+            ptr (BatchMessage): a BatchMessage.
+        """
+        return BatchMessage(
+            [
+                Operation(sy.serde._detail(worker, message), return_ids)
+                for message, return_ids in msg_tuple[1]
+            ]
+        )
+
+
 class ObjectMessage(Message):
     """Send an object to another worker using this message type.
 
@@ -15,6 +15,8 @@ from syft.generic.object_storage import ObjectStorage
 from syft.generic.pointers.pointer_tensor import PointerTensor
 from syft.generic.pointers.pointer_plan import PointerPlan
 from syft.generic.tensor import AbstractTensor
+from syft.messaging import plan_optimizer
+from syft.messaging.compiled_plan import CompiledPlan
 from syft.workers.abstract import AbstractWorker
 
 
@@ -218,6 +220,19 @@ class Plan(ObjectStorage, torch.nn.Module):
     single message with the references of the plan and the pointers.
     """
 
+    # If True, plans run the compiled version of their readable plan (see CompiledPlan),
+    # else they send each message of the readable plan to their owner
+    compiled_execution = True
+
+    # If True, run_batch concatenates the sets of arguments along their first dimension
+    # and runs the plan once on them, which is only correct for plans handling each row
+    # of their arguments independently (like most models at inference)
+    batch_polymorphic = False
+
+    # If True, the intermediate results of a plan are removed from the worker running
+    # it right after their last use (see plan_optimizer.intermediate_lifetimes)
+    free_intermediates = True
+
     def __init__(
         self,
         id: Union[str, int] = None,
@@ -256,6 +271,12 @@ class Plan(ObjectStorage, torch.nn.Module):
         self.result_ids = result_ids if result_ids is not None else []
         self.owner_when_built = None
         self.is_built = is_built
+        self._compiled_plan = None
+        self._id_index_cache = None
+        self._id_index_source = None
+        self._id_index_size = None
+        self._lifetimes = None
+        self._lifetimes_source = None
 
         # Pointing info towards a remote plan
         self.locations = []
@@ -313,6 +334,9 @@ class Plan(ObjectStorage, torch.nn.Module):
     def request_obj(self, *args, **kwargs):
         return self.owner.request_obj(*args, **kwargs)
 
+    def garbage_collect(self, *args, **kwargs):
+        return self.owner.garbage_collect(*args, **kwargs)
+
     def respond_to_obj_req(self, obj_id: Union[str, int]):
         """Returns the deregistered object from registry.
 
@@ -407,6 +431,38 @@ class Plan(ObjectStorage, torch.nn.Module):
 
         self.is_built = True
 
+    def optimize(
+        self, *args, passes: Tuple[str] = None, repeats: int = 10, freeze_state: bool = False
+    ):
+        """Optimizes the readable plan of the built plan.
+
+        The passes of syft.messaging.plan_optimizer remove the messages which don't
+        contribute to the results, compute in advance the commands on values known
+        when the plan was built, and fuse the chains of elementwise commands. The
+        optimized plan is sent again to the workers the plan was sent to.
+
+        Args:
+            args: if given, arguments on which the plan is run before and after the
+                optimization to measure the time saved. They should point to a worker
+                the plan was sent to: a local plan calls its forward function.
+            passes: the names of the passes to run, in order (see
+                plan_optimizer.PASSES), all of them by default.
+            repeats: the number of calls of the plan to measure its time.
+            freeze_state: if True, the commands computed only from the state of the
+                plan (like transposing a weight) are computed in advance too, with the
+                current values of the state. The plan then ignores later changes of
+                these values, so it is meant for plans which are not trained anymore.
+
+        Returns:
+            An OptimizationReport of the number of messages removed by each pass and
+            of the time saved.
+        """
+        if passes is None:
+            passes = tuple(plan_optimizer.PASSES)
+        return plan_optimizer.optimize(
+            self, *args, passes=passes, repeats=repeats, freeze_state=freeze_state
+        )
+
     def find_location(self, args):
         """
         Return location if args contain pointers else the local worker
@@ -470,23 +526,76 @@ class Plan(ObjectStorage, torch.nn.Module):
         if to_worker is None:
             to_worker = self.owner.id
 
+        id_index = self._id_index()
+        # the ids replaced are not the ones of intermediate results, so their
+        # lifetimes don't change
+        lifetimes_current = self._lifetimes_source is self.readable_plan
         self.readable_plan = list(self.readable_plan)
 
-        # for every pair of id
-        for i in range(len(from_ids)):
-            # for every message of the plan
-            for j, msg in enumerate(self.readable_plan):
-                # look for the old id and replace it with the new one
-                self.readable_plan[j] = Plan._replace_message_ids(
-                    obj=msg,
-                    change_id=from_ids[i],
-                    to_id=to_ids[i],
-                    from_worker=from_worker,
-                    to_worker=to_worker,
+        # fill the positions where the old ids appear with the new ones, as well as
+        # the ones of the old worker id
+        id_pairs = [
+            (from_id, to_id) for from_id, to_id in zip(from_ids, to_ids) if isinstance(from_id, int)
+        ]
+        if len(from_ids):
+            id_pairs.append((from_worker, to_worker))
+
+        for from_id, to_id in id_pairs:
+            positions = id_index.pop(Plan._index_key(from_id), [])
+            for position in positions:
+                message_index, path = position[0], position[1:]
+                self.readable_plan[message_index] = Plan._replace_at(
+                    self.readable_plan[message_index], path, to_id
                 )
+            if positions:
+                id_index.setdefault(Plan._index_key(to_id), []).extend(positions)
 
+        self._id_index_source = self.readable_plan
+        if lifetimes_current:
+            self._lifetimes_source = self.readable_plan
         return self
 
+    def _id_index(self) -> dict:
+        """Returns the positions of the ids in the readable plan.
+
+        The index {key: [position]} lists, for each int, str or bytes of the readable
+        plan, the positions where it appears as (message index, *indices in the nested
+        tuples). It is built once per readable plan and kept up to date by replace_ids,
+        so that replacing ids doesn't go through the whole plan.
+        """
+        if self._id_index_source is not self.readable_plan or self._id_index_size != len(
+            self.readable_plan
+        ):
+            id_index = {}
+            for message_index, message in enumerate(self.readable_plan):
+                Plan._index_values(message, (message_index,), id_index)
+            self._id_index_cache = id_index
+            self._id_index_source = self.readable_plan
+            self._id_index_size = len(self.readable_plan)
+        return self._id_index_cache
+
+    @staticmethod
+    def _index_key(value: Union[str, int, bytes]) -> tuple:
+        # 1 and True have the same key, as they are both replaced by _replace_message_ids
+        if isinstance(value, (str, bytes)):
+            return type(value), value
+        return int, value
+
+    @staticmethod
+    def _index_values(obj, position: tuple, id_index: dict):
+        for i, item in enumerate(obj):
+            if isinstance(item, (list, tuple)):
+                Plan._index_values(item, position + (i,), id_index)
+            elif isinstance(item, (int, str, bytes)):
+                id_index.setdefault(Plan._index_key(item), []).append(position + (i,))
+
+    @staticmethod
+    def _replace_at(obj, path: tuple, value):
+        """Returns obj as a tuple, where the item at path is replaced by value."""
+        i = path[0]
+        item = value if len(path) == 1 else Plan._replace_at(obj[i], path[1:], value)
+        return tuple(obj[:i]) + (item,) + tuple(obj[i + 1 :])
+
     def replace_worker_ids(self, from_worker_id: Union[str, int], to_worker_id: Union[str, int]):
         """
         Replace occurrences of from_worker_id by to_worker_id in the plan stored
@@ -598,9 +707,93 @@ class Plan(ObjectStorage, torch.nn.Module):
         self.result_ids = result_ids
 
     def _execute_plan(self):
-        for message in self.readable_plan:
+        lifetimes = self._intermediate_lifetimes() if self.free_intermediates else None
+        for i, message in enumerate(self.readable_plan):
             bin_message = sy.serde.serialize(message, simplified=True)
             _ = self.owner.recv_msg(bin_message)
+            if lifetimes is not None:
+                for dead_id in lifetimes[i]:
+                    self.owner.rm_obj(dead_id)
+
+    def _intermediate_lifetimes(self) -> List:
+        """For each message of the readable plan, the ids of the intermediate results
+        to remove after it, which are computed once per readable plan."""
+        if self._lifetimes_source is not self.readable_plan or len(self._lifetimes) != len(
+            self.readable_plan
+        ):
+            self._lifetimes = plan_optimizer.intermediate_lifetimes(
+                self.readable_plan, self.result_ids
+            )
+            self._lifetimes_source = self.readable_plan
+        return self._lifetimes
+
+    @property
+    def compiled_plan(self) -> CompiledPlan:
+        """The readable plan compiled for the owner, which is compiled again when the
+        readable plan or the owner change."""
+        compiled_plan = self._compiled_plan
+        if (
+            compiled_plan is None
+            or compiled_plan.source is not self.readable_plan
+            or compiled_plan.worker is not self.owner
+            or compiled_plan.frees_intermediates != self.free_intermediates
+        ):
+            lifetimes = self._intermediate_lifetimes() if self.free_intermediates else None
+            compiled_plan = CompiledPlan.compile(self.readable_plan, self.owner, lifetimes)
+            self._compiled_plan = compiled_plan
+        return compiled_plan
+
+    def _execute_compiled_plan(
+        self,
+        args: List[Union[FrameworkTensorType, AbstractTensor]],
+        result_ids: List[Union[str, int]],
+        memory_report: "plan_optimizer.MemoryReport" = None,
+    ):
+        """Runs the compiled plan with args, storing the results at result_ids.
+
+        Unlike _update_args, the ids of the readable plan are left unchanged.
+        """
+        id_map = dict(zip(self.arg_ids, [arg.id for arg in args]))
+        id_map.update(zip(self.result_ids, result_ids))
+        self.compiled_plan.run(self.owner, id_map, memory_report=memory_report)
+
+    def memory_report(self, *args) -> "plan_optimizer.MemoryReport":
+        """Measures the memory used by the results of the commands of the plan.
+
+        The plan runs on args, on the worker it was sent to or else on its owner, and
+        the results of its commands are recorded as they are registered and removed.
+
+        Args:
+            args: the arguments of the plan.
+
+        Returns:
+            A plan_optimizer.MemoryReport of the run, with the peak memory of the
+            results and the memory they would use if they weren't removed.
+        """
+        if not self.is_built:
+            raise RuntimeError("A plan needs to be built before measuring its memory.")
+
+        if not len(self.locations):
+            return plan_optimizer.MemoryReport(*self.measure_memory(args))
+
+        worker = self.find_location(args)
+        if worker.id not in self.ptr_plans.keys():
+            self.ptr_plans[worker.id] = self._send(worker)
+        command = ("measure_memory", self.ptr_plans[worker.id], [args], {})
+        values = self.owner.send_command(
+            message=command, recipient=worker, return_ids=[sy.ID_PROVIDER.pop()]
+        )
+        return plan_optimizer.MemoryReport(*values)
+
+    def measure_memory(self, args: List) -> tuple:
+        """Runs the local plan on args, and returns its MemoryReport as a tuple, see
+        memory_report."""
+        report = plan_optimizer.MemoryReport()
+        result_ids = [sy.ID_PROVIDER.pop() for _ in self.result_ids]
+        self._execute_compiled_plan(args, result_ids, memory_report=report)
+        for result_id in result_ids:
+            self.owner.rm_obj(result_id)
+        return report.to_tuple()
 
     def _get_plan_output(self, result_ids, return_ptr=False):
         responses = []
@@ -651,8 +844,11 @@ class Plan(ObjectStorage, torch.nn.Module):
         # so we update the plan with the
         # correct input and output ids and we run it
         elif not len(self.locations):
-            self._update_args(args, result_ids)
-            self._execute_plan()
+            if self.compiled_execution:
+                self._execute_compiled_plan(args, result_ids)
+            else:
+                self._update_args(args, result_ids)
+                self._execute_plan()
             responses = self._get_plan_output(result_ids)
             return responses
 
@@ -687,6 +883,107 @@ class Plan(ObjectStorage, torch.nn.Module):
         )
         return response
 
+    def run_batch(self, arg_sets: List, batch_polymorphic: bool = None) -> List:
+        """Runs the plan on several sets of arguments at once.
+
+        When the plan was sent to a worker, the argument sets are sent in a single
+        message, the worker runs the plan on all of them (see execute_plan_batch) and
+        the results are fetched in a single message.
+
+        Args:
+            arg_sets: the arguments of each call of the plan, as tuples (or as
+                tensors, for plans with a single argument).
+            batch_polymorphic: whether the plan handles each row of its arguments
+                independently, see Plan.batch_polymorphic, which is the default.
+
+        Returns:
+            The list of the results of the plan for each set of arguments.
+
+        Raises:
+            ValueError: if the plan has several results.
+        """
+        if not self.is_built:
+            raise RuntimeError("A plan needs to be built before being run on a batch.")
+        if len(self.result_ids) != 1:
+            raise ValueError(
+                f"The plan has {len(self.result_ids)} results: only the plans with a single "
+                "result can be run on a batch."
+            )
+        if batch_polymorphic is None:
+            batch_polymorphic = self.batch_polymorphic
+        arg_sets = [args if isinstance(args, (list, tuple)) else (args,) for args in arg_sets]
+        arg_sets = [tuple(args) for args in arg_sets]
+
+        if not len(self.locations):
+            if batch_polymorphic:
+                result = self(*[torch.cat(args) for args in zip(*arg_sets)])
+                return Plan._split_batch(result, arg_sets)
+            return [self(*args) for args in arg_sets]
+
+        worker = self.find_location(arg_sets[0])
+        if worker.id not in self.ptr_plans.keys():
+            self.ptr_plans[worker.id] = self._send(worker)
+
+        n_results = 1 if batch_polymorphic else len(arg_sets)
+        result_ids = [sy.ID_PROVIDER.pop() for _ in range(n_results)]
+        command = (
+            "execute_plan_batch",
+            self.ptr_plans[worker.id],
+            [arg_sets, batch_polymorphic],
+            {},
+        )
+        response = self.owner.send_command(message=command, recipient=worker, return_ids=result_ids)
+        results = self.owner.request_obj(tuple(result_ids), worker)
+
+        # the results were fetched, so the pointers to them don't need to delete them
+        for pointer in response if isinstance(response, (list, tuple)) else [response]:
+            pointer.garbage_collect_data = False
+
+        if batch_polymorphic:
+            return Plan._split_batch(results[0], arg_sets)
+        return list(results)
+
+    def execute_plan_batch(self, arg_sets: List[tuple], batch_polymorphic: bool) -> tuple:
+        """Runs the local plan on several sets of arguments, see run_batch.
+
+        Args:
+            arg_sets: the arguments of each call of the plan.
+            batch_polymorphic: if True, the argument sets are concatenated along their
+                first dimension and the plan runs once on them, else it runs on each
+                set in turn.
+
+        Returns:
+            A tuple holding the result for the concatenated arguments if
+            batch_polymorphic, else the results for each set of arguments.
+        """
+        if not batch_polymorphic:
+            return tuple(
+                self.execute_plan(args, [sy.ID_PROVIDER.pop() for _ in self.result_ids])
+                for args in arg_sets
+            )
+
+        batch_args = [torch.cat(args) for args in zip(*arg_sets)]
+        for arg in batch_args:
+            self.owner.register_obj(arg)
+        try:
+            result = self.execute_plan(batch_args, [sy.ID_PROVIDER.pop() for _ in self.result_ids])
+        finally:
+            for arg in batch_args:
+                self.owner.de_register_obj(arg)
+        return (result,)
+
+    @staticmethod
+    def _split_batch(result, arg_sets: List[tuple]) -> List:
+        """Splits the result of a plan run on concatenated argument sets into the
+        results for each set."""
+        sizes = [args[0].shape[0] for args in arg_sets]
+        if result.shape[0] != sum(sizes):
+            raise ValueError(
+                f"The result of the plan has {result.shape[0]} rows for {sum(sizes)} rows "
+                "of arguments: the plan isn't batch polymorphic."
+            )
+        return list(result.split(sizes))
+
     def send(self, *locations, force=False):
         """Send plan to locations.
 
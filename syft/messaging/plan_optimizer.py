@@ -0,0 +1,654 @@
+"""Optimization passes over the readable plan of a built Plan.
+
+The readable plan holds every message sent to the plan while it was built: along
+with the commands computing the results, it holds the queries made by the tracing
+(like shape requests) and the commands whose results were not used. The passes below
+work on the dataflow graph of the readable plan (PlanGraph), which records the ids
+read and written by each message:
+
+- eliminate_dead_ops removes the messages which don't contribute to the results
+  of the plan, to its state or to its arguments,
+- fold_constants computes once the commands whose inputs are values known when the
+  plan is built (and the tensors of its state, when the state is frozen), and
+  replaces their results by these values,
+- fuse_elementwise_ops replaces the chains of elementwise commands, whose
+  intermediate results are only used by the next command of the chain, by a single
+  command executed with BaseWorker.execute_fused_commands.
+
+optimize runs them in order, and reports the number of messages removed by each pass
+and, given arguments to run the plan, the time saved.
+
+The same graph gives the lifetimes of the intermediate results of the plan
+(intermediate_lifetimes), so that they are removed from the worker running the plan
+right after their last use, and MemoryReport measures the memory they use.
+"""
+import time
+from typing import Dict
+from typing import List
+from typing import Tuple
+from typing import Union
+
+import syft as sy
+from syft.codes import MSGTYPE
+from syft.generic.frameworks.types import FrameworkTensor
+from syft.messaging.compiled_plan import _type_codes
+
+# Messages which only query the worker: their response is dropped when the plan runs
+QUERY_MSGTYPES = {MSGTYPE.GET_SHAPE, MSGTYPE.IS_NONE}
+
+# Commands which have effects besides their result
+SIDE_EFFECT_COMMANDS = {
+    "backward",
+    "send",
+    "send_",
+    "get",
+    "get_",
+    "move",
+    "remote_get",
+    "remote_send",
+    "mid_get",
+    "share",
+    "share_",
+    "setitem",
+    "register_hook",
+}
+
+# Commands whose result is random, which can't be computed in advance
+RANDOM_COMMANDS = {"dropout", "bernoulli", "multinomial", "normal", "randperm"}
+
+# Elementwise commands which can be fused, with the inplace method used to apply them
+# on the result of the previous command
+ELEMENTWISE_COMMANDS = {
+    "abs": "abs_",
+    "neg": "neg_",
+    "relu": "relu_",
+    "sigmoid": "sigmoid_",
+    "tanh": "tanh_",
+    "exp": "exp_",
+    "log": "log_",
+    "sqrt": "sqrt_",
+    "rsqrt": "rsqrt_",
+    "sin": "sin_",
+    "cos": "cos_",
+    "sign": "sign_",
+    "floor": "floor_",
+    "ceil": "ceil_",
+    "round": "round_",
+    "trunc": "trunc_",
+    "reciprocal": "reciprocal_",
+    "clamp": "clamp_",
+    "add": "add_",
+    "sub": "sub_",
+    "mul": "mul_",
+    "div": "div_",
+    "truediv": "div_",
+    "pow": "pow_",
+}
+
+FUSED_COMMAND = "execute_fused_commands"
+
+
+def base_name(command_name: str) -> str:
+    """Returns the name of a command without its path and its underscores, as in
+    torch.nn.functional.relu -> relu or __add__ -> add."""
+    name = command_name.split(".")[-1]
+    if name.startswith("__") and name.endswith("__"):
+        name = name[2:-2]
+    return name
+
+
+class PlanNode:
+    """A message of the readable plan in the dataflow graph.
+
+    Attributes:
+        index: the position of the message in the readable plan
+        message: the simplified message
+        msg_type: the type of the message
+        command_name: the name of the command, for commands
+        is_function: whether the command is a function rather than a method
+        reads: the ids read by the message, once per occurrence
+        writes: the ids written by the message: the ids of its results, and the id of
+            the object modified by an inplace method
+        inplace_id: the id of the object modified by an inplace method, or None
+        side_effects: whether the message has effects which aren't recorded in reads
+            and writes (like sending a tensor, or modifying an argument)
+        chain_input: the id of the tensor whose method is called, or which is the
+            first argument of the function, if it is pointed to without attributes
+    """
+
+    __slots__ = (
+        "index",
+        "message",
+        "msg_type",
+        "command_name",
+        "is_function",
+        "reads",
+        "writes",
+        "inplace_id",
+        "side_effects",
+        "chain_input",
+    )
+
+    def __init__(self, index: int, message: tuple):
+        self.index = index
+        self.message = message
+        _, (self.msg_type, contents) = message
+
+        self.command_name = None
+        self.is_function = False
+        self.reads = []
+        self.writes = set()
+        self.inplace_id = None
+        self.chain_input = None
+
+        if self.msg_type != MSGTYPE.CMD:
+            # conservatively, every int of the message may be an id read
+            _collect_ints(contents, self.reads)
+            self.side_effects = self.msg_type not in QUERY_MSGTYPES
+            return
+
+        simple_command, return_ids = contents
+        name, _self, args, kwargs = simple_command[1]
+        self.command_name = _detail_str(name)
+        self.writes.update(return_ids)
+
+        codes = _type_codes()
+        if type(_self) == int:
+            # the id of the object whose method is called
+            self.reads.append(_self)
+        for obj in (_self, args, kwargs):
+            _collect_pointer_ids(obj, self.reads)
+
+        kwarg_names = {_detail_str(key) for key, _ in kwargs[1]} if kwargs else set()
+        name = base_name(self.command_name)
+        self.side_effects = (
+            name in SIDE_EFFECT_COMMANDS
+            or "out" in kwarg_names
+            or "inplace" in kwarg_names
+            or (_self is None and sy.framework.is_inplace_method(name))
+            or (_detail_str(_self) == "self" and self.command_name != FUSED_COMMAND)
+        )
+
+        if _self is None:
+            self.is_function = True
+            chain_input = args[1][0] if args and len(args[1]) else None
+        else:
+            chain_input = _self
+        chain_input_id = _pointer_id(chain_input, codes)
+
+        if _self is not None and sy.framework.is_inplace_method(self.command_name):
+            if chain_input_id is None:
+                self.side_effects = True
+            else:
+                self.inplace_id = chain_input_id
+                self.writes.add(chain_input_id)
+        elif chain_input_id is not None and chain_input[1][3] is None:
+            self.chain_input = chain_input_id
+
+    @property
+    def mutates(self) -> bool:
+        """Whether the message modifies objects already defined."""
+        return self.side_effects or self.inplace_id is not None
+
+    def __repr__(self):
+        name = self.command_name or sy.codes.code2MSGTYPE[self.msg_type]
+        return f"PlanNode({self.index}, {name}, reads={self.reads}, writes={self.writes})"
+
+
+class PlanGraph:
+    """The dataflow graph of a readable plan.
+
+    Args:
+        readable_plan: the readable plan of a Plan
+    """
+
+    def __init__(self, readable_plan: List):
+        self.nodes = [PlanNode(index, message) for index, message in enumerate(readable_plan)]
+
+        # the number of times each id is read
+        self.n_reads = {}
+        for node in self.nodes:
+            for read_id in node.reads:
+                self.n_reads[read_id] = self.n_reads.get(read_id, 0) + 1
+
+    def __len__(self):
+        return len(self.nodes)
+
+
+class MemoryReport:
+    """The memory used by the results of the commands of a plan during one run.
+
+    Attributes:
+        n_intermediates: the number of results registered by the commands
+        peak_bytes: the max number of bytes of these results registered at once
+        total_bytes: the number of bytes of all of them, which stay registered when
+            the intermediate results aren't removed after their last use
+        resident_bytes: the number of bytes still registered at the end of the run
+            (the results of the plan, and the intermediate results not removed)
+        n_freed: the number of intermediate results removed during the run
+    """
+
+    def __init__(
+        self,
+        n_intermediates: int = 0,
+        peak_bytes: int = 0,
+        total_bytes: int = 0,
+        resident_bytes: int = 0,
+        n_freed: int = 0,
+    ):
+        self.n_intermediates = n_intermediates
+        self.peak_bytes = peak_bytes
+        self.total_bytes = total_bytes
+        self.resident_bytes = resident_bytes
+        self.n_freed = n_freed
+        self._bytes = {}
+
+    def add(self, obj_id: Union[str, int], obj: object):
+        """Records a result registered by a command."""
+        n_bytes = _n_bytes(obj)
+        self._bytes[obj_id] = n_bytes
+        self.n_intermediates += 1
+        self.total_bytes += n_bytes
+        self.resident_bytes += n_bytes
+        self.peak_bytes = max(self.peak_bytes, self.resident_bytes)
+
+    def remove(self, obj_id: Union[str, int]):
+        """Records the removal of an intermediate result."""
+        if obj_id in self._bytes:
+            self.resident_bytes -= self._bytes.pop(obj_id)
+            self.n_freed += 1
+
+    def to_tuple(self) -> tuple:
+        """Returns the attributes of the report, to send it to another worker."""
+        return (
+            self.n_intermediates,
+            self.peak_bytes,
+            self.total_bytes,
+            self.resident_bytes,
+            self.n_freed,
+        )
+
+    def __str__(self):
+        return (
+            f"{self.n_intermediates} results ({self.n_freed} freed after their last use): "
+            f"peak {self.peak_bytes / 2 ** 20:.2f} MB, "
+            f"{self.total_bytes / 2 ** 20:.2f} MB without freeing, "
+            f"{self.resident_bytes / 2 ** 20:.2f} MB resident after the run"
+        )
+
+    def __repr__(self):
+        return f"<MemoryReport peak={self.peak_bytes} total={self.total_bytes}>"
+
+
+class OptimizationReport:
+    """The effects of the optimization of a plan.
+
+    Attributes:
+        n_ops_before: the number of messages of the readable plan before optimization
+        n_ops_after: the number of messages after optimization
+        ops_removed: a dict {pass name: number of messages removed by the pass}
+        time_before: the mean time (in s) of a call of the plan before optimization,
+            None if it was not measured
+        time_after: the mean time of a call after optimization
+    """
+
+    def __init__(self, n_ops_before: int):
+        self.n_ops_before = n_ops_before
+        self.n_ops_after = n_ops_before
+        self.ops_removed = {}
+        self.time_before = None
+        self.time_after = None
+
+    @property
+    def time_saved(self) -> float:
+        """The time (in s) saved on each call of the plan, or None if not measured."""
+        if self.time_before is None or self.time_after is None:
+            return None
+        return self.time_before - self.time_after
+
+    def __str__(self):
+        lines = [f"{self.n_ops_before} ops -> {self.n_ops_after} ops"]
+        for pass_name, n_removed in self.ops_removed.items():
+            lines.append(f"  {pass_name}: {n_removed} ops removed")
+        if self.time_saved is not None:
+            lines.append(
+                f"  time per call: {1e3 * self.time_before:.3f} ms -> "
+                f"{1e3 * self.time_after:.3f} ms ({1e3 * self.time_saved:.3f} ms saved)"
+            )
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return f"<OptimizationReport {self.n_ops_before} -> {self.n_ops_after} ops>"
+
+
+def eliminate_dead_ops(readable_plan: List, plan: "sy.Plan") -> List:
+    """Removes the messages which don't contribute to the results of the plan.
+
+    The messages are kept when they write a result of the plan or an id read by a
+    message kept after them, when they modify objects in place or when they have
+    side effects. The object modified in place may be a view of another one (as in
+    x.view(-1).add_(1)), so the inplace commands are always kept. The queries of the
+    tracing, like shape requests, are removed.
+    """
+    graph = PlanGraph(readable_plan)
+    live_ids = set(plan.result_ids)
+
+    kept = []
+    for node in reversed(graph.nodes):
+        if node.mutates or node.writes & live_ids:
+            kept.append(node.message)
+            live_ids.update(node.reads)
+
+    return kept[::-1]
+
+
+def fold_constants(readable_plan: List, plan: "sy.Plan", freeze_state: bool = False) -> List:
+    """Computes the commands whose inputs are all known when the plan is built.
+
+    The inputs of such commands are values given in the messages and the results
+    of other folded commands. With freeze_state, they can also be the tensors of the
+    state of the plan which it doesn't modify, whose current values are then used on
+    every call: changing the state afterwards doesn't change the results computed
+    from it. Their results are put in the messages which use them, in place of the
+    pointers to these results.
+    """
+    graph = PlanGraph(readable_plan)
+    codes = _type_codes()
+
+    # the ids modified after they are written, and the ids they are computed from as
+    # the objects modified may be views, are kept like the results
+    mutated_ids = set()
+    for node in reversed(graph.nodes):
+        if node.mutates or node.writes & mutated_ids:
+            mutated_ids.update(node.reads)
+    kept_ids = set(plan.result_ids) | set(plan.state_ids) | set(plan.arg_ids) | mutated_ids
+
+    # the state tensors which can be used as inputs of the folded commands, which are
+    # only replaced in these commands
+    state_values = {}
+    if freeze_state:
+        written_ids = set().union(*(node.writes for node in graph.nodes))
+        for state_id, value in _state_tensors(plan).items():
+            if state_id not in mutated_ids and state_id not in written_ids:
+                state_values[state_id] = sy.serde._simplify(value.detach())
+
+    constants = {}
+    folded = []
+    for node in graph.nodes:
+        message = node.message
+        if constants:
+            message = _replace_pointers(message, constants, codes)
+
+        if (
+            node.msg_type == MSGTYPE.CMD
+            and not node.mutates
+            and len(node.writes) == 1
+            and not node.writes & kept_ids
+            and base_name(node.command_name) not in RANDOM_COMMANDS
+            and "rand" not in base_name(node.command_name)
+            and all(read_id in constants or read_id in state_values for read_id in node.reads)
+        ):
+            result = _run_command(_replace_pointers(message, state_values, codes), plan.owner)
+            if isinstance(result, FrameworkTensor):
+                (return_id,) = node.writes
+                constants[return_id] = sy.serde._simplify(result)
+                continue
+
+        folded.append(message)
+
+    return folded
+
+
+def fuse_elementwise_ops(readable_plan: List, plan: "sy.Plan") -> List:
+    """Replaces the chains of elementwise commands by single commands.
+
+    A command is chained to the previous one when it's applied to its result, and
+    when this result is only read by this command. The chain is replaced by a command
+    executed with BaseWorker.execute_fused_commands, at the position of its last
+    command, so the chains are broken by the messages modifying objects.
+    """
+    graph = PlanGraph(readable_plan)
+    kept_ids = set(plan.result_ids) | set(plan.state_ids) | set(plan.arg_ids)
+
+    # {id of the result of the last command of a chain: chain}
+    open_chains = {}
+    chains = []
+    for node in graph.nodes:
+        if node.mutates:
+            open_chains = {}
+            continue
+
+        if (
+            node.msg_type != MSGTYPE.CMD
+            or node.chain_input is None
+            or len(node.writes) != 1
+            or base_name(node.command_name) not in ELEMENTWISE_COMMANDS
+        ):
+            continue
+
+        (result_id,) = node.writes
+        chain = open_chains.pop(node.chain_input, None)
+        if chain is None:
+            chain = []
+            chains.append(chain)
+        chain.append(node)
+        if result_id not in kept_ids and graph.n_reads.get(result_id) == 1:
+            open_chains[result_id] = chain
+
+    fused_messages = {}
+    for chain in chains:
+        if len(chain) > 1:
+            fused_messages[chain[-1].index] = _fused_message(chain)
+            for node in chain[:-1]:
+                fused_messages[node.index] = None
+
+    fused = []
+    for index, message in enumerate(readable_plan):
+        message = fused_messages.get(index, message)
+        if message is not None:
+            fused.append(message)
+    return fused
+
+
+def intermediate_lifetimes(readable_plan: List, result_ids: List[Union[str, int]]) -> List:
+    """Returns, for each message of the readable plan, the ids of the intermediate
+    results which aren't read after it.
+
+    The intermediate results are the results of the commands of the plan, except the
+    results of the plan. Those which are never read are listed with the message
+    writing them.
+    """
+    graph = PlanGraph(readable_plan)
+    last_use = {}
+    for node in graph.nodes:
+        for read_id in node.reads:
+            if read_id in last_use:
+                last_use[read_id] = node.index
+        if node.msg_type == MSGTYPE.CMD:
+            for return_id in node.writes:
+                if return_id != node.inplace_id:
+                    last_use[return_id] = node.index
+
+    for result_id in result_ids:
+        last_use.pop(result_id, None)
+
+    lifetimes = [[] for _ in graph.nodes]
+    for obj_id, index in last_use.items():
+        lifetimes[index].append(obj_id)
+    return lifetimes
+
+
+PASSES = {
+    "dead_ops": eliminate_dead_ops,
+    "constant_folding": fold_constants,
+    "fusion": fuse_elementwise_ops,
+}
+
+
+def optimize(
+    plan: "sy.Plan",
+    *args,
+    passes: Tuple[str] = tuple(PASSES),
+    repeats: int = 10,
+    freeze_state: bool = False,
+) -> OptimizationReport:
+    """Optimizes the readable plan of a built plan, see Plan.optimize."""
+    if not plan.is_built:
+        raise RuntimeError("A plan needs to be built before being optimized.")
+
+    report = OptimizationReport(len(plan.readable_plan))
+    if args:
+        report.time_before = _time_plan(plan, args, repeats)
+
+    pass_options = {"constant_folding": {"freeze_state": freeze_state}}
+    readable_plan = list(plan.readable_plan)
+    for pass_name in passes:
+        n_ops = len(readable_plan)
+        readable_plan = PASSES[pass_name](readable_plan, plan, **pass_options.get(pass_name, {}))
+        n_removed = n_ops - len(readable_plan)
+        report.ops_removed[pass_name] = report.ops_removed.get(pass_name, 0) + n_removed
+
+    plan.readable_plan = readable_plan
+    plan.plan = [sy.serde.serialize(message, simplified=True) for message in readable_plan]
+    report.n_ops_after = len(readable_plan)
+
+    # the workers the plan was sent to run the optimized plan from now on
+    for worker_id in list(plan.ptr_plans):
+        plan.ptr_plans[worker_id] = plan._send(plan.owner.get_worker(worker_id))
+
+    if args:
+        report.time_after = _time_plan(plan, args, repeats)
+
+    return report
+
+
+def _time_plan(plan: "sy.Plan", args: tuple, repeats: int) -> float:
+    """Returns the mean time of a call of the plan. When args point to a worker the
+    plan was sent to, this is the time of its compiled execution on that worker."""
+    plan(*args)
+    t0 = time.time()
+    for _ in range(repeats):
+        plan(*args)
+    return (time.time() - t0) / repeats
+
+
+def _state_tensors(plan: "sy.Plan") -> Dict:
+    """Returns the tensors of the state of the plan by their id in the plan, for
+    those which aren't pointers or wrappers of other tensors."""
+    tensors = []
+    for key in plan.state.keys:
+        value = plan.state.read(key)
+        tensors.extend(value.parameters() if hasattr(value, "parameters") else [value])
+
+    return {
+        state_id: tensor
+        for state_id, tensor in zip(plan.state_ids, tensors)
+        if isinstance(tensor, FrameworkTensor) and not hasattr(tensor, "child")
+    }
+
+
+def _n_bytes(obj: object) -> int:
+    """Returns the number of bytes of a tensor, 0 for other objects."""
+    if hasattr(obj, "element_size") and not hasattr(obj, "child"):
+        return obj.element_size() * obj.nelement()
+    return 0
+
+
+def _detail_str(obj: object) -> Union[str, object]:
+    """Returns the str of a simplified str, or obj when it isn't one."""
+    if type(obj) in (list, tuple) and obj[0] == sy.serde.serde.simplifiers[str][0]:
+        return sy.serde._detail(None, obj)
+    return obj
+
+
+def _pointer_id(obj: object, codes: Dict) -> Union[str, int]:
+    """Returns the id pointed to by a simplified pointer, or None."""
+    if type(obj) in (list, tuple) and obj[0] == codes["pointer"]:
+        return obj[1][1]
+    return None
+
+
+def _collect_ints(obj: object, ints: List):
+    if isinstance(obj, (list, tuple)):
+        for item in obj:
+            _collect_ints(item, ints)
+    elif isinstance(obj, int) and not isinstance(obj, bool):
+        ints.append(obj)
+
+
+def _collect_pointer_ids(obj: object, ids: List):
+    """Collects the ids pointed to in a simplified object. The ints of the objects which
+    aren't containers, pointers or values may be ids, so they are collected too."""
+    if type(obj) not in (list, tuple):
+        return
+
+    codes = _type_codes()
+    code, payload = obj
+    if code in (codes["tuple"], codes["list"]):
+        for item in payload:
+            _collect_pointer_ids(item, ids)
+    elif code == codes["dict"]:
+        for key, value in payload:
+            _collect_pointer_ids(key, ids)
+            _collect_pointer_ids(value, ids)
+    elif code == codes["pointer"]:
+        ids.append(payload[1])
+    elif code not in codes["values"]:
+        _collect_ints(payload, ids)
+
+
+def _replace_pointers(obj: object, values: Dict, codes: Dict) -> object:
+    """Replaces the simplified pointers to the ids of values by these values."""
+    if type(obj) not in (list, tuple):
+        return obj
+    if len(obj) == 2 and obj[0] == codes["pointer"] and obj[1][1] in values:
+        return values[obj[1][1]]
+    return tuple(_replace_pointers(item, values, codes) for item in obj)
+
+
+def _run_command(message: tuple, worker: "sy.workers.BaseWorker") -> object:
+    """Runs the command of a message without pointers, like BaseWorker.execute_command,
+    and returns its result."""
+    _, (_, (simple_command, _)) = message
+    command_name, _self, args, kwargs = sy.serde._detail(worker, simple_command)
+
+    if _self is not None:
+        if type(_self) == str and _self == "self":
+            _self = worker
+        return getattr(_self, command_name)(*args, **kwargs)
+
+    sy.framework.command_guard(command_name)
+    command = worker
+    for path in command_name.split("."):
+        command = getattr(command, path)
+    return command(*args, **kwargs)
+
+
+def _fused_message(chain: List[PlanNode]) -> tuple:
+    """Returns the message of the command executing the chain of commands."""
+    codes = _type_codes()
+    commands = []
+    for node in chain:
+        _, (_, (simple_command, _)) = node.message
+        name, _self, args, kwargs = simple_command[1]
+        if node.is_function:
+            args = (codes["tuple"], tuple(args[1][1:]))
+        inplace_name = None
+        if not kwargs or not kwargs[1]:
+            inplace_name = sy.serde._simplify(ELEMENTWISE_COMMANDS[base_name(node.command_name)])
+        commands.append((codes["tuple"], (name, node.is_function, inplace_name, args, kwargs)))
+
+    first_command = chain[0].message[1][1][0][1]
+    value = first_command[2][1][0] if chain[0].is_function else first_command[1]
+
+    message_type, (msg_type, (_, return_ids)) = chain[-1].message
+    fused_command = (
+        codes["tuple"],
+        (
+            sy.serde._simplify(FUSED_COMMAND),
+            sy.serde._simplify("self"),
+            (codes["tuple"], (value, (codes["tuple"], tuple(commands)))),
+            sy.serde._simplify({}),
+        ),
+    )
+    return message_type, (msg_type, (fused_command, return_ids))
@@ -1,6 +1,11 @@
 from syft.serde.serde import *
 from syft.serde.torch_serde import *
+from syft.serde.compression import AdaptiveCompressionPolicy
 from syft.serde.serde import _simplify
 from syft.serde.serde import _detail
 from syft.serde.serde import _compress
 from syft.serde.serde import _decompress
+from syft.serde.serde import _out_of_band_reference
+from syft.serde.serde import _out_of_band_keeps_parts
+from syft.serde.streaming import serialize_stream
+from syft.serde.streaming import deserialize_stream
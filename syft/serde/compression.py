@@ -0,0 +1,188 @@
+"""
+This file exists to provide compression policies, which choose the compression scheme
+of each serialized message instead of always applying _apply_compress_scheme.
+
+A policy is any object with a compress(decompressed_input_bin, message_type) method
+returning a tuple (compressed_result, scheme). It is installed with
+syft.serde.set_compression_policy.
+"""
+from collections import defaultdict
+import time
+
+import numpy
+
+from syft.serde.serde import LZ4
+from syft.serde.serde import NO_COMPRESSION
+from syft.serde.serde import ZSTD
+from syft.serde.serde import apply_lz4_compression
+from syft.serde.serde import apply_no_compression
+from syft.serde.serde import apply_zstd_compression
+
+COMPRESSION_FUNCTIONS = {
+    NO_COMPRESSION: apply_no_compression,
+    LZ4: apply_lz4_compression,
+    ZSTD: apply_zstd_compression,
+}
+
+
+def sample_entropy(binary: bin, sample_size: int, n_blocks: int = 4) -> float:
+    """
+    Estimates the Shannon entropy of a binary, in bits per byte, on n_blocks evenly
+    spaced blocks which add up to sample_size bytes.
+
+    Args:
+        binary (bin): the binary to sample
+        sample_size (int): the number of bytes sampled
+        n_blocks (int): the number of blocks sampled
+
+    Returns:
+        float: the entropy, between 0 (constant bytes) and 8 (uniformly random bytes)
+    """
+    data = numpy.frombuffer(binary, dtype=numpy.uint8)
+    if len(data) > sample_size:
+        block_size = sample_size // n_blocks
+        starts = numpy.linspace(0, len(data) - block_size, n_blocks).astype(numpy.int64)
+        data = numpy.concatenate([data[start : start + block_size] for start in starts])
+
+    counts = numpy.bincount(data, minlength=256)
+    probabilities = counts[counts > 0] / len(data)
+    return max(0.0, float(-(probabilities * numpy.log2(probabilities)).sum()))
+
+
+class AdaptiveCompressionPolicy:
+    """Chooses between NO_COMPRESSION, LZ4 and ZSTD for each message.
+
+    A message is sent uncompressed if it is smaller than size_threshold, if a sample of
+    its bytes looks random (as MPC shares or float payloads do), or if messages of the
+    same type recently didn't compress well. Messages of at least zstd_threshold bytes
+    are compressed with ZSTD, which is slower but compresses more, and the others
+    with LZ4. Message types skipped because of their compression ratio are compressed
+    again every probe_interval messages, so that the policy notices when they start
+    to compress.
+
+    The counters attribute holds, per scheme, the number of messages, the bytes before
+    and after compression and the time spent compressing. The number of bytes which
+    were not compressed and an estimate of the time this saved are given by
+    skipped_bytes and estimated_time_saved().
+
+    Args:
+        size_threshold: messages smaller than this (in bytes) are not compressed.
+        zstd_threshold: messages of at least this size (in bytes) use ZSTD.
+        entropy_threshold: messages whose sampled entropy (in bits per byte) is above
+            this are not compressed.
+        sample_size: number of bytes sampled to estimate the entropy.
+        min_ratio: message types whose average compressed size over original size is
+            above this are not compressed.
+        probe_interval: number of messages of a skipped type between two probes.
+        smoothing: weight of the latest message in the average compression ratio.
+    """
+
+    def __init__(
+        self,
+        size_threshold: int = 1024,
+        zstd_threshold: int = 2 ** 20,
+        entropy_threshold: float = 7.5,
+        sample_size: int = 4096,
+        min_ratio: float = 0.9,
+        probe_interval: int = 100,
+        smoothing: float = 0.2,
+    ):
+        self.size_threshold = size_threshold
+        self.zstd_threshold = zstd_threshold
+        self.entropy_threshold = entropy_threshold
+        self.sample_size = sample_size
+        self.min_ratio = min_ratio
+        self.probe_interval = probe_interval
+        self.smoothing = smoothing
+
+        # average compression ratio and messages skipped since the last probe,
+        # per message type
+        self.ratios = {}
+        self.skipped_since_probe = defaultdict(int)
+
+        self.counters = {
+            scheme: {"messages": 0, "bytes_in": 0, "bytes_out": 0, "time": 0.0}
+            for scheme in COMPRESSION_FUNCTIONS
+        }
+        self.skipped_bytes = 0
+
+    def choose_scheme(self, decompressed_input_bin: bin, message_type=None) -> int:
+        """
+        Chooses the compression scheme of a message
+
+        Args:
+            decompressed_input_bin: the binary to be compressed
+            message_type: the type of the message, used to look up the compression ratio
+                of the previous messages of this type
+
+        Returns:
+            the scheme code
+        """
+        size = len(decompressed_input_bin)
+        if size < self.size_threshold:
+            return NO_COMPRESSION
+
+        ratio = self.ratios.get(message_type)
+        if ratio is not None and ratio > self.min_ratio:
+            self.skipped_since_probe[message_type] += 1
+            if self.skipped_since_probe[message_type] < self.probe_interval:
+                return NO_COMPRESSION
+            self.skipped_since_probe[message_type] = 0
+
+        elif sample_entropy(decompressed_input_bin, self.sample_size) > self.entropy_threshold:
+            return NO_COMPRESSION
+
+        return ZSTD if size >= self.zstd_threshold else LZ4
+
+    def compress(self, decompressed_input_bin: bin, message_type=None) -> tuple:
+        """
+        Compresses a binary with the scheme given by choose_scheme and updates the
+        counters. If the compressed binary isn't smaller than the input, the input is
+        returned instead.
+
+        Args:
+            decompressed_input_bin: the binary to be compressed
+            message_type: the type of the message
+
+        Returns:
+            a tuple (compressed_result, scheme)
+        """
+        size = len(decompressed_input_bin)
+        scheme = self.choose_scheme(decompressed_input_bin, message_type)
+
+        t0 = time.perf_counter()
+        compressed, scheme = COMPRESSION_FUNCTIONS[scheme](decompressed_input_bin)
+        duration = time.perf_counter() - t0
+
+        if scheme != NO_COMPRESSION:
+            ratio = len(compressed) / size
+            previous_ratio = self.ratios.get(message_type, ratio)
+            self.ratios[message_type] = (
+                self.smoothing * ratio + (1 - self.smoothing) * previous_ratio
+            )
+            if len(compressed) >= size:
+                compressed, scheme = decompressed_input_bin, NO_COMPRESSION
+        elif size >= self.size_threshold:
+            self.skipped_bytes += size
+
+        counter = self.counters[scheme]
+        counter["messages"] += 1
+        counter["bytes_in"] += size
+        counter["bytes_out"] += len(compressed)
+        counter["time"] += duration
+
+        return compressed, scheme
+
+    def estimated_time_saved(self) -> float:
+        """Estimates the time (in seconds) which compressing the skipped bytes with LZ4
+        would have taken, from the LZ4 throughput observed so far."""
+        lz4_counter = self.counters[LZ4]
+        if lz4_counter["time"] == 0:
+            return 0.0
+        return self.skipped_bytes * lz4_counter["time"] / lz4_counter["bytes_in"]
+
+    def reset_counters(self):
+        """Resets the counters, the observed compression ratios are kept."""
+        for counter in self.counters.values():
+            counter.update(messages=0, bytes_in=0, bytes_out=0, time=0.0)
+        self.skipped_bytes = 0
@@ -27,13 +27,23 @@ tuple type. The same is true for all other simplifier/detailer functions.
 
 By default, the simplification/detail operations expect Torch tensors. If the setup requires other
 serialization process, it can override the functions _serialize_tensor and _deserialize_tensor
+in syft/serde/torch_serde.py, which default to the raw buffer strategy.
 
 By default, we serialize using msgpack and compress using lz4.
-If different compressions are required, the worker can override the function apply_compress_scheme
+If different compressions are required, the worker can override the function apply_compress_scheme,
+or set a compression policy choosing the scheme of each message (see set_compression_policy)
+
+Large tensor and array buffers can also be sent out of band (see serialize): the message
+is then a list made of a framing prefix, the compressed msgpack document and the raw
+buffers, which transports can write one after the other without concatenating them.
+Objects too large to be held several times in memory can be sent as a sequence of
+bounded chunks with serialize_stream and deserialize_stream (see streaming.py).
 """
 from collections import OrderedDict
 
 import inspect
+import struct
+import threading
 import lz4
 from lz4 import (  # noqa: F401
     frame,
@@ -42,11 +52,13 @@ import msgpack
 import zstd
 
 import syft
+from syft import codes
 from syft import dependency_check
 from syft.federated.train_config import TrainConfig
 from syft.frameworks.torch.tensors.decorators.logging import LoggingTensor
 from syft.frameworks.torch.tensors.interpreters.precision import FixedPrecisionTensor
 from syft.frameworks.torch.tensors.interpreters.additive_shared import AdditiveSharingTensor
+from syft.frameworks.torch.crypto.prg import SeededShare
 from syft.frameworks.torch.tensors.interpreters.crt_precision import CRTPrecisionTensor
 from syft.frameworks.torch.tensors.interpreters.autograd import AutogradTensor
 from syft.generic.pointers.multi_pointer import MultiPointerTensor
@@ -65,6 +77,7 @@ from syft.messaging.message import GetShapeMessage
 from syft.messaging.message import ForceObjectDeleteMessage
 from syft.messaging.message import SearchMessage
 from syft.messaging.message import PlanCommandMessage
+from syft.messaging.message import BatchMessage
 from syft.serde.native_serde import MAP_NATIVE_SIMPLIFIERS_AND_DETAILERS
 from syft.workers.abstract import AbstractWorker
 from syft.workers.base import BaseWorker
@@ -115,6 +128,8 @@ OBJ_SIMPLIFIER_AND_DETAILERS = [
     ForceObjectDeleteMessage,
     SearchMessage,
     PlanCommandMessage,
+    BatchMessage,
+    SeededShare,
 ]
 
 # If an object implements its own force_simplify and force_detail functions it should be stored in this list
@@ -133,6 +148,20 @@ scheme_to_bytes = {
     ZSTD: ZSTD.to_bytes(1, byteorder="big"),
 }
 
+# Object choosing the compression scheme of each message, see set_compression_policy
+compression_policy = None
+
+# OUT OF BAND FRAMING
+# Scheme code of framed messages, it takes the place of the compression scheme code
+OUT_OF_BAND = 43
+scheme_to_bytes[OUT_OF_BAND] = OUT_OF_BAND.to_bytes(1, byteorder="big")
+# msgpack extension type code of references to out of band buffers
+OUT_OF_BAND_EXT_CODE = 1
+# Buffers smaller than this (in bytes) are always kept inside the msgpack document
+OUT_OF_BAND_THRESHOLD = 2 ** 16
+# Holds the out of band buffers recorded by the serialize call running in each thread
+_out_of_band_state = threading.local()
+
 ## SECTION: High Level Simplification Router
 def _force_full_simplify(obj: object) -> object:
     """To force a full simplify generally if the usual _simplify is not suitable.
@@ -240,6 +269,7 @@ def serialize(
     force_no_compression: bool = False,
     force_no_serialization: bool = False,
     force_full_simplification: bool = False,
+    out_of_band: bool = False,
 ) -> bin:
     """This method can serialize any object PySyft needs to send or store.
 
@@ -266,6 +296,10 @@ def serialize(
             flag to True will cause a VirtualWorker to be serialized WITH all of its
             tensors while by default VirtualWorker objects only serialize a small
             amount of metadata.
+        out_of_band (bool): If true, tensor and array buffers of at least
+            OUT_OF_BAND_THRESHOLD bytes are not copied into the msgpack document
+            nor compressed. If any such buffer is found, the result is a list holding
+            a framing prefix, the msgpack document and the buffers (see _frame).
 
     Returns:
         binary: the serialized form of the object.
@@ -274,13 +308,12 @@ def serialize(
     # simplify difficult-to-serialize objects. See the _simpliy method
     # for details on how this works. The general purpose is to handle types
     # which the fast serializer cannot handle
-    if not simplified:
-        if force_full_simplification:
-            simple_objects = _force_full_simplify(obj)
-        else:
-            simple_objects = _simplify(obj)
-    else:
-        simple_objects = obj
+    simple_objects, buffers = _simplify_out_of_band(
+        obj,
+        simplified=simplified,
+        force_full_simplification=force_full_simplification,
+        out_of_band=out_of_band and not force_no_serialization,
+    )
 
     # 2) Serialize
     # serialize into a binary
@@ -289,6 +322,13 @@ def serialize(
     else:
         binary = msgpack.dumps(simple_objects)
 
+    if buffers:
+        if force_no_compression:
+            binary = scheme_to_bytes[NO_COMPRESSION] + binary
+        else:
+            binary = _compress(binary, _message_type(obj))
+        return _frame(binary, buffers)
+
     # 3) Compress
     # optionally compress the binary and return the result
     # prepend a 1-byte header '0' or '1' to the output stream
@@ -301,7 +341,7 @@ def serialize(
     if force_no_compression:
         return binary
     else:
-        return _compress(binary)
+        return _compress(binary, _message_type(obj))
 
 
 def deserialize(binary: bin, worker: AbstractWorker = None, details=True) -> object:
@@ -327,13 +367,27 @@ def deserialize(binary: bin, worker: AbstractWorker = None, details=True) -> obj
         # TODO[jvmancuso]: This might be worth a standalone function.
         worker = syft.framework.hook.local_worker
 
+    # 0) Split the msgpack document from the buffers sent out of band
+    binary, buffers = _unframe(binary)
+
     # 1) Decompress the binary if needed
     binary = _decompress(binary)
 
     # 2) Deserialize
     # This function converts the binary into the appropriate python
     # object (or nested dict/collection of python objects)
-    simple_objects = msgpack.loads(binary, use_list=False)
+    if buffers:
+
+        def resolve_out_of_band_reference(code, data):
+            if code == OUT_OF_BAND_EXT_CODE:
+                return buffers[int.from_bytes(data, byteorder="little")]
+            return msgpack.ExtType(code, data)
+
+        simple_objects = msgpack.loads(
+            binary, use_list=False, ext_hook=resolve_out_of_band_reference
+        )
+    else:
+        simple_objects = msgpack.loads(binary, use_list=False)
 
     if details:
         # 3) Detail
@@ -349,9 +403,176 @@ def deserialize(binary: bin, worker: AbstractWorker = None, details=True) -> obj
         return simple_objects
 
 
+## SECTION: Out of band framing
+
+
+def _simplify_out_of_band(
+    obj: object,
+    simplified: bool = False,
+    force_full_simplification: bool = False,
+    out_of_band: bool = False,
+    keep_parts: bool = False,
+) -> tuple:
+    """
+    Simplifies an object, recording the buffers sent out of band of the msgpack
+    document if out_of_band is True (see serialize).
+
+    Args:
+        obj (object): the object to be simplified
+        simplified (bool): if True, obj is already simplified
+        force_full_simplification (bool): see serialize
+        out_of_band (bool): whether large buffers are sent out of band
+        keep_parts (bool): if True, the buffers which simplifiers give as a tuple of
+            parts (see _out_of_band_reference) are recorded as such, instead of being
+            joined. The parts are views on the objects serialized, which must not be
+            modified until they are sent.
+
+    Returns:
+        tuple: the simplified object and the list of the buffers recorded
+    """
+    # Nested calls to serialize must not record buffers in the list of the outer call
+    outer_state = (
+        getattr(_out_of_band_state, "buffers", None),
+        getattr(_out_of_band_state, "keep_parts", False),
+    )
+    _out_of_band_state.buffers = [] if out_of_band else None
+    _out_of_band_state.keep_parts = keep_parts
+    try:
+        if not simplified:
+            if force_full_simplification:
+                simple_objects = _force_full_simplify(obj)
+            else:
+                simple_objects = _simplify(obj)
+        else:
+            simple_objects = obj
+    finally:
+        buffers = _out_of_band_state.buffers
+        _out_of_band_state.buffers, _out_of_band_state.keep_parts = outer_state
+
+    return simple_objects, buffers
+
+
+def _out_of_band_keeps_parts() -> bool:
+    """
+    Returns True if the running serialize call records the out of band buffers given
+    as a tuple of parts without joining them, in which case simplifiers can avoid
+    copying large buffers.
+    """
+    return (
+        getattr(_out_of_band_state, "buffers", None) is not None
+        and _out_of_band_state.keep_parts
+    )
+
+
+def _out_of_band_reference(buffer) -> msgpack.ExtType:
+    """
+    Records a buffer to be sent out of band of the msgpack document, if the running
+    serialize call was asked to do so and the buffer is large enough.
+
+    Args:
+        buffer: the buffer, or a tuple of the parts of the buffer, which are joined
+            unless the running serialize call keeps them (see _simplify_out_of_band).
+            It must not be modified afterwards.
+
+    Returns:
+        a reference to put in the simplified object in place of the buffer, or None if
+        the buffer should stay inside the msgpack document
+    """
+    buffers = getattr(_out_of_band_state, "buffers", None)
+    if buffers is None or _buffer_size(buffer) < OUT_OF_BAND_THRESHOLD:
+        return None
+
+    if isinstance(buffer, tuple) and not _out_of_band_state.keep_parts:
+        buffer = b"".join(buffer)
+    buffers.append(buffer)
+    return msgpack.ExtType(OUT_OF_BAND_EXT_CODE, (len(buffers) - 1).to_bytes(4, "little"))
+
+
+def _buffer_size(buffer) -> int:
+    """Returns the number of bytes of a buffer, or of a tuple of parts of a buffer."""
+    if isinstance(buffer, tuple):
+        return sum(map(_buffer_size, buffer))
+    return memoryview(buffer).nbytes
+
+
+def _frame(binary: bin, buffers: list) -> list:
+    """
+    Builds the list of chunks of a message with out of band buffers. The chunks are
+    a prefix, the msgpack document and the buffers. The prefix is made of the
+    OUT_OF_BAND code, the number of buffers and the lengths of the document and of
+    the buffers, so that the chunks can also be sent concatenated.
+
+    Args:
+        binary (bin): the compressed msgpack document
+        buffers (list): the buffers referenced in the document
+
+    Returns:
+        list: the chunks of the message
+    """
+    prefix = scheme_to_bytes[OUT_OF_BAND] + struct.pack(
+        f"<I{len(buffers) + 1}Q", len(buffers), len(binary), *map(_buffer_size, buffers)
+    )
+    return [prefix, binary] + buffers
+
+
+def _unframe(binary) -> tuple:
+    """
+    Reverses _frame. The buffers returned are views on the input, they are not copied.
+
+    Args:
+        binary: a binary or the list of chunks of a message
+
+    Returns:
+        tuple: the compressed msgpack document and the list of out of band buffers
+            (empty if the message has none)
+    """
+    if isinstance(binary, (list, tuple)):
+        return binary[1], binary[2:]
+
+    if binary[0] != OUT_OF_BAND:
+        return binary, []
+
+    view = memoryview(binary)
+    (n_buffers,) = struct.unpack_from("<I", view, 1)
+    lengths = struct.unpack_from(f"<{n_buffers + 1}Q", view, 5)
+
+    chunks = []
+    offset = 5 + 8 * (n_buffers + 1)
+    for length in lengths:
+        chunks.append(view[offset : offset + length])
+        offset += length
+
+    return chunks[0], chunks[1:]
+
+
 ## SECTION: chosen Compression Algorithm
 
 
+def set_compression_policy(policy):
+    """
+    Sets the object choosing the compression scheme of each message. When a policy
+    is set, it is used instead of _apply_compress_scheme.
+
+    Args:
+        policy: an object with a compress(decompressed_input_bin, message_type) method
+            returning a tuple (compressed_result, scheme), such as an
+            AdaptiveCompressionPolicy from syft/serde/compression.py. None to go back
+            to _apply_compress_scheme.
+    """
+    global compression_policy
+    compression_policy = policy
+
+
+def _message_type(obj: object) -> str:
+    """
+    Returns the type of a serialized object, which compression policies use to group
+    messages: the message type name for messages, the class name otherwise.
+    """
+    if isinstance(obj, Message):
+        return codes.code2MSGTYPE[obj.msg_type]
+    return type(obj).__name__
+
+
 def _apply_compress_scheme(decompressed_input_bin) -> tuple:
     """
     Apply the selected compression scheme.
@@ -404,19 +625,26 @@ def apply_no_compression(decompressed_input_bin) -> tuple:
     return decompressed_input_bin, NO_COMPRESSION
 
 
-def _compress(decompressed_input_bin: bin) -> bin:
+def _compress(decompressed_input_bin: bin, message_type: str = None) -> bin:
     """
-    This function compresses a binary using the function _apply_compress_scheme
+    This function compresses a binary using the compression policy if one is set,
+    or the function _apply_compress_scheme otherwise
     if the input has been already compressed in some step, it will return it as it is
 
     Args:
         decompressed_input_bin (bin): binary to be compressed
+        message_type (str): the type of the message, given to the compression policy
 
     Returns:
         bin: a compressed binary
 
     """
-    compress_stream, compress_scheme = _apply_compress_scheme(decompressed_input_bin)
+    if compression_policy is not None:
+        compress_stream, compress_scheme = compression_policy.compress(
+            decompressed_input_bin, message_type
+        )
+    else:
+        compress_stream, compress_scheme = _apply_compress_scheme(decompressed_input_bin)
     try:
         z = scheme_to_bytes[compress_scheme] + compress_stream
         return z
@@ -441,13 +669,14 @@ def _decompress(binary: bin) -> bin:
     # check the 1-byte header to check the compression scheme used
     compress_scheme = binary[0]
 
-    # remove the 1-byte header from the input stream
-    binary = binary[1:]
+    # remove the 1-byte header from the input stream, without copying it
+    binary = memoryview(binary)[1:]
     # 1)  Decompress or return the original stream
     if compress_scheme == LZ4:
         return lz4.frame.decompress(binary)
     elif compress_scheme == ZSTD:
-        return zstd.decompress(binary)
+        # zstd only accepts bytes
+        return zstd.decompress(binary.tobytes())
     elif compress_scheme == NO_COMPRESSION:
         return binary
     else:
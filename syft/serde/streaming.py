@@ -0,0 +1,139 @@
+"""
+This file exists to provide a streaming version of serialize and deserialize, for
+objects too large to be held several times in memory.
+
+serialize_stream is a generator of chunks of at most STREAM_CHUNK_SIZE bytes (before
+compression). Each chunk is compressed on its own, so it is a complete LZ4 or ZSTD
+frame prefixed with the usual 1-byte scheme header. deserialize_stream reads the
+chunks one at a time and copies their content into buffers allocated beforehand
+with their final size, which the tensors are then built on without another copy.
+
+The bytes carried by the chunks are a message in the out of band format of
+serde._frame, whose msgpack document is not compressed: the prefix gives the size
+of the document and of each buffer before they are received. On the sending side,
+the out of band buffers of tensors and arrays are views on their data, which is
+read chunk by chunk and never copied as a whole.
+"""
+import struct
+
+import msgpack
+
+from syft.serde import serde
+from syft.workers.abstract import AbstractWorker
+
+STREAM_CHUNK_SIZE = 2 ** 20
+
+
+def serialize_stream(obj: object, chunk_size: int = STREAM_CHUNK_SIZE):
+    """
+    Serializes an object into a sequence of compressed chunks.
+
+    The tensor and array buffers of at least OUT_OF_BAND_THRESHOLD bytes are not
+    copied into the msgpack document: the chunks are read from views on their data.
+    Each part of the message is released once it has been streamed, so that besides
+    the object itself, the memory used doesn't grow with the size of the message.
+    The tensors and arrays must not be modified until the last chunk is produced.
+
+    Args:
+        obj (object): the object to be serialized
+        chunk_size (int): the number of bytes of the message held by each chunk
+
+    Yields:
+        bin: the compressed chunks, to be given in the same order to
+            deserialize_stream
+    """
+    simple_objects, buffers = serde._simplify_out_of_band(obj, out_of_band=True, keep_parts=True)
+    binary = serde.scheme_to_bytes[serde.NO_COMPRESSION] + msgpack.dumps(simple_objects)
+    del simple_objects
+    message = serde._frame(binary, buffers)
+    del binary, buffers
+    message_type = serde._message_type(obj)
+
+    # the buffers given as parts are streamed one part after the other
+    message = [
+        part for chunk in message for part in (chunk if isinstance(chunk, tuple) else (chunk,))
+    ]
+
+    pieces, pending = [], 0
+    for i in range(len(message)):
+        part = memoryview(message[i]).cast("B")
+        message[i] = None
+
+        offset = 0
+        while offset < len(part):
+            piece = part[offset : offset + chunk_size - pending]
+            pieces.append(piece)
+            pending += len(piece)
+            offset += len(piece)
+            if pending == chunk_size:
+                yield serde._compress(b"".join(pieces), message_type)
+                pieces, pending = [], 0
+
+    if pieces:
+        yield serde._compress(b"".join(pieces), message_type)
+
+
+def deserialize_stream(chunks, worker: AbstractWorker = None, details=True) -> object:
+    """
+    Deserializes an object from the chunks produced by serialize_stream.
+
+    Args:
+        chunks: an iterable over the chunks, such as the serialize_stream generator
+        worker (AbstractWorker): the worker which is acquiring the message content
+        details (bool): whether to detail the simplified objects, see deserialize
+
+    Returns:
+        object: the deserialized object
+    """
+    reader = _ChunkReader(chunks)
+
+    prefix = reader.read(5)
+    if prefix[0] != serde.OUT_OF_BAND:
+        raise ValueError("The chunks don't start with an out of band prefix")
+    (n_buffers,) = struct.unpack_from("<I", prefix, 1)
+    lengths = struct.unpack(f"<{n_buffers + 1}Q", reader.read(8 * (n_buffers + 1)))
+
+    # Each part of the message is rebuilt in its own buffer: tensors and arrays
+    # are deserialized as views on these buffers
+    parts = [reader.read(length) for length in lengths]
+    reader.check_exhausted()
+
+    return serde.deserialize([prefix] + parts, worker, details=details)
+
+
+class _ChunkReader:
+    """Reads the content of a sequence of compressed chunks into preallocated buffers.
+
+    Args:
+        chunks: an iterable over the compressed chunks
+    """
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.current = memoryview(b"")
+
+    def read(self, size: int) -> bytearray:
+        """Returns the next size bytes of the content of the chunks."""
+        buffer = bytearray(size)
+        view = memoryview(buffer)
+        offset = 0
+        while offset < size:
+            if not self.current:
+                self.current = self._next_chunk()
+            n_bytes = min(len(self.current), size - offset)
+            view[offset : offset + n_bytes] = self.current[:n_bytes]
+            self.current = self.current[n_bytes:]
+            offset += n_bytes
+        return buffer
+
+    def check_exhausted(self):
+        """Raises a ValueError if there is content left after the message."""
+        if self.current or next(self.chunks, None) is not None:
+            raise ValueError("The chunks hold more bytes than the message")
+
+    def _next_chunk(self) -> memoryview:
+        try:
+            chunk = next(self.chunks)
+        except StopIteration:
+            raise ValueError("The chunks ended before the end of the message") from None
+        return memoryview(serde._decompress(chunk))
@@ -4,7 +4,9 @@ for all tensors (Torch and Numpy).
 """
 from collections import OrderedDict
 import io
-from tempfile import TemporaryFile
+import os
+import struct
+import tempfile
 from typing import Tuple, List
 import warnings
 
@@ -18,7 +20,7 @@ from syft.workers.abstract import AbstractWorker
 
 
 def _serialize_tensor(tensor) -> bin:
-    """Serialize the tensor using as default Torch serialization strategy
+    """Serialize the tensor using as default the raw buffer serialization strategy
     This function can be overridden to provide different tensor serialization strategies
 
     Args
@@ -28,7 +30,10 @@ def _serialize_tensor(tensor) -> bin:
         A serialized version of the input tensor
 
     """
-    return torch_tensor_serializer(tensor)
+    return raw_tensor_serializer(tensor)
+
+
+_default_serialize_tensor = _serialize_tensor
 
 
 def _deserialize_tensor(tensor_bin) -> torch.Tensor:
@@ -41,7 +46,14 @@ def _deserialize_tensor(tensor_bin) -> torch.Tensor:
     Returns
         a Torch tensor
     """
-    return torch_tensor_deserializer(tensor_bin)
+    return raw_tensor_deserializer(tensor_bin)
+
+
+# Arrays of at least this many bytes are memory-mapped by numpy_tensor_deserializer from
+# a temporary file created in NUMPY_MMAP_DIR (the default temporary directory if None),
+# instead of being held in memory. None disables memory mapping.
+NUMPY_MMAP_THRESHOLD = None
+NUMPY_MMAP_DIR = None
 
 
 def numpy_tensor_serializer(tensor: torch.Tensor) -> bin:
@@ -56,20 +68,67 @@ def numpy_tensor_serializer(tensor: torch.Tensor) -> bin:
         tensor = tensor.detach()
 
     np_tensor = tensor.numpy()
-    outfile = TemporaryFile()
-    numpy.save(outfile, np_tensor)
-    # Simulate close and open by calling seek
-    outfile.seek(0)
-    return outfile.read()
+    if not np_tensor.flags.c_contiguous:
+        np_tensor = np_tensor.copy(order="C")
+
+    header_stream = io.BytesIO()
+    header = numpy.lib.format.header_data_from_array_1_0(np_tensor)
+    try:
+        numpy.lib.format.write_array_header_1_0(header_stream, header)
+    except ValueError:
+        # the header is too long for version 1.0 of the format
+        numpy.lib.format.write_array_header_2_0(header_stream, header)
+
+    # the array data is copied once, straight into the result
+    return b"".join((header_stream.getvalue(), memoryview(np_tensor)))
 
 
 def numpy_tensor_deserializer(tensor_bin) -> torch.Tensor:
-    """"Strategy to deserialize a binary input in npy format into a Torch tensor"""
-    input_file = TemporaryFile()
-    input_file.write(tensor_bin)
-    # read data from file
-    input_file.seek(0)
-    return torch.from_numpy(numpy.load(input_file))
+    """"Strategy to deserialize a binary input in npy format into a Torch tensor
+
+    The tensor returned is a view on tensor_bin when it is writable, unless its data
+    is at least NUMPY_MMAP_THRESHOLD bytes long, in which case it is memory-mapped
+    from a file.
+    """
+    npy_view = memoryview(tensor_bin)
+
+    # Only read the header of the npy binary, the header length is stored on
+    # 2 bytes for version 1.0 of the format and on 4 bytes for later versions
+    header_length_size = 2 if npy_view[6] == 1 else 4
+    header_length = int.from_bytes(npy_view[8 : 8 + header_length_size], byteorder="little")
+    data_offset = 8 + header_length_size + header_length
+
+    header_stream = io.BytesIO(npy_view[:data_offset])
+    if numpy.lib.format.read_magic(header_stream) == (1, 0):
+        shape, fortran_order, dtype = numpy.lib.format.read_array_header_1_0(header_stream)
+    else:
+        shape, fortran_order, dtype = numpy.lib.format.read_array_header_2_0(header_stream)
+
+    count = int(numpy.prod(shape, dtype=numpy.int64))
+    if NUMPY_MMAP_THRESHOLD is not None and count * dtype.itemsize >= NUMPY_MMAP_THRESHOLD:
+        np_tensor = _memory_map_npy(npy_view)
+    else:
+        np_tensor = _writable_frombuffer(npy_view, dtype, count=count, offset=data_offset)
+        np_tensor = np_tensor.reshape(shape, order="F" if fortran_order else "C")
+
+    return torch.from_numpy(np_tensor)
+
+
+def _memory_map_npy(npy_bin) -> numpy.ndarray:
+    """Writes a binary in npy format to a temporary file and memory-maps it."""
+    with tempfile.NamedTemporaryFile(dir=NUMPY_MMAP_DIR, suffix=".npy", delete=False) as npy_file:
+        npy_file.write(npy_bin)
+
+    np_tensor = numpy.load(npy_file.name, mmap_mode="r+")
+    try:
+        # The mapping stays valid once the file is removed, and the disk space
+        # is released with the array
+        os.remove(npy_file.name)
+    except OSError:
+        # Windows doesn't allow removing a memory-mapped file
+        pass
+
+    return np_tensor
 
 
 def torch_tensor_serializer(tensor) -> bin:
@@ -85,6 +144,115 @@ def torch_tensor_deserializer(tensor_bin) -> torch.Tensor:
     return torch.load(bin_tensor_stream)
 
 
+# Data types handled by the raw serializer, the code of a dtype in the header is its
+# index in this list. New types must be appended to keep the codes stable.
+# (torch.bool only exists from torch 1.2)
+RAW_TENSOR_DTYPES = [
+    (getattr(torch, name), numpy.dtype(name))
+    for name in ("uint8", "int8", "int16", "int32", "int64", "float16", "float32", "float64")
+    + ("bool",)
+    if hasattr(torch, name)
+]
+RAW_TENSOR_DTYPE_CODES = {dtype: code for code, (dtype, _) in enumerate(RAW_TENSOR_DTYPES)}
+# Code used in the header when the tensor data is serialized with torch.save
+RAW_TENSOR_TORCH_SAVE_CODE = 255
+# dtype code, requires_grad and number of dimensions. Shape and strides follow
+RAW_TENSOR_HEADER = struct.Struct("<BBB")
+
+
+def _is_dense(tensor: torch.Tensor) -> bool:
+    """Checks if the elements of a tensor fill a contiguous chunk of its storage,
+    which is the case for contiguous tensors and for permutations of them."""
+    expected_stride = 1
+    for size, stride in sorted(zip(tensor.shape, tensor.stride()), key=lambda dim: dim[1]):
+        if size != 1 and stride != expected_stride:
+            return False
+        expected_stride *= size
+    return True
+
+
+def raw_tensor_serializer(tensor: torch.Tensor) -> bin:
+    """Strategy to serialize a tensor as a compact header followed by its raw data.
+
+    The header holds the dtype, requires_grad flag, shape and strides of the tensor.
+    Dense tensors are written with their memory layout, other views are made
+    contiguous first. Tensors which are sparse, not on cpu or of a dtype missing
+    from RAW_TENSOR_DTYPES are serialized using torch.save after the header.
+    """
+    # the data is only copied once, when joined with the header
+    return b"".join(_raw_tensor_parts(tensor))
+
+
+def _raw_tensor_parts(tensor: torch.Tensor) -> tuple:
+    """Returns the header and the data written by raw_tensor_serializer, without
+    joining them. The data of dense tensors is a view on their storage."""
+    if (
+        tensor.is_sparse
+        or tensor.device.type != "cpu"
+        or tensor.dtype not in RAW_TENSOR_DTYPE_CODES
+    ):
+        header = RAW_TENSOR_HEADER.pack(RAW_TENSOR_TORCH_SAVE_CODE, 0, 0)
+        return header, torch_tensor_serializer(tensor)
+
+    data = tensor.detach()
+    if not _is_dense(data):
+        data = data.contiguous()
+
+    header = RAW_TENSOR_HEADER.pack(
+        RAW_TENSOR_DTYPE_CODES[data.dtype], tensor.requires_grad, data.dim()
+    ) + struct.pack(f"<{2 * data.dim()}q", *data.shape, *data.stride())
+
+    # A flat view on the chunk of storage holding the elements
+    flat_data = data.as_strided((data.numel(),), (1,)).numpy()
+
+    return header, memoryview(flat_data).cast("B")
+
+
+def _writable_frombuffer(buffer, dtype, count: int = -1, offset: int = 0) -> numpy.ndarray:
+    """Same as numpy.frombuffer, but copies the data when buffer is read-only.
+
+    The bytes returned by msgpack are immutable, and the tensors made from them are
+    modified in place (by optimizers, remote in-place commands or share updates).
+    """
+    array = numpy.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+    if not array.flags.writeable:
+        array = array.copy()
+    return array
+
+
+def raw_tensor_deserializer(tensor_bin) -> torch.Tensor:
+    """Strategy to deserialize a binary input made by raw_tensor_serializer.
+
+    The tensor returned is only a view on tensor_bin, without copy, when tensor_bin
+    is writable, like the out of band buffers read into bytearrays by
+    streaming.deserialize_stream. Otherwise the tensor data is copied once: this is
+    the case of the messages received by the workers, which are bytes, and of the
+    tensors embedded in a msgpack document, as msgpack returns bytes.
+    """
+    dtype_code, requires_grad, ndim = RAW_TENSOR_HEADER.unpack_from(tensor_bin)
+    offset = RAW_TENSOR_HEADER.size
+
+    if dtype_code == RAW_TENSOR_TORCH_SAVE_CODE:
+        return torch_tensor_deserializer(memoryview(tensor_bin)[offset:])
+
+    dims = struct.unpack_from(f"<{2 * ndim}q", tensor_bin, offset)
+    shape, strides = dims[:ndim], dims[ndim:]
+    offset += 16 * ndim
+
+    torch_dtype, numpy_dtype = RAW_TENSOR_DTYPES[dtype_code]
+
+    if offset == len(tensor_bin):
+        tensor = torch.empty(shape, dtype=torch_dtype)
+    else:
+        flat_data = torch.from_numpy(_writable_frombuffer(tensor_bin, numpy_dtype, offset=offset))
+        tensor = flat_data.as_strided(shape, strides)
+
+    if requires_grad:
+        tensor.requires_grad_()
+
+    return tensor
+
+
 # Simplify/Detail Torch Tensors
 
 
@@ -104,7 +272,17 @@ def _simplify_torch_tensor(tensor: torch.Tensor) -> bin:
         (optinally) is the chain of graident tensors (nested tuple)
     """
 
-    tensor_bin = _serialize_tensor(tensor)
+    if _serialize_tensor is _default_serialize_tensor and syft.serde._out_of_band_keeps_parts():
+        # the data of a large tensor is sent without being copied, as when streamed
+        tensor_bin = _raw_tensor_parts(tensor)
+        reference = syft.serde._out_of_band_reference(tensor_bin)
+        tensor_bin = b"".join(tensor_bin) if reference is None else reference
+    else:
+        tensor_bin = _serialize_tensor(tensor)
+
+        reference = syft.serde._out_of_band_reference(tensor_bin)
+        if reference is not None:
+            tensor_bin = reference
 
     # note we need to do this explicitly because torch.save does not
     # seem to be including .grad by default
@@ -274,7 +452,18 @@ def _simplify_ndarray(my_array: numpy.ndarray) -> Tuple[bin, Tuple, str]:
         arr_representation = _simplify_ndarray(numpy.random.random([1000, 1000])))
 
     """
-    arr_bytes = my_array.tobytes()
+    if syft.serde._out_of_band_keeps_parts():
+        # a view on the data of the array, which is copied only if it stays in the
+        # msgpack document
+        arr_bytes = (memoryview(numpy.ascontiguousarray(my_array)).cast("B"),)
+        reference = syft.serde._out_of_band_reference(arr_bytes)
+        arr_bytes = arr_bytes[0].tobytes() if reference is None else reference
+    else:
+        arr_bytes = my_array.tobytes()
+
+        reference = syft.serde._out_of_band_reference(arr_bytes)
+        if reference is not None:
+            arr_bytes = reference
     arr_shape = my_array.shape
     arr_dtype = my_array.dtype.name
 
@@ -1,5 +1,11 @@
 from abc import abstractmethod
+from collections import OrderedDict
+from collections.abc import Sequence
+from concurrent.futures import Future
+from contextlib import contextmanager
 import logging
+import threading
+import time
 from typing import Callable
 from typing import List
 from typing import Tuple
@@ -8,19 +14,21 @@ from typing import TYPE_CHECKING
 
 import syft as sy
 from syft import codes
+from syft.generic import dispatch
 from syft.generic.frameworks.hook import hook_args
 from syft.generic.frameworks.types import FrameworkTensorType
 from syft.generic.frameworks.types import FrameworkTensor
 from syft.generic.frameworks.types import FrameworkShape
 from syft.generic.object_storage import ObjectStorage
-from syft.generic.object import AbstractObject
 from syft.generic.tensor import AbstractTensor
 from syft.generic.pointers.object_pointer import ObjectPointer
 from syft.generic.pointers.pointer_tensor import PointerTensor
 from syft.messaging.message import Message
 from syft.messaging.message import Operation
+from syft.messaging.message import BatchMessage
 from syft.messaging.message import ObjectMessage
 from syft.messaging.message import ObjectRequestMessage
+from syft.messaging.message import ForceObjectDeleteMessage
 from syft.messaging.message import IsNoneMessage
 from syft.messaging.message import GetShapeMessage
 from syft.messaging.message import PlanCommandMessage
@@ -82,6 +90,11 @@ class BaseWorker(AbstractWorker, ObjectStorage):
             list of known workers.
     """
 
+    # Whether messages sent to this worker block on a transport (like a network), in
+    # which case the share-wise messages sent to it and to other such workers are
+    # pipelined (see syft/generic/dispatch.py)
+    dispatch_concurrently = False
+
     def __init__(
         self,
         hook: "FrameworkHook",
@@ -112,6 +125,22 @@ class BaseWorker(AbstractWorker, ObjectStorage):
         self.verbose = verbose
         self.auto_add = auto_add
         self.msg_history = list()
+        # If True, large tensors are sent out of band of the serialized messages
+        # (see syft.serde.serialize). Only enable it with peers which support it.
+        self.out_of_band_framing = False
+        # Optional TriplePool (see crypto/beaver.py) holding the multiplication triples
+        # provided by this worker when it is a crypto provider
+        self.triple_pool = None
+        # CommandBatch collecting the commands sent to this worker, inside a
+        # `with worker.batch():` block
+        self.command_batch = None
+        # Number of shapes requested to remote workers, because they could not be
+        # inferred locally (see PointerTensor.shape)
+        self.remote_shape_queries = 0
+        # Dict {location id: DeletionQueue} holding the deletions of remote objects
+        # queued by this worker, None if they are sent right away
+        self.deletion_queues = None
+        self._deletion_queue_size = None
 
         # For performance, we cache all possible message types
         self._message_router = {
@@ -122,8 +151,9 @@ class BaseWorker(AbstractWorker, ObjectStorage):
             codes.MSGTYPE.OBJ_DEL: self.rm_obj,
             codes.MSGTYPE.IS_NONE: self.is_tensor_none,
             codes.MSGTYPE.GET_SHAPE: self.get_tensor_shape,
-            codes.MSGTYPE.SEARCH: self.search,
-            codes.MSGTYPE.FORCE_OBJ_DEL: self.force_rm_obj,
+            codes.MSGTYPE.SEARCH: self.respond_to_search,
+            codes.MSGTYPE.FORCE_OBJ_DEL: self.force_rm_objs,
+            codes.MSGTYPE.BATCH: self.execute_batch,
         }
 
         self._plan_command_router = {
@@ -202,6 +232,34 @@ class BaseWorker(AbstractWorker, ObjectStorage):
         """
         raise NotImplementedError  # pragma: no cover
 
+    def _send_msg_async(self, message: bin, location: "BaseWorker") -> Future:
+        """Sends a message without waiting for the response.
+
+        Workers able to have several messages in flight should override it, by
+        default the message is sent with _send_msg.
+
+        Args:
+            message: A binary message to be sent from one worker to another.
+            location: A BaseWorker instance that lets you provide the
+                destination to send the message.
+
+        Returns:
+            A Future of the binary response.
+        """
+        return _completed_future(self._send_msg, message, location)
+
+    def _recv_msg_async(self, message: bin) -> Future:
+        """Receives a message and returns a Future of the response, which is already
+        computed unless the worker overrides it.
+
+        Args:
+            message: The binary message being received.
+
+        Returns:
+            A Future of the binary response.
+        """
+        return _completed_future(self._recv_msg, message)
+
     def remove_worker_from_registry(self, worker_id):
         """Removes a worker from the dictionary of known workers.
         Args:
@@ -251,8 +309,12 @@ class BaseWorker(AbstractWorker, ObjectStorage):
         if self.verbose:
             print(f"worker {self} sending {message} to {location}")
 
+        # Step 0: send the commands batched and the deletions queued for the location first
+        _flush_command_batch(message, location)
+        self._flush_deletion_queue(message, location)
+
         # Step 1: serialize the message to a binary
-        bin_message = sy.serde.serialize(message)
+        bin_message = sy.serde.serialize(message, out_of_band=self.out_of_band_framing)
 
         # Step 2: send the message and wait for a response
         bin_response = self._send_msg(bin_message, location)
@@ -262,6 +324,30 @@ class BaseWorker(AbstractWorker, ObjectStorage):
 
         return response
 
+    def send_msg_async(self, message: Message, location: "BaseWorker") -> "ResponseFuture":
+        """Same as send_msg, but returns without waiting for the response.
+
+        Several messages can be sent to a location before collecting their responses,
+        which saves a round trip per message for workers which support it, like
+        WebsocketClientWorker connected to a recent server.
+
+        Args:
+            message: A Message object
+            location: A BaseWorker instance that lets you provide the
+                destination to send the message.
+
+        Returns:
+            A ResponseFuture, whose result() is the deserialized response.
+        """
+        if self.verbose:
+            print(f"worker {self} sending {message} to {location}")
+
+        _flush_command_batch(message, location, wait=False)
+        self._flush_deletion_queue(message, location)
+
+        bin_message = sy.serde.serialize(message, out_of_band=self.out_of_band_framing)
+        return ResponseFuture(self._send_msg_async(bin_message, location), self)
+
     def recv_msg(self, bin_message: bin) -> bin:
         """Implements the logic to receive messages.
 
@@ -292,7 +378,7 @@ class BaseWorker(AbstractWorker, ObjectStorage):
         response = self._message_router[msg_type](contents)
 
         # Step 2: Serialize the message to simple python objects
-        bin_response = sy.serde.serialize(response)
+        bin_response = sy.serde.serialize(response, out_of_band=self.out_of_band_framing)
 
         return bin_response
 
@@ -402,6 +488,54 @@ class BaseWorker(AbstractWorker, ObjectStorage):
                     return
             if type(_self) == str and _self == "self":
                 _self = self
+            function = None
+        # Handle functions
+        else:
+            # At this point, the command is ALWAYS a path to a
+            # function (i.e., torch.nn.functional.relu). Thus,
+            # we need to fetch this function and run it.
+
+            sy.framework.command_guard(command_name)
+
+            paths = command_name.split(".")
+            function = self
+            for path in paths:
+                function = getattr(function, path)
+
+        return self.run_command(command_name, _self, function, args, kwargs, return_ids)
+
+    def run_command(
+        self,
+        command_name: str,
+        _self: object,
+        function: Callable,
+        args: tuple,
+        kwargs: dict,
+        return_ids: tuple,
+    ) -> object:
+        """Runs a command whose object or function is already resolved, and registers
+        its response under return_ids.
+
+        This is the part of execute_command shared with the steps of compiled plans
+        (see syft/messaging/compiled_plan.py), which resolve their object or function
+        once when the plan is compiled.
+
+        Args:
+            command_name: the name of the method or of the function called
+            _self: the object whose method is called, None for a function
+            function: the function called, None for a method
+            args: the arguments of the command
+            kwargs: the keyword arguments of the command
+            return_ids: the ids of the results
+
+        Returns:
+            The response registered, None if the command returned nothing.
+
+        Raises:
+            ResponseSignatureError: if the command returned more results than
+                return_ids, with the ids generated for them
+        """
+        if _self is not None:
             if sy.framework.is_inplace_method(command_name):
                 # TODO[jvmancuso]: figure out a good way to generalize the
                 # above check (#2530)
@@ -416,20 +550,8 @@ class BaseWorker(AbstractWorker, ObjectStorage):
                         arg.decode("utf-8") if isinstance(arg, bytes) else arg for arg in args
                     ]
                     response = getattr(_self, command_name)(*new_args, **kwargs)
-        # Handle functions
         else:
-            # At this point, the command is ALWAYS a path to a
-            # function (i.e., torch.nn.functional.relu). Thus,
-            # we need to fetch this function and run it.
-
-            sy.framework.command_guard(command_name)
-
-            paths = command_name.split(".")
-            command = self
-            for path in paths:
-                command = getattr(command, path)
-
-            response = command(*args, **kwargs)
+            response = function(*args, **kwargs)
 
         # some functions don't return anything (such as .backward())
         # so we need to check for that here.
@@ -450,6 +572,193 @@ class BaseWorker(AbstractWorker, ObjectStorage):
                 new_ids = return_id_provider.get_recorded_ids()
                 raise ResponseSignatureError(new_ids)
 
+    def execute_batch(self, operations: list) -> tuple:
+        """Executes the operations of a BatchMessage, in order.
+
+        Args:
+            operations: a list of Operation messages
+
+        Returns:
+            A tuple (responses, ids_generated): the list of the responses of the
+            operations, and a dict {index: ids} of the ids generated for the results of
+            the operations which returned more results than they had return ids.
+        """
+        responses = []
+        ids_generated = {}
+        for i, operation in enumerate(operations):
+            try:
+                responses.append(self.execute_command(operation.contents))
+            except ResponseSignatureError as e:
+                responses.append(None)
+                ids_generated[i] = e.ids_generated
+        return responses, ids_generated
+
+    def execute_fused_commands(self, value: object, commands: tuple) -> object:
+        """Executes a chain of elementwise commands fused in a single command of a
+        plan (see syft.messaging.plan_optimizer.fuse_elementwise_ops).
+
+        Each command is applied to the result of the previous one, so the intermediate
+        results are never registered. The first command allocates the result, the
+        following ones reuse it with their inplace version when no gradient is
+        involved.
+
+        Args:
+            value: the input of the first command
+            commands: a tuple of (command_name, is_function, inplace_name, args,
+                kwargs), where the value is the object whose method is called, or the
+                first argument of the function, and inplace_name is the name of the
+                inplace method to use instead (or None).
+
+        Returns:
+            The result of the last command.
+        """
+        for i, (command_name, is_function, inplace_name, args, kwargs) in enumerate(commands):
+            if (
+                i > 0
+                and inplace_name is not None
+                and isinstance(value, FrameworkTensor)
+                and not hasattr(value, "child")
+                and not any(getattr(obj, "requires_grad", False) for obj in (value,) + args)
+            ):
+                try:
+                    value = getattr(value, inplace_name)(*args)
+                    continue
+                except RuntimeError:
+                    # the result of the command can't be stored in value, because of
+                    # its dtype or its shape
+                    pass
+
+            if is_function:
+                sy.framework.command_guard(command_name)
+                command = self
+                for path in command_name.split("."):
+                    command = getattr(command, path)
+                value = command(value, *args, **kwargs)
+            else:
+                value = getattr(value, command_name)(*args, **kwargs)
+
+        return value
+
+    @contextmanager
+    def batch(self, max_size: int = None, max_delay: float = None):
+        """Defers the commands sent to this worker, to send them in a single
+        BatchMessage at the end of the block.
+
+        The pointers to the results of the commands are returned right away, and
+        point to existing objects once the batch is sent. Any other message sent to
+        this worker, like the one of a .get(), sends the commands deferred so far
+        first, see CommandBatch for the other cases. Blocks can be nested, the commands
+        are then sent at the end of the outer block.
+
+        Example:
+            >>> with bob.batch() as batch:
+            ...     y = x_ptr + x_ptr
+            ...     z = y * 2
+            >>> z.get()
+
+        Args:
+            max_size: the max number of commands deferred
+            max_delay: the max number of seconds a command is deferred
+
+        Yields:
+            The CommandBatch, whose responses attribute holds the responses of the
+            commands sent.
+        """
+        if self.command_batch is not None:
+            yield self.command_batch
+            return
+
+        self.command_batch = CommandBatch(self, max_size=max_size, max_delay=max_delay)
+        try:
+            yield self.command_batch
+        finally:
+            command_batch = self.command_batch
+            self.command_batch = None
+            command_batch.flush()
+
+    def set_lazy_execution(self, lazy: bool = True, max_size: int = 256, max_delay: float = 0.1):
+        """Turns on or off the lazy execution of the commands sent to this worker.
+
+        In lazy mode, the commands are deferred like in a `with worker.batch():` block
+        (see CommandBatch) until their results are needed, for example by a .get(),
+        or until max_size commands are deferred or max_delay seconds passed. Turning
+        it off sends the commands deferred.
+
+        Args:
+            lazy: whether to turn on the lazy execution
+            max_size: the max number of commands deferred
+            max_delay: the max number of seconds a command is deferred, checked when
+                new commands are deferred
+        """
+        if self.command_batch is not None:
+            command_batch = self.command_batch
+            self.command_batch = None
+            command_batch.flush()
+
+        if lazy:
+            self.command_batch = CommandBatch(
+                self, max_size=max_size, max_delay=max_delay, keep_responses=False
+            )
+
+    def set_batched_garbage_collection(self, batched: bool = True, max_size: int = 256):
+        """Turns on or off the batching of the deletions of remote objects.
+
+        When a pointer owned by this worker is garbage collected, the object it points
+        to is deleted. With batching, the deletion is queued instead of being sent
+        right away, and the ids queued for a location are sent together in one
+        ForceObjectDeleteMessage, without waiting for the response (see DeletionQueue).
+        Turning it off sends the deletions queued and waits for them.
+
+        Args:
+            batched: whether to turn on the batching
+            max_size: the max number of deletions queued for a location
+        """
+        deletion_queues = self.deletion_queues
+        self.deletion_queues = {} if batched else None
+        self._deletion_queue_size = max_size
+
+        if deletion_queues is not None:
+            for deletion_queue in deletion_queues.values():
+                deletion_queue.flush(wait=True)
+
+    def garbage_collect(self, id_at_location: Union[str, int], location: "BaseWorker"):
+        """Deletes a remote object, whose pointer owned by this worker was garbage
+        collected.
+
+        Args:
+            id_at_location: the id of the object
+            location: the worker holding the object
+        """
+        pipeline = dispatch.current_pipeline()
+        if self.deletion_queues is None and pipeline is not None and location.dispatch_concurrently:
+            pipeline.delete(self, id_at_location, location)
+            return
+
+        if self.deletion_queues is None:
+            self.send_msg(ForceObjectDeleteMessage(id_at_location), location)
+            return
+
+        deletion_queue = self.deletion_queues.get(location.id)
+        if deletion_queue is None:
+            deletion_queue = self.deletion_queues.setdefault(
+                location.id, DeletionQueue(self, location, max_size=self._deletion_queue_size)
+            )
+        deletion_queue.add(id_at_location)
+
+    def _flush_deletion_queue(self, message: Message, location: "BaseWorker"):
+        """Sends the deletions queued for location, before another message is sent to it.
+
+        They are sent after the commands batched for location, which may create some
+        of the objects deleted.
+        """
+        if not self.deletion_queues or isinstance(
+            message, (ForceObjectDeleteMessage, BatchMessage)
+        ):
+            return
+        deletion_queue = self.deletion_queues.get(location.id)
+        if deletion_queue is not None:
+            deletion_queue.flush()
+
     def execute_plan_command(self, message: tuple):
         """Executes commands related to plans.
 
@@ -483,12 +792,46 @@ class BaseWorker(AbstractWorker, ObjectStorage):
         if return_ids is None:
             return_ids = tuple([sy.ID_PROVIDER.pop()])
 
+        if CommandBatch._pending and message[0] in CROSS_WORKER_COMMANDS:
+            CommandBatch.flush_pending()
+
+        command_batch = getattr(recipient, "command_batch", None)
+        pipeline = dispatch.current_pipeline()
+        if command_batch is None and pipeline is not None and recipient.dispatch_concurrently:
+            # the commands sent while shares are dispatched are sent when the dispatch ends
+            command_batch = recipient.command_batch = CommandBatch(recipient, keep_responses=False)
+            pipeline.command_batches.append(command_batch)
+
+        if command_batch is not None:
+            responses = command_batch.defer(self, Operation(message, return_ids))
+            if responses is not None:
+                self._infer_response_shape(message, responses)
+                return responses
+
         try:
             ret_val = self.send_msg(Operation(message, return_ids), location=recipient)
         except ResponseSignatureError as e:
             ret_val = None
             return_ids = e.ids_generated
 
+        responses = self._command_response(recipient, ret_val, return_ids)
+        self._infer_response_shape(message, responses)
+        return responses
+
+    @staticmethod
+    def _infer_response_shape(message: tuple, response: object):
+        """Sets the shape and the dtype of the pointer returned by a command when they
+        can be inferred locally, so that they are not requested to its location."""
+        if not isinstance(response, PointerTensor) or response._shape is not None:
+            return
+        shape, dtype = sy.framework.infer_result(message)
+        response._shape = shape
+        if dtype is not None:
+            response._dtype = dtype
+
+    def _command_response(self, recipient: "BaseWorker", ret_val: object, return_ids: tuple):
+        """Returns pointers to the results of a command sent to recipient, unless its
+        response ret_val is a value."""
         if ret_val is None or type(ret_val) == bytes:
             responses = []
             for return_id in return_ids:
@@ -526,12 +869,34 @@ class BaseWorker(AbstractWorker, ObjectStorage):
 
         return obj
 
-    def respond_to_obj_req(self, obj_id: Union[str, int]):
+    def force_rm_objs(self, remote_keys: Union[str, int, tuple]) -> int:
+        """Forces the removal of one or several objects, see force_rm_obj.
+
+        Args:
+            remote_keys: the id of an object, or a tuple of ids
+        Returns:
+            The number of bytes of the tensors removed.
+        """
+        if not isinstance(remote_keys, tuple):
+            remote_keys = (remote_keys,)
+
+        n_bytes = 0
+        for remote_key in remote_keys:
+            obj = self._objects.get(remote_key)
+            if hasattr(obj, "element_size") and not hasattr(obj, "child"):
+                n_bytes += obj.element_size() * obj.nelement()
+            self.force_rm_obj(remote_key)
+        return n_bytes
+
+    def respond_to_obj_req(self, obj_id: Union[str, int, tuple]):
         """Returns the deregistered object from registry.
 
         Args:
-            obj_id: A string or integer id of an object to look up.
+            obj_id: A string or integer id of an object to look up, or a tuple of
+                ids to return a tuple of objects.
         """
+        if isinstance(obj_id, tuple):
+            return tuple(self.respond_to_obj_req(single_id) for single_id in obj_id)
 
         obj = self.get_obj(obj_id)
         if hasattr(obj, "allowed_to_get") and not obj.allowed_to_get():
@@ -566,6 +931,12 @@ class BaseWorker(AbstractWorker, ObjectStorage):
             location: A BaseWorker instance indicating the worker which should
                 receive the object.
         """
+        pipeline = dispatch.current_pipeline()
+        if pipeline is not None and location.dispatch_concurrently:
+            # the response is waited for when the shares are all sent
+            pipeline.responses.append(self.send_msg_async(ObjectMessage(obj), location))
+            return None
+
         return self.send_msg(ObjectMessage(obj), location)
 
     def request_obj(self, obj_id: Union[str, int], location: "BaseWorker") -> object:
@@ -579,9 +950,24 @@ class BaseWorker(AbstractWorker, ObjectStorage):
         Returns:
             A torch Tensor or Variable object.
         """
+        pipeline = dispatch.current_pipeline()
+        if pipeline is not None and (location.id, obj_id) in pipeline.requests:
+            # the object was already requested by get_shares
+            return pipeline.requests.pop((location.id, obj_id)).result()
+
         obj = self.send_msg(ObjectRequestMessage(obj_id), location)
         return obj
 
+    def request_obj_async(
+        self, obj_id: Union[str, int], location: "BaseWorker"
+    ) -> "ResponseFuture":
+        """Same as request_obj, but returns without waiting for the object.
+
+        Returns:
+            A ResponseFuture, whose result() is the object.
+        """
+        return self.send_msg_async(ObjectRequestMessage(obj_id), location)
+
     # SECTION: Manage the workers network
 
     def get_worker(
@@ -790,6 +1176,7 @@ class BaseWorker(AbstractWorker, ObjectStorage):
         Returns:
             A torch.Size object for the shape.
         """
+        self.remote_shape_queries += 1
         shape = self.send_msg(GetShapeMessage(pointer), location=pointer.location)
         return sy.hook.create_shape(shape)
 
@@ -884,7 +1271,7 @@ class BaseWorker(AbstractWorker, ObjectStorage):
 
         return None
 
-    def search(self, query: Union[List[Union[str, int]], str, int]) -> List[PointerTensor]:
+    def search(self, query: Union[List[Union[str, int]], str, int]) -> "SearchResults":
         """Search for a match between the query terms and a tensor's Id, Tag, or Description.
 
         Note that the query is an AND query meaning that every item in the list of strings (query*)
@@ -895,45 +1282,16 @@ class BaseWorker(AbstractWorker, ObjectStorage):
             me: A reference to the worker calling the search.
 
         Returns:
-            A list of PointerTensors.
+            A sequence of PointerTensors, which are created when they are accessed.
         """
         if isinstance(query, (str, int)):
             query = [query]
 
-        results = list()
-        for key, obj in self._objects.items():
-            found_something = True
-            for query_item in query:
-                # If deserialization produced a bytes object instead of a string,
-                # make sure it's turned back to a string or a fair comparison.
-                if isinstance(query_item, bytes):
-                    query_item = query_item.decode("ascii")
-                query_item = str(query_item)
-
-                match = False
-                if query_item == str(key):
-                    match = True
-
-                if isinstance(obj, (AbstractObject, FrameworkTensor)):
-                    if obj.tags is not None:
-                        if query_item in obj.tags:
-                            match = True
-
-                    if obj.description is not None:
-                        if query_item in obj.description:
-                            match = True
-
-                if not match:
-                    found_something = False
-
-            if found_something:
-                # set garbage_collect_data to False because if we're searching
-                # for a tensor we don't own, then it's probably someone else's
-                # decision to decide when to delete the tensor.
-                ptr = obj.create_pointer(garbage_collect_data=False, owner=sy.local_worker).wrap()
-                results.append(ptr)
-
-        return results
+        return SearchResults([self._objects[obj_id] for obj_id in self.search_ids(query)])
+
+    def respond_to_search(self, query: Union[List[Union[str, int]], str, int]) -> List:
+        """Returns the list of the pointers found by a search requested by another worker."""
+        return list(self.search(query))
 
     def request_search(self, query: List[str], location: "BaseWorker"):
 
@@ -1008,11 +1366,364 @@ class BaseWorker(AbstractWorker, ObjectStorage):
 
         result = sy.VirtualWorker(sy.hook, worker_id, auto_add=auto_add)
         _objects = sy.serde._detail(worker, _objects)
-        result._objects = _objects
+        for obj in _objects.values():
+            result.set_obj(obj)
 
         # make sure they weren't accidentally double registered
         for _, obj in _objects.items():
             if obj.id in worker._objects:
-                del worker._objects[obj.id]
+                worker.rm_obj(obj.id)
 
         return result
+
+
+# Commands returning a value needed right away rather than tensors, they are never deferred
+VALUE_COMMANDS = {
+    "item",
+    "tolist",
+    "dim",
+    "size",
+    "numel",
+    "__len__",
+    "equal",
+    "allclose",
+    "is_contiguous",
+}
+
+# Commands making the location talk to other workers, they are never deferred and all
+# the commands deferred to any worker are sent before them
+CROSS_WORKER_COMMANDS = {"send", "remote_send", "mid_get", "remote_get", "move", "share"}
+
+
+class CommandBatch:
+    """Commands sent to a worker which are deferred, to be sent in a single BatchMessage.
+
+    Batches are created by worker.batch(), worker.set_lazy_execution() and the pipelines
+    of share-wise messages (see syft/generic/dispatch.py). Only the
+    commands sent by the local worker are deferred, and send_command returns the
+    pointers to their results right away. The commands deferred are sent when the
+    batch is flushed:
+
+        * at the end of a `with worker.batch():` block,
+        * before any other message is sent to the worker (as by .get() or .shape),
+        * before a command of CROSS_WORKER_COMMANDS is sent to any worker,
+        * when max_size commands are deferred, or when a command is deferred more
+          than max_delay seconds after the first one.
+
+    Args:
+        location: the worker the commands are sent to
+        max_size: the max number of commands deferred
+        max_delay: the max number of seconds a command is deferred, checked when new
+            commands are deferred
+        keep_responses: if True, the responses of the commands are kept in the
+            responses attribute, in order. Commands returning values instead of tensors
+            have their value there, the pointers returned for them don't point to
+            anything.
+    """
+
+    # The batches holding deferred commands, in the order of their first command
+    _pending = OrderedDict()
+    _lock = threading.RLock()
+
+    def __init__(
+        self,
+        location: BaseWorker,
+        max_size: int = None,
+        max_delay: float = None,
+        keep_responses: bool = True,
+    ):
+        self.location = location
+        self.sender = location.hook.local_worker
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self.keep_responses = keep_responses
+        self.responses = []
+
+        self.operations = []
+        # the pointers returned for the operations
+        self._pointers = []
+        self._first_operation_time = None
+        # the ResponseFutures of the batches sent by flush(wait=False), with their pointers
+        self._in_flight = []
+
+    def __len__(self):
+        return len(self.operations)
+
+    def defer(self, sender: BaseWorker, operation: Operation):
+        """Adds an operation to the batch, unless it has to be sent right away.
+
+        Args:
+            sender: the worker sending the operation
+            operation: the Operation message
+
+        Returns:
+            The pointers to the results of the operation, as returned by send_command,
+            or None if the operation should be sent right away.
+        """
+        command_name = operation.message[0]
+        if (
+            sender is not self.sender
+            or command_name in VALUE_COMMANDS
+            or command_name in CROSS_WORKER_COMMANDS
+        ):
+            return None
+
+        pointers = sender._command_response(self.location, None, operation.return_ids)
+
+        with CommandBatch._lock:
+            if not self.operations:
+                self._first_operation_time = time.time()
+                CommandBatch._pending[id(self)] = self
+            self.operations.append(operation)
+            self._pointers.append(pointers)
+
+            if (self.max_size is not None and len(self.operations) >= self.max_size) or (
+                self.max_delay is not None
+                and time.time() - self._first_operation_time >= self.max_delay
+            ):
+                self.flush()
+
+        return pointers
+
+    def flush(self, wait: bool = True):
+        """Sends the operations deferred so far in a BatchMessage.
+
+        Args:
+            wait: if False, returns without waiting for the response, which is
+                processed by collect()
+        """
+        self.collect()
+
+        with CommandBatch._lock:
+            if not self.operations:
+                return
+
+            operations, self.operations = self.operations, []
+            pointers, self._pointers = self._pointers, []
+            del CommandBatch._pending[id(self)]
+
+            if not wait:
+                response = self.sender.send_msg_async(
+                    BatchMessage(operations), location=self.location
+                )
+                self._in_flight.append((response, pointers))
+                return
+
+            response = self.sender.send_msg(BatchMessage(operations), location=self.location)
+
+        self._process_response(response, pointers)
+
+    def collect(self):
+        """Waits for the responses of the batches sent by flush(wait=False)."""
+        in_flight, self._in_flight = self._in_flight, []
+        for response, pointers in in_flight:
+            self._process_response(response.result(), pointers)
+
+    def _process_response(self, batch_response: tuple, pointers: list):
+        responses, ids_generated = batch_response
+        for i, response in enumerate(responses):
+            if i in ids_generated:
+                # the pointer returned is the first of the results
+                response = self.sender._command_response(self.location, None, ids_generated[i][1:])
+                response = [pointers[i]] + (response if isinstance(response, list) else [response])
+            elif response is None or type(response) == bytes:
+                response = pointers[i]
+            else:
+                pointers[i].garbage_collect_data = False
+
+            if self.keep_responses:
+                self.responses.append(response)
+
+    @staticmethod
+    def flush_pending():
+        """Flushes all the batches holding deferred commands."""
+        with CommandBatch._lock:
+            for command_batch in list(CommandBatch._pending.values()):
+                command_batch.flush()
+
+
+class DeletionQueue:
+    """The deletions of objects held by a worker, which are sent together in one
+    ForceObjectDeleteMessage.
+
+    Queues are created by worker.set_batched_garbage_collection(). The deletions
+    queued are sent asynchronously with send_msg_async, so that they don't block the
+    sender for a round trip:
+
+        * before any other message is sent to the location, except the BatchMessages
+          of the commands batched, which may create some of the objects deleted,
+        * when max_size deletions are queued,
+        * when flush() is called, for example when batching is turned off.
+
+    Args:
+        sender: the worker owning the pointers garbage collected
+        location: the worker holding the objects
+        max_size: the max number of deletions queued
+    """
+
+    def __init__(self, sender: BaseWorker, location: BaseWorker, max_size: int = 256):
+        self.sender = sender
+        self.location = location
+        self.max_size = max_size
+
+        self.ids = []
+        # the number of objects deleted and of messages sent so far
+        self.n_deleted = 0
+        self.n_messages = 0
+        self._bytes_reclaimed = 0
+        self._responses = []
+        self._flushing = False
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def pending(self) -> int:
+        """The number of deletions queued."""
+        return len(self.ids)
+
+    @property
+    def bytes_reclaimed(self) -> int:
+        """The number of bytes of the tensors deleted, among the deletions sent whose
+        response was received."""
+        self._collect_responses()
+        return self._bytes_reclaimed
+
+    def add(self, id_at_location: Union[str, int]):
+        """Queues the deletion of an object, and sends the queue if it is full."""
+        with self._lock:
+            self.ids.append(id_at_location)
+            full = self.max_size is not None and len(self.ids) >= self.max_size
+        if full:
+            self.flush()
+
+    def flush(self, wait: bool = False):
+        """Sends the deletions queued in one message.
+
+        Args:
+            wait: if True, waits for the responses of all the deletions sent
+        """
+        with self._lock:
+            # deletions queued by a pointer garbage collected during a flush are sent
+            # by the next one
+            if self.ids and not self._flushing:
+                ids, self.ids = self.ids, []
+                self._flushing = True
+                try:
+                    response = self.sender.send_msg_async(
+                        ForceObjectDeleteMessage(tuple(ids)), self.location
+                    )
+                finally:
+                    self._flushing = False
+                self._responses.append(response)
+                self.n_deleted += len(ids)
+                self.n_messages += 1
+
+        self._collect_responses(wait=wait)
+
+    def _collect_responses(self, wait: bool = False):
+        with self._lock:
+            responses, self._responses = self._responses, []
+            for response in responses:
+                if not wait and not response.done():
+                    self._responses.append(response)
+                    continue
+                try:
+                    self._bytes_reclaimed += response.result() or 0
+                except Exception as e:
+                    logger.warning(f"Remote objects of {self.location} not deleted: {e}")
+
+
+class SearchResults(Sequence):
+    """The pointers to the objects found by BaseWorker.search, which are created when
+    they are accessed.
+
+    Args:
+        objects: the objects found
+    """
+
+    def __init__(self, objects: list):
+        self.objects = objects
+        self._pointers = {}
+
+    def __len__(self):
+        return len(self.objects)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("search result index out of range")
+        if index not in self._pointers:
+            # set garbage_collect_data to False because if we're searching
+            # for a tensor we don't own, then it's probably someone else's
+            # decision to decide when to delete the tensor.
+            self._pointers[index] = (
+                self.objects[index]
+                .create_pointer(garbage_collect_data=False, owner=sy.local_worker)
+                .wrap()
+            )
+        return self._pointers[index]
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class ResponseFuture:
+    """The response to a message sent with send_msg_async.
+
+    The binary response is deserialized by the first call to result(), in the
+    thread calling it.
+
+    Args:
+        future: the Future of the binary response
+        worker: the worker which sent the message
+        deserialize: False if the result of future is already deserialized
+    """
+
+    def __init__(self, future: Future, worker: BaseWorker, deserialize: bool = True):
+        self.future = future
+        self.worker = worker
+        self.deserialize = deserialize
+
+    def done(self) -> bool:
+        """Returns True if the response was received."""
+        return self.future.done()
+
+    def result(self, timeout: float = None) -> object:
+        """Waits for the response and returns it deserialized.
+
+        Args:
+            timeout: the max number of seconds to wait, forever if None
+
+        Raises:
+            concurrent.futures.TimeoutError: if the response is not received in time
+        """
+        response = self.future.result(timeout)
+        if self.deserialize:
+            self.future = _completed_future(sy.serde.deserialize, response, self.worker)
+            self.deserialize = False
+        return self.future.result()
+
+
+def _flush_command_batch(message: Message, location: BaseWorker, wait: bool = True):
+    """Sends the commands batched for location, before another message is sent to it.
+
+    With wait=False, the response of the batch is processed by its next flush."""
+    command_batch = getattr(location, "command_batch", None)
+    if command_batch is not None and not isinstance(message, BatchMessage):
+        command_batch.flush(wait=wait)
+
+
+def _completed_future(function: Callable, *args) -> Future:
+    """Calls function and returns its result, or the exception raised, in a Future."""
+    future = Future()
+    try:
+        future.set_result(function(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
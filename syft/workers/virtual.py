@@ -1,10 +1,91 @@
+from concurrent.futures import Future
+
+import syft as sy
+from syft.messaging.message import Message
 from syft.workers.base import BaseWorker
+from syft.workers.base import ResponseFuture
+from syft.workers.base import _completed_future
+from syft.workers.base import _flush_command_batch
 from syft.federated.federated_client import FederatedClient
 
 
 class VirtualWorker(BaseWorker, FederatedClient):
+    """A worker living in the same process as the workers it talks to.
+
+    Args:
+        zero_serialization: if True, the messages sent by this worker to other
+            VirtualWorkers are only simplified, the msgpack serialization and the
+            compression are skipped on both sides. The simplified message holds a copy
+            of the tensors sent, so the sender and the receiver never share data.
+        *args, **kwargs: the arguments of BaseWorker
+    """
+
+    # If True, VirtualWorkers always fully serialize their messages, even those created
+    # with zero_serialization=True, for example to test serde through simulations
+    force_full_serialization = False
+
+    def __init__(self, *args, zero_serialization: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.zero_serialization = zero_serialization
+
+    def send_msg(self, message: Message, location: BaseWorker) -> object:
+        if (
+            not self.zero_serialization
+            or self.force_full_serialization
+            or not isinstance(location, VirtualWorker)
+        ):
+            return super().send_msg(message, location)
+
+        if self.verbose:
+            print(f"worker {self} sending {message} to {location}")
+
+        _flush_command_batch(message, location)
+        self._flush_deletion_queue(message, location)
+
+        simple_message = sy.serde.serialize(message, force_no_serialization=True)
+        simple_response = location._recv_simple_msg(simple_message)
+        return sy.serde._detail(self, simple_response)
+
+    def send_msg_async(self, message: Message, location: BaseWorker) -> ResponseFuture:
+        if (
+            not self.zero_serialization
+            or self.force_full_serialization
+            or not isinstance(location, VirtualWorker)
+        ):
+            return super().send_msg_async(message, location)
+
+        # the response is computed right away, and already deserialized
+        return ResponseFuture(
+            _completed_future(self.send_msg, message, location), self, deserialize=False
+        )
+
     def _send_msg(self, message: bin, location: BaseWorker) -> bin:
         return location._recv_msg(message)
 
+    def _send_msg_async(self, message: bin, location: BaseWorker) -> Future:
+        return location._recv_msg_async(message)
+
     def _recv_msg(self, message: bin) -> bin:
         return self.recv_msg(message)
+
+    def _recv_simple_msg(self, simple_message: object) -> object:
+        """Same as recv_msg, for a message which was simplified but not serialized.
+
+        Args:
+            simple_message: a simplified message, as returned by
+                serialize(message, force_no_serialization=True)
+
+        Returns:
+            the simplified response
+        """
+        if self.log_msgs:
+            self.msg_history.append(simple_message)
+
+        msg = sy.serde._detail(self, simple_message)
+
+        if self.verbose:
+            print(f"worker {self} received {sy.codes.code2MSGTYPE[msg.msg_type]} {msg.contents}")
+
+        response = self._message_router[msg.msg_type](msg.contents)
+
+        return sy.serde.serialize(response, force_no_serialization=True)
@@ -1,9 +1,14 @@
 import binascii
+from concurrent.futures import Future
+import itertools
+import struct
+import threading
 from typing import Union
 from typing import List
 
 import torch
 import websocket
+from websocket import ABNF
 import websockets
 import logging
 import ssl
@@ -19,8 +24,19 @@ logger = logging.getLogger(__name__)
 
 TIMEOUT_INTERVAL = 999_999
 
+# Websocket subprotocol offered by clients able to exchange serialized messages
+# as raw binary frames. Peers which do not accept it fall back to hexlified text.
+BINARY_FRAMES_SUBPROTOCOL = "syft-binary"
+# Websocket subprotocol of binary frames starting with a request id, which lets clients
+# send several messages before getting their responses
+PIPELINING_SUBPROTOCOL = "syft-pipelining"
+REQUEST_ID = struct.Struct("<Q")
+
 
 class WebsocketClientWorker(BaseWorker):
+
+    dispatch_concurrently = True
+
     def __init__(
         self,
         hook,
@@ -32,13 +48,34 @@ class WebsocketClientWorker(BaseWorker):
         log_msgs: bool = False,
         verbose: bool = False,
         data: List[Union[torch.Tensor, AbstractTensor]] = None,
+        binary_frames: bool = True,
+        pipelining: bool = True,
     ):
         """A client which will forward all messages to a remote worker running a
         WebsocketServerWorker and receive all responses back from the server.
+
+        Args:
+            binary_frames: if True, the client offers to exchange messages as raw
+                binary websocket frames when connecting. Servers which do not support
+                it are talked to using hexlified text frames.
+            pipelining: if True (and binary_frames is True), the client offers to
+                prefix the binary frames with request ids, so that messages sent with
+                send_msg_async don't wait for the responses of the previous ones.
         """
 
         self.port = port
         self.host = host
+        self.binary_frames = binary_frames
+        self.pipelining = pipelining
+        # set at connection time, True only if the server accepted binary frames
+        self.use_binary_frames = False
+        # set at connection time, True only if the server accepted request ids
+        self.use_pipelining = False
+
+        # Futures of the responses to the requests in flight, by request id
+        self._pending_responses = {}
+        self._request_ids = itertools.count()
+        self._send_lock = threading.Lock()
 
         super().__init__(hook, id, data, is_client_worker, log_msgs, verbose)
 
@@ -59,11 +96,47 @@ class WebsocketClientWorker(BaseWorker):
         if self.secure:
             args["sslopt"] = {"cert_reqs": ssl.CERT_NONE}
 
-        self.ws = websocket.create_connection(**args)
+        if self.binary_frames:
+            subprotocols = [BINARY_FRAMES_SUBPROTOCOL]
+            if self.pipelining:
+                subprotocols.insert(0, PIPELINING_SUBPROTOCOL)
+            try:
+                self.ws = websocket.create_connection(subprotocols=subprotocols, **args)
+            except (websocket.WebSocketException, AttributeError):
+                # Servers predating binary frames don't answer the subprotocol offer,
+                # which websocket_client reports as an invalid handshake.
+                logger.info("Server %s doesn't support binary frames", self.url)
+                self.ws = websocket.create_connection(**args)
+        else:
+            self.ws = websocket.create_connection(**args)
+
+        self.use_pipelining = self.ws.subprotocol == PIPELINING_SUBPROTOCOL
+        self.use_binary_frames = self.use_pipelining or (
+            self.ws.subprotocol == BINARY_FRAMES_SUBPROTOCOL
+        )
+
+        if self.use_pipelining:
+            reader = threading.Thread(target=self._read_responses, args=(self.ws,), daemon=True)
+            reader.start()
 
     def close(self):
         self.ws.shutdown()
 
+    def _read_responses(self, ws):
+        """Resolves the futures of the requests in flight with their responses, until
+        the connection is closed."""
+        try:
+            while True:
+                response = ws.recv()
+                (request_id,) = REQUEST_ID.unpack_from(response)
+                future = self._pending_responses.pop(request_id)
+                future.set_result(memoryview(response)[REQUEST_ID.size :])
+        except Exception as e:
+            for request_id in list(self._pending_responses):
+                future = self._pending_responses.pop(request_id, None)
+                if future is not None:
+                    future.set_exception(e)
+
     def search(self, query):
         # Prepare a message requesting the websocket server to search among its objects
         message = SearchMessage(query)
@@ -79,21 +152,75 @@ class WebsocketClientWorker(BaseWorker):
             "make hook.local_worker a WebsocketClientWorker?",
         )
 
+    def _send_fragments(self, chunks: list):
+        """Sends chunks as the fragments of a single websocket message, so that they
+        never get concatenated on this side."""
+        with self._send_lock:
+            self.ws.send_frame(ABNF.create_frame(chunks[0], ABNF.OPCODE_BINARY, fin=0))
+            for chunk in chunks[1:-1]:
+                self.ws.send_frame(ABNF.create_frame(chunk, ABNF.OPCODE_CONT, fin=0))
+            self.ws.send_frame(ABNF.create_frame(chunks[-1], ABNF.OPCODE_CONT, fin=1))
+
     def _forward_to_websocket_server_worker(self, message: bin) -> bin:
+        if self.use_pipelining:
+            return self._recv_msg_async(message).result()
+
+        if isinstance(message, list) and not self.use_binary_frames:
+            # messages with out of band buffers have to be joined to be hexlified
+            message = b"".join(message)
+
+        if isinstance(message, list):
+            self._send_fragments(message)
+            return self.ws.recv()
+
+        if self.use_binary_frames:
+            self.ws.send_binary(message)
+            return self.ws.recv()
+
         self.ws.send(str(binascii.hexlify(message)))
         response = binascii.unhexlify(self.ws.recv()[2:-1])
         return response
 
+    def _recv_msg_async(self, message: bin) -> Future:
+        """Forwards a message to the WebsocketServerWorker without waiting for the
+        response, if the server accepted request ids.
+
+        Returns:
+            a Future of the binary response
+        """
+        if not self.use_pipelining:
+            return super()._recv_msg_async(message)
+
+        request_id = next(self._request_ids)
+        future = Future()
+        self._pending_responses[request_id] = future
+
+        chunks = message if isinstance(message, list) else [message]
+        try:
+            self._send_fragments([REQUEST_ID.pack(request_id)] + chunks)
+        except Exception:
+            del self._pending_responses[request_id]
+            raise
+
+        return future
+
     def _recv_msg(self, message: bin) -> bin:
         """Forwards a message to the WebsocketServerWorker"""
 
-        response = self._forward_to_websocket_server_worker(message)
-        if not self.ws.connected:
+        try:
+            response = self._forward_to_websocket_server_worker(message)
+        except websocket.WebSocketConnectionClosedException:
+            if not self.use_pipelining:
+                raise
+            # the connection was closed while waiting for the response, it is
+            # opened again below
+            response = None
+        if response is None or not self.ws.connected:
             logger.warning("Websocket connection closed (worker: %s)", self.id)
             self.ws.shutdown()
             time.sleep(0.1)
             # Avoid timing out on the server-side
-            self.ws = websocket.create_connection(self.url, max_size=None, timeout=TIMEOUT_INTERVAL)
+            self.connect()
             logger.warning("Created new websocket connection")
             time.sleep(0.1)
             response = self._forward_to_websocket_server_worker(message)
@@ -139,7 +266,11 @@ class WebsocketClientWorker(BaseWorker):
         # This code is not tested with secure connections (wss protocol).
         self.close()
         async with websockets.connect(
-            self.url, timeout=TIMEOUT_INTERVAL, max_size=None, ping_timeout=TIMEOUT_INTERVAL
+            self.url,
+            timeout=TIMEOUT_INTERVAL,
+            max_size=None,
+            ping_timeout=TIMEOUT_INTERVAL,
+            subprotocols=[BINARY_FRAMES_SUBPROTOCOL] if self.binary_frames else None,
         ) as websocket:
             message = self.create_message_execute_command(
                 command_name="fit",
@@ -150,7 +281,10 @@ class WebsocketClientWorker(BaseWorker):
 
             # Send the message and return the deserialized response.
             serialized_message = sy.serde.serialize(message)
-            await websocket.send(str(binascii.hexlify(serialized_message)))
+            if websocket.subprotocol == BINARY_FRAMES_SUBPROTOCOL:
+                await websocket.send(serialized_message)
+            else:
+                await websocket.send(str(binascii.hexlify(serialized_message)))
             await websocket.recv()  # returned value will be None, so don't care
 
         # Reopen the standard connection
@@ -1,5 +1,6 @@
 import asyncio
 import binascii
+from concurrent.futures import ThreadPoolExecutor
 import logging
 import socket
 import ssl
@@ -15,6 +16,9 @@ import syft as sy
 from syft.federated.federated_client import FederatedClient
 from syft.generic.tensor import AbstractTensor
 from syft.workers.virtual import VirtualWorker
+from syft.workers.websocket_client import BINARY_FRAMES_SUBPROTOCOL
+from syft.workers.websocket_client import PIPELINING_SUBPROTOCOL
+from syft.workers.websocket_client import REQUEST_ID
 
 from syft.exceptions import GetNotPermittedError
 from syft.exceptions import ResponseSignatureError
@@ -35,12 +39,20 @@ class WebsocketServerWorker(VirtualWorker, FederatedClient):
         loop=None,
         cert_path: str = None,
         key_path: str = None,
+        queue_size: int = 64,
+        max_workers: int = 1,
     ):
         """This is a simple extension to normal workers wherein
         all messages are passed over websockets. Note that because
         BaseWorker assumes a request/response paradigm, this worker
         enforces this paradigm by default.
 
+        The messages are read and the responses are written by the event loop, while
+        the messages are processed off the event loop by a pool of max_workers
+        threads. The messages of a connection are processed one at a time, in order.
+        By default, the pool has a single thread, so only the I/O of the connections
+        is concurrent and a long command delays the messages of every connection.
+
         Args:
             hook (sy.TorchHook): a normal TorchHook object
             id (str or id): the unique id of the worker (string or int)
@@ -56,6 +68,13 @@ class WebsocketServerWorker(VirtualWorker, FederatedClient):
                 yourself
             cert_path: path to used secure certificate, only needed for secure connections
             key_path: path to secure key, only needed for secure connections
+            queue_size: the max number of messages of a connection waiting to be
+                processed, above which the server stops reading from the connection
+            max_workers: the number of threads processing the messages, so that up to
+                max_workers connections have a command running at the same time.
+                The objects of the worker and sy.ID_PROVIDER are not thread-safe,
+                so more than one thread is only safe for connections working on
+                distinct objects, and it may still give the same new id twice.
         """
 
         self.port = port
@@ -66,9 +85,9 @@ class WebsocketServerWorker(VirtualWorker, FederatedClient):
         if loop is None:
             loop = asyncio.new_event_loop()
 
-        # this queue is populated when messages are received
-        # from a client
-        self.broadcast_queue = asyncio.Queue()
+        self.queue_size = queue_size
+        # the threads processing the messages, so that they don't block the event loop
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
 
         # this is the asyncio event loop
         self.loop = loop
@@ -76,46 +95,79 @@ class WebsocketServerWorker(VirtualWorker, FederatedClient):
         # call BaseWorker constructor
         super().__init__(hook=hook, id=id, data=data, log_msgs=log_msgs, verbose=verbose)
 
-    async def _consumer_handler(self, websocket: websockets.WebSocketCommonProtocol):
+    async def _consumer_handler(
+        self, websocket: websockets.WebSocketCommonProtocol, queue: asyncio.Queue
+    ):
         """This handler listens for messages from WebsocketClientWorker
         objects.
 
         Args:
             websocket: the connection object to receive messages from and
                 add them into the queue.
+            queue: the queue of the messages of this connection, when it is full
+                the handler waits before reading the next message
 
         """
         while True:
             msg = await websocket.recv()
-            await self.broadcast_queue.put(msg)
+            await queue.put(msg)
 
-    async def _producer_handler(self, websocket: websockets.WebSocketCommonProtocol):
+    async def _producer_handler(
+        self, websocket: websockets.WebSocketCommonProtocol, queue: asyncio.Queue
+    ):
         """This handler listens to the queue and processes messages as they
-        arrive.
+        arrive, in the threads processing the messages of all the connections.
 
         Args:
             websocket: the connection object we use to send responses
                 back to the client.
+            queue: the queue of the messages of this connection
 
         """
+        loop = asyncio.get_event_loop()
         while True:
 
             # get a message from the queue
-            message = await self.broadcast_queue.get()
-
-            # convert that string message to the binary it represent
-            message = binascii.unhexlify(message[2:-1])
+            message = await queue.get()
 
-            # process the message
-            response = self._recv_msg(message)
-
-            # convert the binary to a string representation
-            # (this is needed for the websocket library)
-            response = str(binascii.hexlify(response))
+            # process it off the event loop
+            response = await loop.run_in_executor(
+                self._executor, self._process_message, message, websocket.subprotocol
+            )
 
             # send the response
             await websocket.send(response)
 
+    def _process_message(self, message: Union[bytes, str], subprotocol: str):
+        """Processes a message received with a subprotocol and returns the response to
+        send back."""
+        if subprotocol == PIPELINING_SUBPROTOCOL:
+            # the request id in front of the message is sent back in front
+            # of its response, as the first fragment
+            request_id = message[: REQUEST_ID.size]
+            response = self._recv_msg(memoryview(message)[REQUEST_ID.size :])
+            if isinstance(response, list):
+                return [request_id] + response
+            return [request_id, response]
+
+        if isinstance(message, bytes):
+            # binary frames hold the serialized message as is, and so
+            # does the response. Responses with out of band buffers are
+            # lists of chunks, sent as the fragments of a single message
+            return self._recv_msg(message)
+
+        # convert that string message to the binary it represent
+        message = binascii.unhexlify(message[2:-1])
+
+        # process the message
+        response = self._recv_msg(message)
+        if isinstance(response, list):
+            response = b"".join(response)
+
+        # convert the binary to a string representation
+        # (this is needed for clients not using binary frames)
+        return str(binascii.hexlify(response))
+
     def _recv_msg(self, message: bin) -> bin:
         try:
             return self.recv_msg(message)
@@ -131,8 +183,11 @@ class WebsocketServerWorker(VirtualWorker, FederatedClient):
         """
 
         asyncio.set_event_loop(self.loop)
-        consumer_task = asyncio.ensure_future(self._consumer_handler(websocket))
-        producer_task = asyncio.ensure_future(self._producer_handler(websocket))
+        # each connection has its own queue, so that the responses go back to the
+        # client which sent the message
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        consumer_task = asyncio.ensure_future(self._consumer_handler(websocket, queue))
+        producer_task = asyncio.ensure_future(self._producer_handler(websocket, queue))
 
         done, pending = await asyncio.wait(
             [consumer_task, producer_task], return_when=asyncio.FIRST_COMPLETED
@@ -153,6 +208,7 @@ class WebsocketServerWorker(VirtualWorker, FederatedClient):
                 self.port,
                 ssl=ssl_context,
                 max_size=None,
+                subprotocols=[PIPELINING_SUBPROTOCOL, BINARY_FRAMES_SUBPROTOCOL],
                 ping_timeout=None,
                 close_timeout=None,
             )
@@ -163,6 +219,7 @@ class WebsocketServerWorker(VirtualWorker, FederatedClient):
                 self.host,
                 self.port,
                 max_size=None,
+                subprotocols=[PIPELINING_SUBPROTOCOL, BINARY_FRAMES_SUBPROTOCOL],
                 ping_timeout=None,
                 close_timeout=None,
             )
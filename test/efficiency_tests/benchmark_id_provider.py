@@ -0,0 +1,76 @@
+"""Time and memory taken by IdProvider to issue a large number of ids, compared with
+the previous provider drawing random ids and storing them all to check uniqueness.
+
+Run it from the root of the repository:
+
+    python -m test.efficiency_tests.benchmark_id_provider
+"""
+import argparse
+import math
+import random
+import resource
+import time
+
+from syft.generic.id_provider import BLOCK_SIZE
+from syft.generic.id_provider import IdProvider
+
+
+class RandomIdProvider:
+    """The previous IdProvider, without given ids."""
+
+    def __init__(self):
+        self.generated = set()
+
+    def pop(self) -> int:
+        random_id = int(10e10 * random.random())
+        while random_id in self.generated:
+            random_id = int(10e10 * random.random())
+        self.generated.add(random_id)
+        return random_id
+
+
+def max_rss() -> int:
+    """Returns the peak memory used by the process (in MB)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+
+
+def pop_ids(provider, n_ids: int) -> float:
+    """Returns the time (in s) taken to issue n_ids ids."""
+    pop = provider.pop
+    t0 = time.time()
+    for _ in range(n_ids):
+        pop()
+    return time.time() - t0
+
+
+def main(n_ids: int, n_random_ids: int):
+    rss = max_rss()
+    random_time = pop_ids(RandomIdProvider(), n_random_ids)
+    random_rss = max_rss() - rss
+    print(
+        f"random ids  | {n_random_ids:>11,} ids | {1e9 * random_time / n_random_ids:6.0f} ns/id"
+        f" | peak memory +{random_rss} MB"
+    )
+
+    provider = IdProvider()
+    rss = max_rss()
+    block_time = pop_ids(provider, n_ids)
+    block_rss = max_rss() - rss
+    print(
+        f"block ids   | {n_ids:>11,} ids | {1e9 * block_time / n_ids:6.0f} ns/id"
+        f" | peak memory +{block_rss} MB"
+    )
+
+    # only the prefix of each block of consecutive ids is stored
+    assert len(provider.prefixes) == math.ceil(n_ids / BLOCK_SIZE)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark IdProvider.")
+    parser.add_argument("--ids", "-n", type=int, default=100_000_000, help="ids issued")
+    parser.add_argument(
+        "--random-ids", "-r", type=int, default=1_000_000, help="ids of the random provider"
+    )
+    args = parser.parse_args()
+
+    main(args.ids, args.random_ids)
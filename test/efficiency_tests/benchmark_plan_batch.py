@@ -0,0 +1,71 @@
+"""Compares serving many small requests with a Plan sent to a worker, one call per
+request, and with run_batch, which sends all of them in a single message and fetches
+the results in another one.
+
+Run it from the root of the repository:
+
+    python -m test.efficiency_tests.benchmark_plan_batch
+"""
+import argparse
+import time
+
+import torch
+from torch import nn
+import torch.nn.functional as F
+
+import syft as sy
+from syft.workers.virtual import VirtualWorker
+
+
+class MLP(sy.Plan):
+    def __init__(self, n_features: int, n_hidden: int, n_classes: int):
+        super().__init__()
+        self.fc1 = nn.Linear(n_features, n_hidden)
+        self.fc2 = nn.Linear(n_hidden, n_classes)
+        self.add_to_state("fc1", "fc2")
+
+    def forward(self, x):
+        return F.log_softmax(self.fc2(F.relu(self.fc1(x))), dim=1)
+
+
+def main(n_requests: int, n_features: int, repeats: int):
+    hook = sy.TorchHook(torch)
+    bob = VirtualWorker(hook, id="bob_plan_batch")
+    # serialize the messages, as a remote worker would
+    hook.local_worker.force_full_serialization = True
+
+    plan = MLP(n_features, 64, 10)
+    plan.build(torch.zeros(1, n_features))
+    plan.send(bob)
+    x_ptrs = [torch.rand(1, n_features).send(bob) for _ in range(n_requests)]
+
+    def one_call_per_request():
+        return [plan(x_ptr).get() for x_ptr in x_ptrs]
+
+    def run_batch_loop():
+        return plan.run_batch(x_ptrs, batch_polymorphic=False)
+
+    def run_batch_stacked():
+        return plan.run_batch(x_ptrs, batch_polymorphic=True)
+
+    for name, run in (
+        ("one call per request", one_call_per_request),
+        ("run_batch, loop", run_batch_loop),
+        ("run_batch, stacked", run_batch_stacked),
+    ):
+        run()
+        t0 = time.time()
+        for _ in range(repeats):
+            run()
+        request_time = (time.time() - t0) / (repeats * n_requests)
+        print(f"{name:>20} | {n_requests} requests | {1e6 * request_time:8.1f} us/request")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Plan.run_batch.")
+    parser.add_argument("--requests", "-n", type=int, default=64, help="requests per batch")
+    parser.add_argument("--features", "-f", type=int, default=32, help="input features")
+    parser.add_argument("--repeats", "-r", type=int, default=20, help="batches measured")
+    args = parser.parse_args()
+
+    main(args.requests, args.features, args.repeats)
@@ -0,0 +1,70 @@
+"""Compares the execution of a Plan by a worker when it sends itself each message of its
+readable plan, and when it runs its compiled steps, on the forward pass of a small MLP.
+
+Run it from the root of the repository:
+
+    python -m test.efficiency_tests.benchmark_plan_execution
+"""
+import argparse
+import time
+
+import torch
+from torch import nn
+import torch.nn.functional as F
+
+import syft as sy
+from syft.messaging.plan import Plan
+from syft.workers.virtual import VirtualWorker
+
+
+class MLP(sy.Plan):
+    def __init__(self, n_features: int, n_hidden: int, n_classes: int):
+        super().__init__()
+        self.fc1 = nn.Linear(n_features, n_hidden)
+        self.fc2 = nn.Linear(n_hidden, n_hidden)
+        self.fc3 = nn.Linear(n_hidden, n_classes)
+        self.add_to_state("fc1", "fc2", "fc3")
+
+    def forward(self, x):
+        x = F.relu(self.fc1(x))
+        x = F.relu(self.fc2(x))
+        return F.log_softmax(self.fc3(x), dim=1)
+
+
+def run_plan(plan: Plan, x_ptr, repeats: int) -> float:
+    """Returns the mean time (in s) of a call of the plan."""
+    plan(x_ptr)
+    t0 = time.time()
+    for _ in range(repeats):
+        plan(x_ptr)
+    return (time.time() - t0) / repeats
+
+
+def main(batch_size: int, n_features: int, n_hidden: int, repeats: int):
+    hook = sy.TorchHook(torch)
+    bob = VirtualWorker(hook, id="bob_plan_execution")
+
+    plan = MLP(n_features, n_hidden, 10)
+    plan.build(torch.zeros(batch_size, n_features))
+    plan.send(bob)
+    x_ptr = torch.rand(batch_size, n_features).send(bob)
+    print(f"{len(plan.readable_plan)} messages in the readable plan")
+
+    for compiled_execution in (False, True):
+        Plan.compiled_execution = compiled_execution
+        mode = "compiled steps" if compiled_execution else "messages"
+        call_time = run_plan(plan, x_ptr, repeats)
+        print(f"{mode:>14} | MLP forward ({batch_size}x{n_features}) | {1e6 * call_time:9.1f} us")
+
+    Plan.compiled_execution = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Plan execution.")
+    parser.add_argument("--batch-size", "-b", type=int, default=8, help="size of the batch")
+    parser.add_argument("--features", "-f", type=int, default=32, help="input features")
+    parser.add_argument("--hidden", type=int, default=64, help="hidden units")
+    parser.add_argument("--repeats", "-r", type=int, default=1000, help="calls per measure")
+    args = parser.parse_args()
+
+    main(args.batch_size, args.features, args.hidden, args.repeats)
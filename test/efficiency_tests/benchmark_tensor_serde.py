@@ -0,0 +1,78 @@
+"""Compares the tensor serialization strategies of syft.serde.torch_serde on
+tensors shaped like the parameters of common models.
+
+The raw strategy is measured twice: deserializing from bytes, as for tensors
+embedded in a msgpack document, copies the data once, while deserializing from a
+bytearray, as for out of band buffers received in one, doesn't copy it.
+
+Run it from the root of the repository:
+
+    python -m test.efficiency_tests.benchmark_tensor_serde
+"""
+import argparse
+import time
+
+import torch
+
+from syft.serde import torch_serde
+
+# name: (serializer, deserializer, whether the binary is deserialized from a bytearray)
+STRATEGIES = {
+    "torch": (torch_serde.torch_tensor_serializer, torch_serde.torch_tensor_deserializer, False),
+    "numpy": (torch_serde.numpy_tensor_serializer, torch_serde.numpy_tensor_deserializer, False),
+    "raw": (torch_serde.raw_tensor_serializer, torch_serde.raw_tensor_deserializer, False),
+    "raw oob": (torch_serde.raw_tensor_serializer, torch_serde.raw_tensor_deserializer, True),
+}
+
+# Parameter shapes found in a MNIST MLP, a ResNet-18 and a VGG-16
+SHAPES = {
+    "mlp bias": (128,),
+    "mlp weight": (128, 784),
+    "resnet conv1": (64, 3, 7, 7),
+    "resnet layer4 conv": (512, 512, 3, 3),
+    "resnet fc": (1000, 512),
+    "vgg fc6": (4096, 25088),
+}
+
+
+def time_strategy(
+    serializer, deserializer, tensor: torch.Tensor, repeats: int, writable: bool = False
+):
+    """Returns the mean serialization and deserialization times (in ms) and
+    the size of the serialized tensor (in bytes).
+
+    If writable is True, the binary is deserialized from a bytearray.
+    """
+    t0 = time.time()
+    for _ in range(repeats):
+        tensor_bin = serializer(tensor)
+    t1 = time.time()
+    if writable:
+        tensor_bin = bytearray(tensor_bin)
+    t2 = time.time()
+    for _ in range(repeats):
+        deserializer(tensor_bin)
+    t3 = time.time()
+
+    return 1000 * (t1 - t0) / repeats, 1000 * (t3 - t2) / repeats, len(tensor_bin)
+
+
+def main(repeats: int):
+    for shape_name, shape in SHAPES.items():
+        tensor = torch.randn(shape)
+        for strategy_name, (serializer, deserializer, writable) in STRATEGIES.items():
+            ser_time, deser_time, size = time_strategy(
+                serializer, deserializer, tensor, repeats, writable
+            )
+            print(
+                f"{shape_name:>20} | {strategy_name:>7} | serialize {ser_time:9.3f} ms | "
+                f"deserialize {deser_time:9.3f} ms | {size} bytes"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark tensor serialization strategies.")
+    parser.add_argument("--repeats", "-r", type=int, default=10, help="runs per measure")
+    args = parser.parse_args()
+
+    main(args.repeats)
@@ -0,0 +1,85 @@
+"""Compares VirtualWorkers sending fully serialized messages with VirtualWorkers in
+zero serialization mode, on a SPDZ matmul and on a few federated training steps.
+
+Run it from the root of the repository:
+
+    python -m test.efficiency_tests.benchmark_virtual_worker
+"""
+import argparse
+import time
+
+import torch
+from torch import nn
+from torch import optim
+
+import syft as sy
+from syft.workers.virtual import VirtualWorker
+
+
+def spdz_matmul(workers: dict, size: int, repeats: int) -> float:
+    """Returns the mean time (in s) of a private matmul of two size x size tensors."""
+    alice, bob, james = workers["alice"], workers["bob"], workers["james"]
+    x = torch.randint(10, (size, size)).share(alice, bob, crypto_provider=james)
+    y = torch.randint(10, (size, size)).share(alice, bob, crypto_provider=james)
+
+    t0 = time.time()
+    for _ in range(repeats):
+        x.matmul(y).get()
+    return (time.time() - t0) / repeats
+
+
+def federated_training(workers: dict, n_batches: int, repeats: int) -> float:
+    """Returns the mean time (in s) of one epoch of a linear model trained on
+    n_batches batches held by alice and bob."""
+    alice, bob = workers["alice"], workers["bob"]
+    batches = [
+        (torch.randn(32, 100).send(worker), torch.randn(32, 1).send(worker))
+        for worker in (alice, bob)
+        for _ in range(n_batches // 2)
+    ]
+    model = nn.Linear(100, 1)
+
+    t0 = time.time()
+    for _ in range(repeats):
+        for data, target in batches:
+            model.send(data.location)
+            opt = optim.SGD(params=model.parameters(), lr=0.1)
+            opt.zero_grad()
+            loss = ((model(data) - target) ** 2).sum()
+            loss.backward()
+            opt.step()
+            model.get()
+    return (time.time() - t0) / repeats
+
+
+def main(size: int, n_batches: int, repeats: int):
+    hook = sy.TorchHook(torch)
+    me = hook.local_worker
+
+    for zero_serialization in (False, True):
+        me.zero_serialization = zero_serialization
+        workers = {
+            name: VirtualWorker(
+                hook, id=f"{name}_{zero_serialization}", zero_serialization=zero_serialization
+            )
+            for name in ("alice", "bob", "james")
+        }
+        mode = "zero serialization" if zero_serialization else "full serialization"
+
+        matmul_time = spdz_matmul(workers, size, repeats)
+        print(f"{mode:>18} | spdz matmul {size}x{size} | {1000 * matmul_time:9.2f} ms")
+
+        training_time = federated_training(workers, n_batches, repeats)
+        print(f"{mode:>18} | training epoch ({n_batches} batches) | {training_time:9.3f} s")
+
+    me.zero_serialization = False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark VirtualWorker serialization modes.")
+    parser.add_argument("--size", "-s", type=int, default=32, help="size of the matrices")
+    parser.add_argument("--batches", "-b", type=int, default=20, help="batches per epoch")
+    parser.add_argument("--repeats", "-r", type=int, default=5, help="runs per measure")
+    args = parser.parse_args()
+
+    main(args.size, args.batches, args.repeats)
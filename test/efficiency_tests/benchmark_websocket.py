@@ -0,0 +1,66 @@
+"""Throughput of tensor transfers between a WebsocketClientWorker and a local
+WebsocketServerWorker, with and without binary frames.
+
+Run it from the root of the repository:
+
+    python -m test.efficiency_tests.benchmark_websocket
+"""
+import argparse
+import time
+
+import torch
+
+import syft as sy
+from syft.workers.websocket_server import WebsocketServerWorker
+from test.conftest import _start_proc
+from test.conftest import instantiate_websocket_client_worker
+
+# Sizes in bytes of the float32 tensors sent back and forth
+SIZES = {"1KB": 2 ** 10, "1MB": 2 ** 20, "100MB": 100 * 2 ** 20}
+
+
+def run_transfers(remote_proxy, size: int, repeats: int) -> float:
+    """Sends a tensor of `size` bytes to the server and gets it back `repeats` times.
+
+    Returns:
+        The throughput in MB/s, counting the bytes sent and received.
+    """
+    tensor = torch.rand(size // 4)
+
+    t0 = time.time()
+    for _ in range(repeats):
+        tensor.send(remote_proxy).get()
+    dt = time.time() - t0
+
+    return 2 * repeats * size / dt / 2 ** 20
+
+
+def main(host: str, port: int, repeats: int):
+    hook = sy.TorchHook(torch)
+    kwargs = {"id": "benchmark_websocket", "host": host, "port": port, "hook": hook}
+    server = _start_proc(WebsocketServerWorker, **kwargs)
+
+    try:
+        for binary_frames in (False, True):
+            remote_proxy = instantiate_websocket_client_worker(
+                binary_frames=binary_frames, **kwargs
+            )
+            mode = "binary" if remote_proxy.use_binary_frames else "hexlified"
+            for name, size in SIZES.items():
+                throughput = run_transfers(remote_proxy, size, repeats)
+                print(f"{mode:>10} frames | {name:>6} tensor | {throughput:10.2f} MB/s")
+
+            remote_proxy.close()
+            remote_proxy.remove_worker_from_local_worker_registry()
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark websocket tensor transfers.")
+    parser.add_argument("--host", type=str, default="localhost", help="host of the server")
+    parser.add_argument("--port", "-p", type=int, default=8798, help="port of the server")
+    parser.add_argument("--repeats", "-r", type=int, default=5, help="transfers per size")
+    args = parser.parse_args()
+
+    main(args.host, args.port, args.repeats)
@@ -0,0 +1,112 @@
+"""Throughput and latency of a WebsocketServerWorker with many concurrent clients,
+each sending matmul commands on its own connection, for several sizes of the queues
+of the connections.
+
+With the default max_workers=1, the server processes the commands of all the
+connections one at a time, only the reading of the messages and the writing of the
+responses overlap with them. So the throughput measured is the one of a single thread
+running the commands, and larger queues only keep it busy while the clients are
+waiting for their responses.
+
+Run it from the root of the repository:
+
+    python -m test.efficiency_tests.benchmark_websocket_clients
+"""
+import argparse
+import threading
+import time
+
+import torch
+import websocket
+
+import syft as sy
+from syft.generic.pointers.pointer_tensor import PointerTensor
+from syft.messaging.message import ObjectMessage
+from syft.messaging.message import Operation
+from syft.workers.websocket_client import BINARY_FRAMES_SUBPROTOCOL
+from syft.workers.websocket_server import WebsocketServerWorker
+from test.conftest import _start_proc
+from test.conftest import instantiate_websocket_client_worker
+
+
+def run_client(remote_proxy, size: int, n_requests: int, latencies: list):
+    """Sends a size x size matrix to the server on a new connection, then n_requests
+    commands multiplying it by itself, and appends their latencies (in s) to latencies."""
+    ws = websocket.create_connection(
+        remote_proxy.url, max_size=None, subprotocols=[BINARY_FRAMES_SUBPROTOCOL]
+    )
+    matrix = torch.rand(size, size)
+    ws.send_binary(sy.serde.serialize(ObjectMessage(matrix)))
+    ws.recv()
+
+    pointer = PointerTensor(
+        location=remote_proxy,
+        id_at_location=matrix.id,
+        owner=remote_proxy.hook.local_worker,
+        garbage_collect_data=False,
+    )
+    # the results of the commands overwrite each other on the server
+    return_ids = (sy.ID_PROVIDER.pop(),)
+    command = sy.serde.serialize(Operation(("mm", pointer, (pointer,), {}), return_ids))
+    for _ in range(n_requests):
+        t0 = time.time()
+        ws.send_binary(command)
+        ws.recv()
+        latencies.append(time.time() - t0)
+
+    ws.close()
+
+
+def run_clients(remote_proxy, n_clients: int, size: int, n_requests: int):
+    """Returns the throughput (in requests/s) and the latencies of n_clients concurrent
+    clients."""
+    latencies = []
+    threads = [
+        threading.Thread(target=run_client, args=(remote_proxy, size, n_requests, latencies))
+        for _ in range(n_clients)
+    ]
+    t0 = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    dt = time.time() - t0
+
+    return n_clients * n_requests / dt, sorted(latencies)
+
+
+def main(host: str, port: int, n_clients: int, size: int, n_requests: int):
+    hook = sy.TorchHook(torch)
+
+    for queue_size in (1, 64):
+        kwargs = {"id": "benchmark_clients", "host": host, "port": port, "hook": hook}
+        server = _start_proc(WebsocketServerWorker, queue_size=queue_size, **kwargs)
+        mode = f"queue {queue_size}"
+
+        try:
+            remote_proxy = instantiate_websocket_client_worker(max_tries=20, **kwargs)
+            throughput, latencies = run_clients(remote_proxy, n_clients, size, n_requests)
+            p50 = latencies[len(latencies) // 2]
+            p95 = latencies[int(len(latencies) * 0.95)]
+            print(
+                f"{mode:>11} | {n_clients} clients | {throughput:8.1f} req/s"
+                f" | p50 {1000 * p50:8.2f} ms | p95 {1000 * p95:8.2f} ms"
+            )
+
+            remote_proxy.close()
+            remote_proxy.remove_worker_from_local_worker_registry()
+        finally:
+            server.terminate()
+            time.sleep(0.5)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark concurrent websocket clients.")
+    parser.add_argument("--host", type=str, default="localhost", help="host of the server")
+    parser.add_argument("--port", "-p", type=int, default=8797, help="port of the server")
+    parser.add_argument("--clients", "-c", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--size", "-s", type=int, default=256, help="size of the matrices")
+    parser.add_argument("--requests", "-r", type=int, default=50, help="requests per client")
+    args = parser.parse_args()
+
+    main(args.host, args.port, args.clients, args.size, args.requests)
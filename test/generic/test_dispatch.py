@@ -0,0 +1,118 @@
+from types import SimpleNamespace
+
+import torch
+
+import syft as sy
+from syft.generic import dispatch
+
+
+def _remote_shares(n_shares):
+    location = SimpleNamespace(dispatch_concurrently=True)
+    return {i: SimpleNamespace(location=location, value=i) for i in range(n_shares)}
+
+
+def test_map_shares_pipelined(hook):
+    pipelines = []
+
+    def function(key, share):
+        pipelines.append(dispatch.current_pipeline())
+        # a nested dispatch runs in the same pipeline
+        dispatch.map_shares(lambda k, v: pipelines.append(dispatch.current_pipeline()), {0: 0})
+        return share.value * 2
+
+    results = dispatch.map_shares(function, _remote_shares(3))
+
+    assert list(results.items()) == [(0, 0), (1, 2), (2, 4)]
+    assert pipelines[0] is not None
+    assert pipelines == [pipelines[0]] * 6
+    assert dispatch.current_pipeline() is None
+
+
+def test_map_shares_not_pipelined(hook):
+    pipelines = []
+
+    def function(key, share):
+        pipelines.append(dispatch.current_pipeline())
+        return share
+
+    # local shares
+    dispatch.map_shares(function, {0: 0, 1: 1})
+
+    # ids recorded for a plan
+    sy.ID_PROVIDER.start_recording_ids()
+    dispatch.map_shares(function, _remote_shares(2))
+    sy.ID_PROVIDER.get_recorded_ids()
+
+    # a single remote location
+    dispatch.map_shares(function, _remote_shares(1))
+
+    assert pipelines == [None] * 5
+
+
+def test_pipeline_sends_everything_before_waiting():
+    events = []
+
+    class CommandBatch:
+        def __init__(self, name):
+            self.name = name
+            self.location = SimpleNamespace(command_batch=self)
+
+        def flush(self, wait=True):
+            events.append(("flush", self.name, wait))
+
+        def collect(self):
+            events.append(("collect", self.name))
+
+    class Response:
+        def __init__(self, name):
+            self.name = name
+
+        def result(self):
+            events.append(("result", self.name))
+
+    class Sender:
+        def send_msg_async(self, message, location):
+            events.append(("send", message.contents, location.id))
+            return Response("deletion")
+
+    pipeline = dispatch.Pipeline()
+    command_batches = [CommandBatch("alice"), CommandBatch("bob")]
+    pipeline.command_batches.extend(command_batches)
+    pipeline.responses.append(Response("object"))
+    pipeline.requests[("bob", 1)] = Response("request")
+    alice = SimpleNamespace(id="alice")
+    pipeline.delete(Sender(), 7, alice)
+    pipeline.delete(Sender(), 8, alice)
+
+    pipeline.close()
+
+    assert events == [
+        ("flush", "alice", False),
+        ("flush", "bob", False),
+        ("send", (7, 8), "alice"),
+        ("collect", "alice"),
+        ("collect", "bob"),
+        ("result", "object"),
+        ("result", "deletion"),
+        ("result", "request"),
+    ]
+    assert all(command_batch.location.command_batch is None for command_batch in command_batches)
+
+
+def test_shares_pipelined(workers, monkeypatch):
+    alice, bob, james = workers["alice"], workers["bob"], workers["james"]
+    for worker in (alice, bob):
+        monkeypatch.setattr(worker, "dispatch_concurrently", True)
+
+    x = torch.tensor([1, 2, 3]).share(alice, bob, crypto_provider=james)
+
+    assert ((x + x).get() == torch.tensor([2, 4, 6])).all()
+    assert ((x - 1).get() == torch.tensor([0, 1, 2])).all()
+    assert ((x * x).get() == torch.tensor([1, 4, 9])).all()
+
+    pointers = torch.tensor([1, 2, 3]).send(alice, bob)
+    for result in (pointers * 2).get():
+        assert (result == torch.tensor([2, 4, 6])).all()
+
+    # the commands deferred while the shares were dispatched are all sent
+    assert alice.command_batch is None and bob.command_batch is None
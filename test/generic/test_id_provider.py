@@ -7,42 +7,41 @@ from syft.generic import id_provider
 
 def test_pop_no_given_ids(hook):
     provider = id_provider.IdProvider()
-    values = [10, 4, 15, 4, 2, 0]
 
-    orig_func = id_provider.create_random_id
-    mocked_random_numbers = mock.Mock()
-    mocked_random_numbers.side_effect = values
-    id_provider.create_random_id = mocked_random_numbers
+    ids = [provider.pop() for _ in range(5)]
+    assert len(set(ids)) == 5
+    assert all(provider.is_generated(new_id) for new_id in ids)
+    assert not provider.is_generated(max(ids) + 1)
 
-    val = provider.pop()
-    assert val == values[0]
 
-    val = provider.pop()
-    assert val == values[1]
+def test_pop_new_block(hook):
+    values = [10, 4, 10, 2]
 
-    val = provider.pop()
-    assert val == values[2]
+    orig_func = id_provider.create_random_prefix
+    mocked_random_prefixes = mock.Mock()
+    mocked_random_prefixes.side_effect = values
+    id_provider.create_random_prefix = mocked_random_prefixes
 
-    # values[3] is skipped, as value already used.
+    provider = id_provider.IdProvider()
+    assert provider.pop() == 10 << id_provider.COUNTER_BITS
+    assert provider.pop() == (10 << id_provider.COUNTER_BITS) + 1
 
-    val = provider.pop()
-    assert val == values[4]
+    # go to the end of the block
+    provider._next_id = provider._block_end - 1
+    assert provider.pop() == (11 << id_provider.COUNTER_BITS) - 1
+    assert provider.pop() == 4 << id_provider.COUNTER_BITS
 
-    val = provider.pop()
-    assert val == values[5]
+    # values[2] is skipped, as the prefix was already used
+    provider._next_id = provider._block_end
+    assert provider.pop() == 2 << id_provider.COUNTER_BITS
+    assert provider.prefixes == {10, 4, 2}
 
-    id_provider.create_random_id = orig_func
+    id_provider.create_random_prefix = orig_func
 
 
 def test_pop_with_given_ids(hook):
     given_ids = [4, 15, 2]
     provider = id_provider.IdProvider(given_ids=given_ids.copy())
-    values = [10, 4, 15, 4, 2, 0]
-
-    orig_func = id_provider.create_random_id
-    mocked_random_numbers = mock.Mock()
-    mocked_random_numbers.side_effect = values
-    id_provider.create_random_id = mocked_random_numbers
 
     val = provider.pop()
     assert val == given_ids[-1]
@@ -54,14 +53,8 @@ def test_pop_with_given_ids(hook):
     assert val == given_ids[-3]
 
     val = provider.pop()
-    assert val == values[0]
-
-    # values[1, 2, 3, 4] are skipped, as value already used.
-
-    val = provider.pop()
-    assert val == values[5]
-
-    id_provider.create_random_id = orig_func
+    assert val not in given_ids
+    assert provider.is_generated(val)
 
 
 def test_given_ids_side_effect(hook):
@@ -117,6 +110,18 @@ def test_set_next_ids_with_id_checking(hook):
         provider.set_next_ids(next_ids.copy(), check_ids=True)
 
 
+def test_set_next_ids_with_generated_id_checking(hook):
+    provider = id_provider.IdProvider()
+    generated_ids = [provider.pop() for _ in range(2)]
+
+    next_ids = [1, generated_ids[0], 5]
+    with pytest.raises(exceptions.IdNotUniqueError, match=str(generated_ids[0])):
+        provider.set_next_ids(next_ids.copy(), check_ids=True)
+
+    # the ids of the current block which were not issued yet are free
+    provider.set_next_ids([max(generated_ids) + 1], check_ids=True)
+
+
 def test_start_recording_ids():
     initial_given_ids = [2, 3]
     provider = id_provider.IdProvider(given_ids=initial_given_ids.copy())
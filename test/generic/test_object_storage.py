@@ -37,3 +37,57 @@ def test_clear_objects_return_None():
     objs = obj_storage.current_objects()
     assert len(objs) == 0
     assert ret_val is None
+
+
+def test_search_ids(hook):
+    obj_storage = object_storage.ObjectStorage()
+
+    x = torch.tensor(1).tag("#fun", "#mnist").describe("The MNIST training dataset.")
+    y = torch.tensor(2).tag("#fun").describe("The CIFAR training dataset.")
+    z = torch.tensor(3)
+    for obj in (x, y, z):
+        obj_storage.set_obj(obj)
+
+    assert obj_storage.search_ids(["#fun"]) == [x.id, y.id]
+    assert obj_storage.search_ids(["#fun", "#mnist"]) == [x.id]
+    assert obj_storage.search_ids(["training dataset"]) == [x.id, y.id]
+    assert obj_storage.search_ids(["#fun", "CIFAR"]) == [y.id]
+    assert obj_storage.search_ids([str(z.id)]) == [z.id]
+    assert obj_storage.search_ids(["MNIS"]) == [x.id]
+    assert obj_storage.search_ids(["he MNIST trai"]) == [x.id]
+    assert obj_storage.search_ids(["MNIST  training"]) == []
+    assert obj_storage.search_ids([]) == [x.id, y.id, z.id]
+
+    # the index is updated when the tags and the description change
+    z.owner = obj_storage
+    z.tag("#fun").describe("Some MNIST samples")
+    assert obj_storage.search_ids(["#fun", "MNIST"]) == [x.id, z.id]
+
+    obj_storage.rm_obj(x.id)
+    assert obj_storage.search_ids(["#mnist"]) == []
+    assert "#mnist" not in obj_storage._tag_index
+
+
+def test_search_ids_not_indexed(hook):
+    obj_storage = object_storage.ObjectStorage()
+
+    x = torch.tensor(1).tag("#fun").describe("The MNIST training dataset.")
+    obj_storage.set_obj(x)
+
+    # tags and descriptions assigned directly are not indexed
+    x.owner = obj_storage
+    x.tags = {"#mnist"}
+    x.description = "The CIFAR training dataset."
+    assert obj_storage.search_ids(["#mnist"]) == []
+    assert obj_storage.search_ids(["CIFAR"]) == []
+    # and the former ones don't match anymore
+    assert obj_storage.search_ids(["#fun"]) == []
+    assert obj_storage.search_ids(["MNIST"]) == []
+
+    x.tag("#fun").describe(x.description)
+    assert obj_storage.search_ids(["#mnist", "#fun", "CIFAR"]) == [x.id]
+
+    # objects removed from _objects without rm_obj are skipped
+    del obj_storage._objects[x.id]
+    assert obj_storage.search_ids(["#mnist"]) == []
+    assert obj_storage.search_ids(["CIFAR training"]) == []
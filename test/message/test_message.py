@@ -140,3 +140,48 @@ def test_search_message_serde():
 
     assert x.contents == y.contents
     assert x.msg_type == y.msg_type
+
+
+def test_batch_message(workers):
+
+    bob = workers["bob"]
+
+    bob.log_msgs = True
+
+    x = th.tensor([1, 2, 3, 4]).send(bob)
+    n_messages = len(bob.msg_history)
+
+    with bob.batch() as batch:
+        y = x + x
+        z = y * 2  # this is the test
+
+        assert len(batch) == 2
+        assert len(bob.msg_history) == n_messages
+
+    assert isinstance(bob._get_msg(-1), message.BatchMessage)
+    assert len(batch.responses) == 2
+    assert (z.get() == th.tensor([4, 8, 12, 16])).all()
+
+    # other messages send the commands batched so far first
+    with bob.batch() as batch:
+        y = x + 1
+        assert (y.get() == th.tensor([2, 3, 4, 5])).all()
+        assert len(batch) == 0
+
+    bob.log_msgs = False
+
+
+def test_batch_message_serde(workers):
+
+    bob = workers["bob"]
+    ptr = th.tensor([1, 2]).send(bob).child
+
+    x = message.BatchMessage(
+        [message.Operation(("__add__", ptr, (ptr,), {}), (sy.ID_PROVIDER.pop(),))]
+    )
+    x_bin = sy.serde.serialize(x)
+    y = sy.serde.deserialize(x_bin, sy.local_worker)
+
+    assert y.msg_type == x.msg_type
+    assert len(y.operations) == 1
+    assert y.operations[0].return_ids == x.operations[0].return_ids
@@ -9,6 +9,9 @@ import torch.optim as optim
 import syft as sy
 from syft.generic.pointers.pointer_tensor import PointerTensor
 from syft.generic.frameworks.types import FrameworkTensor
+from syft.exceptions import ResponseSignatureError
+from syft.messaging.compiled_plan import CommandStep
+from syft.messaging.compiled_plan import Slot
 from syft.messaging.plan import Plan
 from syft.serde.serde import deserialize
 from syft.serde.serde import serialize
@@ -268,6 +271,242 @@ def test_stateful_plan_method_execute_locally():
     assert model(th.tensor([1.0, 2.1])) == th.tensor([1000.0])
 
 
+def test_compiled_plan_execution(workers):
+    bob = workers["bob"]
+
+    @sy.func2plan(args_shape=[(1, 3)])
+    def plan(x):
+        y = F.relu(x * 2 - 1)
+        return y[:, 1:].sum(dim=1) + x.t().view(-1)[0]
+
+    x = th.tensor([[1.0, -4.0, 3.0]])
+    expected = plan(x)
+
+    plan.send(bob)
+    x_ptr = x.send(bob)
+    assert (plan(x_ptr).get() == expected).all()
+
+    # all the commands of the plan are compiled
+    compiled_plan = bob._objects[plan.id].compiled_plan
+    assert len(compiled_plan) > 0
+    assert all(isinstance(step, CommandStep) for step in compiled_plan.steps)
+
+    # same results when the messages of the plan are sent to the worker
+    Plan.compiled_execution = False
+    try:
+        assert (plan(x_ptr).get() == expected).all()
+    finally:
+        Plan.compiled_execution = True
+
+
+def test_command_step_runs_like_execute_command(workers):
+    bob = workers["bob"]
+    x = th.tensor([[1.0, 4.0], [3.0, 2.0]])
+    bob.register_obj(x, "x")
+
+    # the methods of the objects which the worker doesn't give are skipped
+    x.private = True
+    CommandStep("add_", None, Slot("x"), (1,), {}, ()).run(bob, {})
+    x.private = False
+    assert (x == th.tensor([[1.0, 4.0], [3.0, 2.0]])).all()
+
+    # the results which have no id get new ones
+    step = CommandStep("max", None, Slot("x"), (1,), {}, ("values",))
+    with pytest.raises(ResponseSignatureError) as e:
+        step.run(bob, {"values": "values_id"})
+    values_id, indices_id = e.value.ids_generated
+    assert values_id == "values_id"
+    assert (bob.get_obj(values_id) == th.tensor([4.0, 3.0])).all()
+    assert (bob.get_obj(indices_id) == th.tensor([1, 0])).all()
+
+    bob.rm_obj("x")
+
+
+def test_optimize_plan(workers):
+    bob = workers["bob"]
+
+    @sy.func2plan(args_shape=[(2, 3)])
+    def plan(x):
+        unused = x.sum()
+        y = F.relu(x * 2 - 1)
+        return y.abs() + x
+
+    x = th.tensor([[1.0, -4.0, 3.0], [0.5, 2.0, -1.0]])
+    expected = plan(x)
+
+    plan.send(bob)
+    x_ptr = x.send(bob)
+
+    # the time is measured with the compiled execution of the plan on bob
+    report = plan.optimize(x_ptr)
+
+    # x.sum() is removed, and the 5 other commands are fused
+    assert report.ops_removed == {"dead_ops": 1, "constant_folding": 0, "fusion": 4}
+    assert report.n_ops_after == len(plan.readable_plan) == 1
+    assert report.time_saved is not None
+    assert (plan(x) == expected).all()
+
+    # bob runs the optimized plan
+    assert (plan(x_ptr).get() == expected).all()
+    compiled_plan = bob._objects[plan.id].compiled_plan
+    assert len(compiled_plan) == 1
+    assert isinstance(compiled_plan.steps[0], CommandStep)
+
+    Plan.compiled_execution = False
+    try:
+        assert (plan(x_ptr).get() == expected).all()
+    finally:
+        Plan.compiled_execution = True
+
+
+def test_optimize_plan_frozen_state(workers):
+    bob = workers["bob"]
+
+    @sy.func2plan(args_shape=[(2,)], state={"w": th.tensor([1.0, -2.0])})
+    def plan(x, state):
+        w = state.read("w")
+        return x + w.abs() * 2
+
+    plan.send(bob)
+    x_ptr = th.tensor([3.0, 4.0]).send(bob)
+    expected = th.tensor([5.0, 8.0])
+    assert (plan(x_ptr).get() == expected).all()
+
+    # w.abs() * 2 is fused, but not folded as the state may change
+    report = plan.optimize()
+    assert report.ops_removed["constant_folding"] == 0
+    assert report.ops_removed["fusion"] == 1
+    assert len(plan.readable_plan) == 2
+
+    # the fused command only reads the frozen state, so it is folded
+    report = plan.optimize(freeze_state=True)
+    assert report.ops_removed == {"dead_ops": 0, "constant_folding": 1, "fusion": 0}
+    assert len(plan.readable_plan) == 1
+    assert (plan(x_ptr).get() == expected).all()
+
+
+def test_optimize_plan_inplace_views(workers):
+    bob = workers["bob"]
+
+    @sy.func2plan(args_shape=[(2, 3)])
+    def plan(x):
+        y = x * 2
+        v = y.view(-1)
+        v.add_(1)
+        y[0].zero_()
+        return y
+
+    x = th.tensor([[1.0, -4.0, 3.0], [0.5, 2.0, -1.0]])
+    expected = plan(x)
+
+    # the views are modified in place, and so is y
+    report = plan.optimize()
+    assert report.ops_removed["dead_ops"] == 0
+
+    plan.send(bob)
+    x_ptr = x.send(bob)
+    assert (plan(x_ptr).get() == expected).all()
+
+
+def test_compiled_plan_tensor_constants(workers):
+    bob = workers["bob"]
+
+    @sy.func2plan(args_shape=[(2, 3)])
+    def plan(x):
+        return x * th.tensor([1.0, 2.0, 3.0]) + 1
+
+    x = th.tensor([[1.0, -4.0, 3.0], [0.5, 2.0, -1.0]])
+    expected = plan(x)
+
+    plan.send(bob)
+    x_ptr = x.send(bob)
+    assert (plan(x_ptr).get() == expected).all()
+    assert (plan(x_ptr).get() == expected).all()
+
+    # the tensor given in the plan is compiled in its step
+    compiled_plan = bob._objects[plan.id].compiled_plan
+    assert all(isinstance(step, CommandStep) for step in compiled_plan.steps)
+
+
+def test_plan_run_batch(workers):
+    bob = workers["bob"]
+
+    @sy.func2plan(args_shape=[(1, 3)])
+    def plan(x):
+        return F.relu(x * 2 - 1) + 1
+
+    xs = [th.tensor([[1.0, -4.0, 3.0]]), th.tensor([[0.5, 2.0, -1.0], [2.0, 0.0, 1.0]])]
+    expected = [plan(x) for x in xs]
+
+    for batch_polymorphic in (False, True):
+        results = plan.run_batch(xs, batch_polymorphic=batch_polymorphic)
+        assert len(results) == 2
+        assert all((result == e).all() for result, e in zip(results, expected))
+
+    plan.send(bob)
+    x_ptrs = [x.send(bob) for x in xs]
+    for batch_polymorphic in (False, True):
+        results = plan.run_batch([(x_ptr,) for x_ptr in x_ptrs], batch_polymorphic)
+        assert len(results) == 2
+        assert all((result == e).all() for result, e in zip(results, expected))
+
+    @sy.func2plan(args_shape=[(1, 3)])
+    def plan_sum(x):
+        return x.sum(dim=0, keepdim=True)
+
+    with pytest.raises(ValueError):
+        plan_sum.run_batch(xs, batch_polymorphic=True)
+
+    @sy.func2plan(args_shape=[(1, 3)])
+    def plan_two_results(x):
+        return x + 1, x * 2
+
+    with pytest.raises(ValueError, match="2 results"):
+        plan_two_results.run_batch(xs)
+
+
+def test_plan_frees_intermediates(workers):
+    bob = workers["bob"]
+
+    @sy.func2plan(args_shape=[(4, 256)])
+    def plan(x):
+        return F.relu(x * 2 - 1).sum(dim=1)
+
+    plan.send(bob)
+    x = th.rand(4, 256)
+    expected = F.relu(x * 2 - 1).sum(dim=1)
+    x_ptr = x.send(bob)
+    assert (plan(x_ptr).get() == expected).all()
+
+    compiled_plan = bob._objects[plan.id].compiled_plan
+    dead_ids = [dead_id for ids in compiled_plan.lifetimes for dead_id in ids]
+    assert len(dead_ids) == 3
+    assert all(dead_id not in bob._objects for dead_id in dead_ids)
+
+    # 4x256 float tensors use 4096 bytes, at most two of them are stored at once
+    report = plan.memory_report(x_ptr)
+    assert report.n_intermediates == 4
+    assert report.n_freed == 3
+    assert report.peak_bytes == 2 * 4096
+    assert report.total_bytes == 3 * 4096 + 16
+    assert report.resident_bytes == 16
+
+    @sy.func2plan(args_shape=[(4, 256)])
+    def plan_two_results(x):
+        y = x * 2
+        return y + 1, y.sum(dim=1)
+
+    plan_two_results.send(bob)
+    report = plan_two_results.memory_report(x_ptr)
+    assert report.n_intermediates == 3
+    assert report.n_freed == 1
+    assert report.resident_bytes == 4096 + 16
+
+    # both results were removed
+    result_ids = bob._objects[plan_two_results.id].result_ids
+    assert all(result_id not in bob._objects for result_id in result_ids)
+
+
 def test_plan_multiple_send(workers):
     me, bob, alice = workers["me"], workers["bob"], workers["alice"]
 
@@ -896,6 +1135,19 @@ def test__replace_message_ids():
     assert replaced == expected
 
 
+def test_replace_ids_from_index(hook):
+    plan = sy.Plan(id=1000, owner=hook.local_worker, name="test_plan")
+    plan.readable_plan = [(10, (20, 30)), (30, [b"me", 40]), (50, "30")]
+
+    plan.replace_ids([30, 40], [31, 41])
+    id_index = plan._id_index()
+    plan.replace_ids([31, 50], [32, 51])
+
+    # the positions of the ids are indexed once, and updated by replace_ids
+    assert plan._id_index() is id_index
+    assert plan.readable_plan == [(10, (20, 32)), (32, (b"me", 41)), (51, "30")]
+
+
 def test_send_with_plan(workers):
     bob = workers["bob"]
 
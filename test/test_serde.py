@@ -3,6 +3,8 @@ This file tests the ability for serde.py to convert complex types into
 simple python types which are serializable by standard serialization tools.
 For more on how/why this works, see serde.py directly.
 """
+import tracemalloc
+
 import msgpack
 import numpy
 import pytest
@@ -13,8 +15,10 @@ import syft
 from syft.frameworks.torch.tensors.interpreters.additive_shared import AdditiveSharingTensor
 from syft.generic.pointers.object_wrapper import ObjectWrapper
 from syft.generic.pointers.pointer_tensor import PointerTensor
+from syft.serde import compression
 from syft.serde import native_serde
 from syft.serde import serde
+from syft.serde import streaming
 from syft.serde import torch_serde
 
 from syft.exceptions import CompressionNotFoundException
@@ -134,7 +138,7 @@ def test_torch_tensor_simplify():
     At the time of writing, tensors simplify to a tuple where the
     first value in the tuple is the tensor's ID and the second
     value is a serialized version of the Tensor (serialized
-    by PyTorch's torch.save method)
+    by the raw buffer strategy of torch_serde)
     """
 
     # create a tensor
@@ -555,11 +559,60 @@ def test_pointer_tensor_detail(id):
     assert (x_back == 2 * x).all()
 
 
-def test_numpy_tensor_serde():
+def test_adaptive_compression_policy():
+    policy = compression.AdaptiveCompressionPolicy(size_threshold=100, zstd_threshold=10000)
+
+    # small messages are not compressed
+    assert policy.choose_scheme(b"a" * 10) == serde.NO_COMPRESSION
+    # random bytes are not compressed
+    assert policy.choose_scheme(numpy.random.bytes(1000)) == serde.NO_COMPRESSION
+    # large messages use ZSTD, the others LZ4
+    assert policy.choose_scheme(b"a" * 1000) == serde.LZ4
+    assert policy.choose_scheme(b"a" * 10000) == serde.ZSTD
+
+
+def test_adaptive_compression_policy_ratios():
+    policy = compression.AdaptiveCompressionPolicy(
+        size_threshold=100, entropy_threshold=8, probe_interval=3
+    )
+    # floats don't compress well but their entropy is below 8 bits per byte
+    binary = numpy.random.random(1000).tobytes()
+
+    _, scheme = policy.compress(binary, "OBJ")
+    assert scheme == serde.NO_COMPRESSION
+    assert policy.ratios["OBJ"] > policy.min_ratio
+
+    # other types of message are not affected
+    assert policy.choose_scheme(b"a" * 1000, "CMD") == serde.LZ4
+
+    # the message type is probed again after probe_interval messages
+    schemes = [policy.choose_scheme(binary, "OBJ") for _ in range(3)]
+    assert schemes == [serde.NO_COMPRESSION, serde.NO_COMPRESSION, serde.LZ4]
+
+    assert policy.skipped_bytes == 0
+    policy.compress(binary, "OBJ")
+    assert policy.skipped_bytes == len(binary)
+
+
+@pytest.mark.parametrize("tensor", [torch.zeros(1000), torch.randn(1000), torch.randn(10)])
+def test_serde_with_compression_policy(tensor):
+    policy = compression.AdaptiveCompressionPolicy()
+    serde.set_compression_policy(policy)
+    try:
+        tensor_serialized = serde.serialize(tensor)
+        tensor_deserialized = serde.deserialize(tensor_serialized)
+    finally:
+        serde.set_compression_policy(None)
+
+    assert (tensor_deserialized == tensor).all()
+    assert sum(counter["messages"] for counter in policy.counters.values()) == 1
+
+
+def test_numpy_tensor_serde(monkeypatch):
     serde._apply_compress_scheme = serde.apply_lz4_compression
 
-    serde._serialize_tensor = syft.serde.numpy_tensor_serializer
-    serde._deserialize_tensor = syft.serde.numpy_tensor_deserializer
+    monkeypatch.setattr(serde, "_serialize_tensor", syft.serde.numpy_tensor_serializer)
+    monkeypatch.setattr(serde, "_deserialize_tensor", syft.serde.numpy_tensor_deserializer)
 
     tensor = torch.tensor(numpy.ones((10, 10)), requires_grad=False)
 
@@ -567,11 +620,186 @@ def test_numpy_tensor_serde():
     assert tensor_serialized[0] != serde.NO_COMPRESSION
     tensor_deserialized = serde.deserialize(tensor_serialized)
 
-    # Back to Pytorch serializer
-    serde._serialize_tensor = syft.serde.torch_tensor_serializer
-    serde._deserialize_tensor = syft.serde.torch_tensor_deserializer
+    assert torch.eq(tensor_deserialized, tensor).all()
+
+
+def test_numpy_tensor_serde_memory_mapped(tmpdir, monkeypatch):
+    monkeypatch.setattr(torch_serde, "NUMPY_MMAP_THRESHOLD", 1000)
+    monkeypatch.setattr(torch_serde, "NUMPY_MMAP_DIR", str(tmpdir))
+
+    tensor = torch.randn(100, 10).t()
+
+    tensor_bin = torch_serde.numpy_tensor_serializer(tensor)
+    tensor_deserialized = torch_serde.numpy_tensor_deserializer(tensor_bin)
 
     assert torch.eq(tensor_deserialized, tensor).all()
+    # the temporary file is removed once mapped
+    assert tmpdir.listdir() == []
+
+
+def test_numpy_tensor_deserializer_writable():
+    tensor = torch.arange(6, dtype=torch.float32)
+
+    tensor_bin = torch_serde.numpy_tensor_serializer(tensor)
+    tensor_deserialized = torch_serde.numpy_tensor_deserializer(tensor_bin)
+    tensor_deserialized.add_(1)
+
+    assert torch.eq(torch_serde.numpy_tensor_deserializer(tensor_bin), tensor).all()
+
+
+@pytest.mark.parametrize(
+    "tensor",
+    [
+        torch.randn(10, 10),
+        torch.randn(4, 5).t(),
+        torch.randn(6, 6)[::2, 1:],
+        torch.randn(3, 4, requires_grad=True),
+        torch.randint(-100, 100, (2, 3, 4), dtype=torch.int64),
+        torch.tensor([1, 2, 3], dtype=torch.uint8),
+        torch.tensor(3.5, dtype=torch.float16),
+        torch.zeros(0, 5),
+        torch.randn(5, 5).to_sparse(),
+    ],
+)
+def test_raw_tensor_serde(tensor):
+    tensor_bin = torch_serde.raw_tensor_serializer(tensor)
+    tensor_deserialized = torch_serde.raw_tensor_deserializer(tensor_bin)
+
+    assert tensor_deserialized.dtype == tensor.dtype
+    assert tensor_deserialized.shape == tensor.shape
+    assert tensor_deserialized.requires_grad == tensor.requires_grad
+    if tensor.is_sparse:
+        tensor, tensor_deserialized = tensor.to_dense(), tensor_deserialized.to_dense()
+    assert torch.eq(tensor_deserialized, tensor).all()
+
+
+def test_raw_tensor_serde_keeps_layout():
+    tensor = torch.randn(4, 5).t()
+
+    tensor_bin = torch_serde.raw_tensor_serializer(tensor)
+    tensor_deserialized = torch_serde.raw_tensor_deserializer(tensor_bin)
+
+    assert tensor_deserialized.stride() == tensor.stride()
+
+
+def test_raw_tensor_deserializer_writable():
+    tensor = torch.arange(6, dtype=torch.float32).view(2, 3)
+
+    # bytes are immutable, the tensor data is copied
+    tensor_bin = torch_serde.raw_tensor_serializer(tensor)
+    tensor_deserialized = torch_serde.raw_tensor_deserializer(tensor_bin)
+    tensor_deserialized.add_(1)
+    assert torch.eq(torch_serde.raw_tensor_deserializer(tensor_bin), tensor).all()
+
+    # a bytearray is shared with the tensor
+    tensor_bin = bytearray(tensor_bin)
+    tensor_deserialized = torch_serde.raw_tensor_deserializer(tensor_bin)
+    tensor_deserialized.add_(1)
+    assert torch.eq(torch_serde.raw_tensor_deserializer(tensor_bin), tensor + 1).all()
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_out_of_band_serde(compress):
+    if compress:
+        serde._apply_compress_scheme = serde.apply_lz4_compression
+    else:
+        serde._apply_compress_scheme = serde.apply_no_compression
+
+    large_tensor = torch.randn(serde.OUT_OF_BAND_THRESHOLD)
+    large_array = numpy.random.random(serde.OUT_OF_BAND_THRESHOLD)
+    small_tensor = torch.randn(10)
+    obj = (large_tensor, large_array, small_tensor)
+
+    chunks = serde.serialize(obj, out_of_band=True)
+
+    # prefix, msgpack document and the two large buffers
+    assert type(chunks) == list
+    assert len(chunks) == 4
+    assert chunks[0][0] == serde.OUT_OF_BAND
+
+    # the message can be received as chunks or concatenated
+    for binary in (chunks, b"".join(chunks)):
+        large_tensor_d, large_array_d, small_tensor_d = serde.deserialize(binary)
+        assert (large_tensor_d == large_tensor).all()
+        assert numpy.array_equal(large_array_d, large_array)
+        assert (small_tensor_d == small_tensor).all()
+
+    # in-place ops on a tensor received don't write into the buffers of the message
+    large_tensor_d = serde.deserialize(chunks)[0]
+    large_tensor_d.add_(1)
+    assert (serde.deserialize(chunks)[0] == large_tensor).all()
+
+
+def test_out_of_band_serde_small_message():
+    """Messages without large buffers are serialized as usual"""
+    tensor = torch.randn(10)
+
+    binary = serde.serialize(tensor, out_of_band=True)
+
+    assert type(binary) == bytes
+    assert (serde.deserialize(binary) == tensor).all()
+
+
+@pytest.mark.parametrize("compress_scheme", [serde.LZ4, serde.ZSTD, serde.NO_COMPRESSION])
+def test_stream_serde(compress_scheme):
+    serde._apply_compress_scheme = compression.COMPRESSION_FUNCTIONS[compress_scheme]
+    chunk_size = 2 ** 12
+
+    large_tensor = torch.randn(serde.OUT_OF_BAND_THRESHOLD)
+    large_array = numpy.random.random(serde.OUT_OF_BAND_THRESHOLD)
+    obj = (large_tensor, large_array, torch.randn(10), "small")
+
+    chunks = list(streaming.serialize_stream(obj, chunk_size=chunk_size))
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        # a chunk holds at most chunk_size bytes, plus the compression overhead
+        assert len(chunk) <= chunk_size + 64
+        assert chunk[0] == compress_scheme
+
+    large_tensor_d, large_array_d, small_tensor_d, string_d = streaming.deserialize_stream(
+        iter(chunks)
+    )
+    assert (large_tensor_d == large_tensor).all()
+    assert numpy.array_equal(large_array_d, large_array)
+    assert (small_tensor_d == obj[2]).all()
+    assert string_d == "small"
+
+    serde._apply_compress_scheme = serde.apply_lz4_compression
+
+
+def test_stream_serde_small_message():
+    tensor = torch.randn(10)
+
+    chunks = list(streaming.serialize_stream(tensor))
+
+    assert len(chunks) == 1
+    assert (streaming.deserialize_stream(chunks) == tensor).all()
+
+
+def test_stream_serde_truncated():
+    chunks = list(streaming.serialize_stream(torch.randn(2 ** 16), chunk_size=2 ** 12))
+
+    with pytest.raises(ValueError):
+        streaming.deserialize_stream(chunks[:-1])
+    with pytest.raises(ValueError):
+        streaming.deserialize_stream(chunks + chunks[-1:])
+
+
+def test_stream_serde_sender_memory():
+    tensor = torch.randn(2 ** 22)
+    array = numpy.random.random(2 ** 21)
+
+    tracemalloc.start()
+    try:
+        n_bytes = sum(len(chunk) for chunk in streaming.serialize_stream((tensor, array)))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # the 32MB of data are read chunk by chunk, they are never copied as a whole
+    assert n_bytes > 2 ** 25
+    assert peak < 2 ** 23
 
 
 @pytest.mark.parametrize("compress", [True, False])
@@ -0,0 +1,107 @@
+import os
+
+import torch
+
+from syft.frameworks.torch.crypto.beaver import TriplePool
+
+
+def test_triple_pool_prefetch(workers, monkeypatch):
+    alice, bob, james = workers["alice"], workers["bob"], workers["james"]
+    pool = TriplePool(max_size=2, background=False)
+    monkeypatch.setattr(james, "triple_pool", pool)
+
+    x = torch.tensor([[1, 2], [3, 4]]).share(alice, bob, crypto_provider=james)
+    y = torch.tensor([[5, 6], [7, 8]]).share(alice, bob, crypto_provider=james)
+    args = (james, torch.mul, x.child.field, x.shape, y.shape, [alice, bob])
+    pool.prefetch(*args)
+
+    assert pool.counters["prefetched"] == 2
+    assert ((x * y).get() == torch.tensor([[5, 12], [21, 32]])).all()
+    assert ((x * y).get() == torch.tensor([[5, 12], [21, 32]])).all()
+    # the pool is empty, the third triple is generated on demand
+    assert ((x * y).get() == torch.tensor([[5, 12], [21, 32]])).all()
+
+    assert pool.counters["hits"] == 2
+    assert pool.counters["misses"] == 1
+    assert pool.hit_rate() == 2 / 3
+
+
+def test_triple_pool_refill(workers, monkeypatch):
+    alice, bob, james = workers["alice"], workers["bob"], workers["james"]
+    pool = TriplePool(max_size=3, background=False)
+    monkeypatch.setattr(james, "triple_pool", pool)
+
+    x = torch.tensor([[1, 2], [3, 4]]).share(alice, bob, crypto_provider=james)
+
+    # the pool is only refilled between the multiplications
+    assert ((x.mm(x)).get() == torch.tensor([[7, 10], [15, 22]])).all()
+    assert sum(len(triples) for triples in pool.triples.values()) == 0
+    pool.refill()
+    assert sum(len(triples) for triples in pool.triples.values()) == 3
+
+    assert ((x.mm(x)).get() == torch.tensor([[7, 10], [15, 22]])).all()
+    assert pool.counters["hits"] == 1
+    assert pool.counters["prefetched"] == 3
+
+
+def test_triple_pool_auto_refill(workers, monkeypatch):
+    alice, bob, james = workers["alice"], workers["bob"], workers["james"]
+    pool = TriplePool(max_size=2, background=False, auto_refill=True)
+    monkeypatch.setattr(james, "triple_pool", pool)
+
+    x = torch.tensor([[1, 2], [3, 4]]).share(alice, bob, crypto_provider=james)
+
+    # the triple used on demand is replaced at the end of the multiplication
+    assert ((x * x).get() == torch.tensor([[1, 4], [9, 16]])).all()
+    assert sum(len(triples) for triples in pool.triples.values()) == 2
+    assert ((x * x).get() == torch.tensor([[1, 4], [9, 16]])).all()
+    assert pool.counters == {"hits": 1, "plaintext_hits": 0, "misses": 1, "prefetched": 3}
+
+
+def test_triple_pool_background(workers, monkeypatch):
+    alice, bob, james = workers["alice"], workers["bob"], workers["james"]
+    pool = TriplePool(max_size=2)
+    monkeypatch.setattr(james, "triple_pool", pool)
+
+    x = torch.tensor([[1, 2], [3, 4]]).share(alice, bob, crypto_provider=james)
+
+    assert ((x.mm(x)).get() == torch.tensor([[7, 10], [15, 22]])).all()
+    # the plaintext triples are generated in the background, and only shared by
+    # the refill between the multiplications
+    pool.wait()
+    assert sum(len(triples) for triples in pool.triples.values()) == 0
+    assert sum(len(plaintexts) for plaintexts in pool.plaintexts.values()) == 2
+    pool.refill()
+    assert sum(len(triples) for triples in pool.triples.values()) == 2
+
+    for _ in range(2):
+        assert ((x.mm(x)).get() == torch.tensor([[7, 10], [15, 22]])).all()
+
+    # without a refill, the plaintext triples are shared by the multiplication
+    pool.wait()
+    assert ((x.mm(x)).get() == torch.tensor([[7, 10], [15, 22]])).all()
+
+    assert pool.counters == {"hits": 2, "plaintext_hits": 1, "misses": 1, "prefetched": 2}
+    assert pool.hit_rate() == 2 / 4
+    pool.wait()
+
+
+def test_triple_pool_storage(workers, monkeypatch, tmpdir):
+    alice, bob, james = workers["alice"], workers["bob"], workers["james"]
+    pool = TriplePool(storage_dir=str(tmpdir), batch_size=3, background=False)
+    monkeypatch.setattr(james, "triple_pool", pool)
+
+    x = torch.tensor([1, 2, 3]).share(alice, bob, crypto_provider=james)
+    for _ in range(2):
+        assert ((x * x).get() == torch.tensor([1, 4, 9])).all()
+    assert len([name for name in os.listdir(tmpdir) if name.endswith(".npy")]) == 3
+
+    # a new pool on the same directory starts after the triples already used
+    pool = TriplePool(storage_dir=str(tmpdir), batch_size=3, background=False)
+    monkeypatch.setattr(james, "triple_pool", pool)
+    assert ((x * x).get() == torch.tensor([1, 4, 9])).all()
+    # the batch is used up and its files are removed
+    assert len([name for name in os.listdir(tmpdir) if name.endswith(".npy")]) == 0
+
+    assert ((x * x).get() == torch.tensor([1, 4, 9])).all()
+    assert len([name for name in os.listdir(tmpdir) if name.endswith(".npy")]) == 3
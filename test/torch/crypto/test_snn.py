@@ -151,6 +151,21 @@ def test_maxpool(workers):
     assert ind.get() == torch.tensor(2)
 
 
+def test_maxpool_dim(workers):
+    alice, bob, james = workers["alice"], workers["bob"], workers["james"]
+    t = th.tensor([[10, 0, 3, 12, 5], [15, 7, 4, 1, 15]])
+    x = t.share(alice, bob, crypto_provider=james).child
+
+    # ties are won by the last element
+    max, ind = maxpool(x, dim=1)
+    assert (max.get() == th.tensor([12, 15])).all()
+    assert (ind.get() == th.tensor([3, 4])).all()
+
+    max, ind = maxpool(x, dim=0)
+    assert (max.get() == th.tensor([15, 7, 4, 12, 15])).all()
+    assert (ind.get() == th.tensor([1, 1, 1, 0, 1])).all()
+
+
 def test_maxpool_deriv(workers):
     alice, bob, james = workers["alice"], workers["bob"], workers["james"]
     x = th.tensor([[10, 0], [15, 7]]).share(alice, bob, crypto_provider=james).child
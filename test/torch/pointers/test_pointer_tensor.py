@@ -441,3 +441,47 @@ def test_float_prec_on_pointer_of_pointer(workers):
 
     assert isinstance(ptr.child, PointerTensor)
     assert isinstance(remote_tensor, torch.Tensor)
+
+
+def test_shape_inference(workers):
+    """The shapes of the results of remote commands are inferred locally"""
+    me, bob = workers["me"], workers["bob"]
+    x = torch.rand(4, 3)
+    y = torch.rand(3, 5)
+    z = torch.tensor([1, 2])
+    x_ptr, y_ptr, z_ptr = x.send(bob), y.send(bob), z.send(bob)
+
+    results = {
+        "x + 1": (x + 1, x_ptr + 1),
+        "x * x": (x * x, x_ptr * x_ptr),
+        "x[:, None] - x": (x[:, None] - x, x_ptr[:, None] - x_ptr),
+        "x.mm(y)": (x.mm(y), x_ptr.mm(y_ptr)),
+        "x @ y": (x @ y, x_ptr @ y_ptr),
+        "x.t()": (x.t(), x_ptr.t()),
+        "x.view(-1)": (x.view(-1), x_ptr.view(-1)),
+        "x.unsqueeze(1)": (x.unsqueeze(1), x_ptr.unsqueeze(1)),
+        "x.sum()": (x.sum(), x_ptr.sum()),
+        "x.sum(0)": (x.sum(0), x_ptr.sum(0)),
+        "x.mean(1, keepdim=True)": (x.mean(1, keepdim=True), x_ptr.mean(1, keepdim=True)),
+        "x[1:3]": (x[1:3], x_ptr[1:3]),
+        "x[..., 0]": (x[..., 0], x_ptr[..., 0]),
+        "x > 0.5": (x > 0.5, x_ptr > 0.5),
+        "torch.add(x, y.t()[0])": (torch.add(x, y.t()[0]), torch.add(x_ptr, y_ptr.t()[0])),
+        # reductions whose first positional argument isn't always the dim
+        "x.norm(2)": (x.norm(2), x_ptr.norm(2)),
+        "x.norm(2, 1)": (x.norm(2, 1), x_ptr.norm(2, 1)),
+        "x.std(False)": (x.std(False), x_ptr.std(False)),
+        "x.std(0)": (x.std(0), x_ptr.std(0)),
+        "x.var(1, False, True)": (x.var(1, False, True), x_ptr.var(1, False, True)),
+        "x.type_as(z)": (x.type_as(z), x_ptr.type_as(z_ptr)),
+    }
+
+    me.remote_shape_queries = 0
+    for command, (result, result_ptr) in results.items():
+        assert result_ptr.shape == result.shape, command
+        assert result_ptr.child.dtype == result.dtype, command
+    assert me.remote_shape_queries == 0
+
+    # the shape of the result of an unsupported command is requested
+    assert x_ptr.cumsum(0).shape == x.shape
+    assert me.remote_shape_queries == 1
@@ -6,6 +6,7 @@ import torch.nn as nn
 import torch.nn.functional as F
 
 import syft
+from syft.frameworks.torch.crypto import prg
 from syft.frameworks.torch.tensors.interpreters.additive_shared import AdditiveSharingTensor
 
 
@@ -46,6 +47,62 @@ def test_virtual_get(workers):
     assert (x == t).all()
 
 
+@pytest.mark.parametrize("seeded", [True, False])
+def test_generate_shares(seeded):
+    secret = torch.tensor([[-3, 4], [5, 2 ** 40]])
+    field = 2 ** 62
+
+    shares = AdditiveSharingTensor.generate_shares(
+        secret, n_workers=3, field=field, random_type=torch.LongTensor, seeded=seeded
+    )
+
+    assert len(shares) == 3
+    if seeded:
+        assert all(isinstance(share, prg.SeededShare) for share in shares[:-1])
+        shares = [share.expand() for share in shares[:-1]] + shares[-1:]
+    reconstructed = sum(share % field for share in shares) % field
+    assert (reconstructed == secret % field).all()
+
+
+def test_expand_seed():
+    field = 3 * 2 ** 40
+    values = prg.expand_seed(b"0123456789abcdef", (100, 100), field)
+
+    assert values.shape == (100, 100)
+    assert ((0 <= values) & (values < field)).all()
+    assert (prg.expand_seed(b"0123456789abcdef", (100, 100), field) == values).all()
+    assert not (prg.expand_seed(b"0123456789abcdeg", (100, 100), field) == values).all()
+    assert prg.expand_seed(b"0123456789abcdef", (0,), field).shape == (0,)
+
+
+def test_seeded_shares_serde():
+    secret = torch.randint(2 ** 30, (100, 100))
+    shares = AdditiveSharingTensor.generate_shares(
+        secret, n_workers=3, field=2 ** 62, random_type=torch.LongTensor, seeded=True
+    )
+
+    binaries = [syft.serde.serialize(share) for share in shares]
+
+    # the random shares are sent as their seed, the correction share in full
+    assert len(binaries[0]) < 1000 < len(binaries[-1])
+    for share, binary in zip(shares[:-1], binaries):
+        assert (syft.serde.deserialize(binary) == share.expand()).all()
+    assert (syft.serde.deserialize(binaries[-1]) == shares[-1]).all()
+
+
+@pytest.mark.parametrize("seeded", [True, False])
+def test_share_get_seeded(workers, seeded, monkeypatch):
+    bob, alice, james = (workers["bob"], workers["alice"], workers["james"])
+    monkeypatch.setattr(AdditiveSharingTensor, "seeded_shares", seeded)
+    t = torch.tensor([[1, -2], [3, 4]])
+
+    x = t.share(bob, alice, crypto_provider=james)
+    y = (x * x).refresh()
+
+    assert ((x + 1).get() == t + 1).all()
+    assert (y.get() == t * t).all()
+
+
 def test_autograd_kwarg(workers):
     bob, alice, james = (workers["bob"], workers["alice"], workers["james"])
 
@@ -648,6 +705,69 @@ def test_argmax(workers):
     ids = x.argmax(dim=1).get().float_prec()
     assert (ids.long() == torch.argmax(t, dim=1)).all()
 
+    # more than 2 dimensions and negative dim
+    t = torch.tensor([[[1, 2.0, 4], [3, 1.0, 2.0]], [[5, 0.0, 6], [8, 7.0, 9.0]]])
+    x = t.fix_prec().share(bob, alice, crypto_provider=james)
+    for dim in (0, 1, 2, -1):
+        ids = x.argmax(dim=dim).get().float_prec()
+        assert (ids.long() == torch.argmax(t, dim=dim)).all()
+
+    # ties are won by the last element
+    t = torch.tensor([1, 5.0, 2, 5.0, 5.0, 3])
+    x = t.fix_prec().share(bob, alice, crypto_provider=james)
+    idx = x.argmax().get().float_prec()
+    assert idx == torch.tensor([4.0])
+
+
+def test_max_shape(workers):
+    alice, bob, charlie, james = (
+        workers["alice"],
+        workers["bob"],
+        workers["charlie"],
+        workers["james"],
+    )
+
+    # the max over a whole tensor has no dimension, its index has one
+    t = torch.tensor([[1, 2.0, 4], [3, 1.0, 2.0]])
+    x = t.fix_prec().share(bob, alice, crypto_provider=james)
+    max_value, idx = x.max(return_idx=True)
+    assert max_value.get().float_prec().shape == torch.Size([])
+    assert idx.get().float_prec().shape == torch.Size([1])
+
+    # the shares of the index are created for all the shareholders
+    t = torch.tensor([3.0])
+    x = t.fix_prec().share(bob, alice, charlie, crypto_provider=james)
+    assert x.max().get().float_prec() == torch.tensor(3.0)
+    assert x.argmax().get().float_prec() == torch.tensor([0.0])
+
+
+def test_max_dim(workers):
+    alice, bob, james = workers["alice"], workers["bob"], workers["james"]
+
+    t = torch.tensor([[[1, 2.0, 4], [3, 1.0, 2.0]], [[5, 0.0, 4], [3, 7.0, 2.0]]])
+    x = t.fix_prec().share(bob, alice, crypto_provider=james)
+
+    for dim in (0, 1, 2):
+        max_value, _ = x.max(dim=dim)
+        assert (max_value.get().float_prec() == torch.max(t, dim=dim)[0]).all()
+
+
+def test_max_pool2d(workers):
+    alice, bob, james = workers["alice"], workers["bob"], workers["james"]
+
+    torch.manual_seed(0)
+    t = torch.randint(-20, 20, (2, 3, 6, 7)).float() / 4
+    x = t.fix_prec().share(bob, alice, crypto_provider=james)
+
+    for kwargs in (
+        {"kernel_size": 2},
+        {"kernel_size": 3, "stride": 2},
+        {"kernel_size": (2, 3), "stride": 1, "padding": 1},
+        {"kernel_size": 2, "stride": 1, "dilation": 2},
+    ):
+        pooled = F.max_pool2d(x, **kwargs).get().float_prec()
+        assert (pooled == F.max_pool2d(t, **kwargs)).all()
+
 
 def test_mod(workers):
     alice, bob, james = workers["alice"], workers["bob"], workers["james"]
@@ -776,12 +896,10 @@ def test_cnn_model(workers):
             self.fc2 = nn.Linear(500, 10)
 
         def forward(self, x):
-            # TODO: uncomment maxpool2d operations
-            # once it is supported with smpc.
             x = F.relu(self.conv1(x))
-            # x = F.max_pool2d(x, 2, 2)
+            x = F.max_pool2d(x, 2, 2)
             x = F.relu(self.conv2(x))
-            # x = F.max_pool2d(x, 2, 2)
+            x = F.max_pool2d(x, 2, 2)
             x = x.view(-1, 4 * 4 * 50)
             x = F.relu(self.fc1(x))
             x = self.fc2(x)
@@ -3,6 +3,7 @@ import torch
 import torch.nn as nn
 import torch.nn.functional as F
 
+from syft.frameworks.torch.tensors.interpreters import precision
 from syft.frameworks.torch.tensors.interpreters.precision import FixedPrecisionTensor
 
 
@@ -307,6 +308,24 @@ def test_torch_dot(workers):
     assert torch.dot(x, y).float_prec() == 45
 
 
+@pytest.mark.parametrize("stride, dilation", [((1, 1), (1, 1)), ((2, 1), (1, 2))])
+def test_im2col_index(stride, dilation):
+    im = torch.rand(2, 3, 7, 6)
+    nb_rows_out = (7 - dilation[0] * 2 - 1) // stride[0] + 1
+    nb_cols_out = (6 - dilation[1] * 1 - 1) // stride[1] + 1
+
+    index = precision._im2col_index((3, 7, 6), (3, 2), (nb_rows_out, nb_cols_out), stride, dilation)
+    im_reshaped = im.view(2, -1)[:, index]
+
+    expected = F.unfold(im, (3, 2), dilation=dilation, stride=stride)
+    assert (im_reshaped.permute(0, 2, 1) == expected).all()
+    # the index is reused by the next convolutions with the same parameters
+    assert (
+        precision._im2col_index((3, 7, 6), (3, 2), (nb_rows_out, nb_cols_out), stride, dilation)
+        is index
+    )
+
+
 def test_torch_conv2d(workers):
     bob, alice, james = (workers["bob"], workers["alice"], workers["james"])
     im = torch.Tensor(
@@ -88,3 +88,71 @@ def test_execute_command_self(hook):
     assert response == "bob_mocked_function"
 
     bob.mocked_function.assert_called()
+
+
+def test_lazy_execution(workers):
+    bob, alice = workers["bob"], workers["alice"]
+    x = th.tensor([1, 2, 3]).send(bob)
+
+    bob.set_lazy_execution(max_size=3)
+
+    y = x + 1
+    z = y * 2
+    assert len(bob.command_batch) == 2
+    assert bob._objects.get(z.id_at_location) is None
+
+    # flushed when it holds max_size commands
+    z = z - 1
+    assert len(bob.command_batch) == 0
+    assert (bob._objects[z.id_at_location] == th.tensor([3, 5, 7])).all()
+
+    # flushed when the value is needed
+    w = z + 1
+    assert len(bob.command_batch) == 1
+    assert w.child.get_shape() == th.Size([3])
+    assert len(bob.command_batch) == 0
+
+    # flushed before a command sending data to another worker
+    w = w + 1
+    w_alice = w.move(alice)
+    assert (w_alice.get() == th.tensor([5, 7, 9])).all()
+
+    bob.set_lazy_execution(False)
+    assert bob.command_batch is None
+
+
+def test_batched_garbage_collection(workers):
+    me, bob = workers["me"], workers["bob"]
+    me.set_batched_garbage_collection(max_size=3)
+
+    x = th.tensor([1.0, 2.0, 3.0]).send(bob)
+    y = th.tensor([4.0, 5.0]).send(bob)
+    x_id, y_id = x.id_at_location, y.id_at_location
+
+    # the deletions are queued
+    del x, y
+    deletion_queue = me.deletion_queues[bob.id]
+    assert deletion_queue.pending == 2
+    assert x_id in bob._objects and y_id in bob._objects
+
+    # and sent before any other message to bob
+    z = th.tensor([6]).send(bob)
+    assert deletion_queue.pending == 0
+    assert x_id not in bob._objects and y_id not in bob._objects
+    assert deletion_queue.n_deleted == 2
+    assert deletion_queue.n_messages == 1
+    assert deletion_queue.bytes_reclaimed == 5 * 4
+
+    # or when the queue is full
+    pointers = [th.tensor([i]).send(bob) for i in range(3)]
+    ids = [ptr.id_at_location for ptr in pointers]
+    del pointers
+    assert deletion_queue.pending == 0
+    assert all(obj_id not in bob._objects for obj_id in ids)
+
+    # turning batching off sends the deletions queued
+    z_id = z.id_at_location
+    del z
+    me.set_batched_garbage_collection(False)
+    assert z_id not in bob._objects
+    assert me.deletion_queues is None
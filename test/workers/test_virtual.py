@@ -39,6 +39,58 @@ def test_send_msg():
     assert obj_id in bob._objects
 
 
+def test_send_msg_out_of_band(workers, monkeypatch):
+    """Tests sending and getting back a large tensor with out of band framing"""
+    me, bob = workers["me"], workers["bob"]
+    monkeypatch.setattr(me, "out_of_band_framing", True)
+    monkeypatch.setattr(bob, "out_of_band_framing", True)
+
+    x = torch.randn(serde.OUT_OF_BAND_THRESHOLD)
+    x_back = x.send(bob).get()
+
+    assert (x_back == x).all()
+
+
+def test_send_msg_zero_serialization(hook, monkeypatch):
+    """Tests that messages between VirtualWorkers in zero serialization mode are only
+    simplified, and that the tensors sent are copies"""
+    worker_id = sy.ID_PROVIDER.pop()
+    alice = VirtualWorker(hook, id=f"alice{worker_id}", zero_serialization=True)
+    bob = VirtualWorker(hook, id=f"bob{worker_id}", log_msgs=True)
+
+    x = torch.tensor([1.0, 2.0])
+    alice.send_msg(ObjectMessage(x), bob)
+    x.add_(1)
+
+    assert type(bob.msg_history[-1]) == tuple
+    assert (bob._objects[x.id] == torch.tensor([1.0, 2.0])).all()
+
+    monkeypatch.setattr(VirtualWorker, "force_full_serialization", True)
+    alice.send_msg(ObjectMessage(torch.tensor([3.0])), bob)
+
+    assert type(bob.msg_history[-1]) == bytes
+
+
+def test_send_msg_async(hook):
+    """Tests that the responses of messages sent with send_msg_async can be collected
+    later, in both serialization modes"""
+    worker_id = sy.ID_PROVIDER.pop()
+    bob = VirtualWorker(hook, id=f"bob{worker_id}")
+
+    for zero_serialization in (False, True):
+        alice = VirtualWorker(
+            hook, id=f"alice{worker_id}{zero_serialization}", zero_serialization=zero_serialization
+        )
+        x = torch.tensor([1.0, 2.0])
+        alice.send_msg_async(ObjectMessage(x), bob).result()
+
+        future = alice.send_msg_async(ObjectRequestMessage(x.id), bob)
+
+        assert future.done()
+        assert (future.result() == x).all()
+        assert future.result() is future.result()
+
+
 def test_send_msg_using_tensor_api():
     """Tests sending a message with a specific ID
 
@@ -190,6 +242,15 @@ def test_search():
     assert len(bob.search("#not_fun")) == 2
     assert len(bob.search(["#not_fun", "#boston_housing"])) == 1
 
+    # the pointers are only created when they are accessed
+    results = bob.search("#fun")
+    assert results._pointers == {}
+    pointer = results[-1]
+    assert list(results._pointers) == [1]
+    assert results[1] is pointer
+    assert pointer.location == bob
+    assert {result.id_at_location for result in results} == {x.id_at_location, z.id_at_location}
+
 
 def test_obj_not_found(workers):
     """Test for useful error message when trying to call a method on
@@ -1,14 +1,20 @@
+import asyncio
 import io
 from os.path import exists, join
+import threading
 import time
 from socket import gethostname
 from OpenSSL import crypto, SSL
 import pytest
 import torch
+import websocket
 import syft as sy
 from syft.generic.frameworks.hook import hook_args
 from syft.frameworks.torch.federated import utils
+from syft.messaging.message import ObjectMessage
+from syft.messaging.message import ObjectRequestMessage
 
+from syft.workers.websocket_client import BINARY_FRAMES_SUBPROTOCOL
 from syft.workers.websocket_client import WebsocketClientWorker
 from syft.workers.websocket_server import WebsocketServerWorker
 
@@ -81,6 +87,268 @@ def test_websocket_worker_basic(hook, start_proc, secure, tmpdir):
     process_remote_worker.terminate()
 
 
+@pytest.mark.parametrize("binary_frames", [True, False])
+def test_websocket_worker_binary_frames(hook, start_proc, binary_frames):
+    """Evaluates that binary frames are negotiated with the server and that
+    clients which don't use them can still talk to it."""
+    kwargs = {"id": "fed_binary_frames", "host": "localhost", "port": 8772, "hook": hook}
+    process_remote_worker = start_proc(WebsocketServerWorker, **kwargs)
+
+    time.sleep(0.1)
+    remote_proxy = instantiate_websocket_client_worker(binary_frames=binary_frames, **kwargs)
+
+    assert remote_proxy.use_binary_frames == binary_frames
+
+    x = torch.ones(5).send(remote_proxy)
+    y = (x + x).get()
+
+    assert (y == torch.ones(5) * 2).all()
+
+    del x
+
+    remote_proxy.close()
+    time.sleep(0.1)
+    remote_proxy.remove_worker_from_local_worker_registry()
+    process_remote_worker.terminate()
+
+
+def test_websocket_worker_pipelining(hook, start_proc):
+    """Evaluates that several messages can be sent before collecting their
+    responses, in any order."""
+    kwargs = {"id": "fed_pipelining", "host": "localhost", "port": 8773, "hook": hook}
+    process_remote_worker = start_proc(WebsocketServerWorker, **kwargs)
+
+    time.sleep(0.1)
+    remote_proxy = instantiate_websocket_client_worker(**kwargs)
+    me = hook.local_worker
+
+    assert remote_proxy.use_pipelining
+
+    tensors = [torch.tensor([i]) for i in range(5)]
+    futures = [me.send_msg_async(ObjectMessage(tensor), remote_proxy) for tensor in tensors]
+    for future in futures:
+        future.result()
+
+    futures = [
+        me.send_msg_async(ObjectRequestMessage(tensor.id), remote_proxy) for tensor in tensors
+    ]
+    for tensor, future in reversed(list(zip(tensors, futures))):
+        assert (future.result() == tensor).all()
+    assert not remote_proxy._pending_responses
+
+    # synchronous messages go through the same connection
+    x = torch.ones(5).send(remote_proxy)
+    assert (x.get() == torch.ones(5)).all()
+
+    remote_proxy.close()
+    time.sleep(0.1)
+    remote_proxy.remove_worker_from_local_worker_registry()
+    process_remote_worker.terminate()
+
+
+class RequestsInFlight:
+    """Counts the requests in flight over the connections of several websocket clients.
+
+    The responses are only handed over once `expected` requests were in flight at the
+    same time (or after a timeout), so that max_count tells whether the requests were
+    all sent before waiting for the first response.
+    """
+
+    def __init__(self, expected: int):
+        self.expected = expected
+        self.count = 0
+        self.max_count = 0
+        self.condition = threading.Condition()
+
+    def watch(self, remote_proxy):
+        in_flight = self
+
+        class PendingResponses(dict):
+            def __setitem__(self, request_id, future):
+                with in_flight.condition:
+                    in_flight.count += 1
+                    in_flight.max_count = max(in_flight.max_count, in_flight.count)
+                    in_flight.condition.notify_all()
+                super().__setitem__(request_id, future)
+
+            def pop(self, *args):
+                with in_flight.condition:
+                    in_flight.condition.wait_for(
+                        lambda: in_flight.max_count >= in_flight.expected, timeout=2
+                    )
+                    in_flight.count -= 1
+                return super().pop(*args)
+
+        remote_proxy._pending_responses = PendingResponses()
+
+
+def test_websocket_worker_requests_in_flight(hook, start_remote_worker):
+    """Evaluates that several requests can be outstanding on one connection."""
+    server, remote_proxy = start_remote_worker(id="fed_in_flight", hook=hook, port=8778)
+    me = hook.local_worker
+    tensors = [torch.tensor([i]) for i in range(5)]
+    for tensor in tensors:
+        me.send_obj(tensor, remote_proxy)
+
+    in_flight = RequestsInFlight(expected=len(tensors))
+    in_flight.watch(remote_proxy)
+    responses = [me.request_obj_async(tensor.id, remote_proxy) for tensor in tensors]
+    for tensor, response in zip(tensors, responses):
+        assert (response.result() == tensor).all()
+
+    assert in_flight.max_count == len(tensors)
+
+    remote_proxy.close()
+    time.sleep(0.1)
+    remote_proxy.remove_worker_from_local_worker_registry()
+    server.terminate()
+
+
+def test_websocket_workers_get_shares(hook, start_remote_worker, workers):
+    """Evaluates that the shares of a tensor are requested to all their locations
+    before waiting for the first one."""
+    server_alice, alice = start_remote_worker(id="fed_alice_get", hook=hook, port=8779)
+    server_bob, bob = start_remote_worker(id="fed_bob_get", hook=hook, port=8780)
+
+    x = torch.tensor([1, 2, 3]).share(alice, bob, crypto_provider=workers["james"])
+    in_flight = RequestsInFlight(expected=2)
+    in_flight.watch(alice)
+    in_flight.watch(bob)
+    assert (x.get() == torch.tensor([1, 2, 3])).all()
+    assert in_flight.max_count == 2
+
+    x = torch.tensor([1, 2, 3]).send(alice, bob)
+    in_flight = RequestsInFlight(expected=2)
+    in_flight.watch(alice)
+    in_flight.watch(bob)
+    for result in x.get():
+        assert (result == torch.tensor([1, 2, 3])).all()
+    assert in_flight.max_count == 2
+
+    for remote_proxy, server in [(alice, server_alice), (bob, server_bob)]:
+        remote_proxy.close()
+        time.sleep(0.1)
+        remote_proxy.remove_worker_from_local_worker_registry()
+        server.terminate()
+
+
+def test_websocket_workers_additive_sharing(hook, start_remote_worker, workers):
+    """Evaluates the share-wise operations of tensors shared between websocket
+    workers, whose commands are sent to all the workers at once."""
+    server_alice, alice = start_remote_worker(id="fed_alice_shares", hook=hook, port=8774)
+    server_bob, bob = start_remote_worker(id="fed_bob_shares", hook=hook, port=8775)
+
+    x = torch.tensor([1, 2, 3]).share(alice, bob, crypto_provider=workers["james"])
+
+    # the commands of both shares are sent before waiting for the first response
+    in_flight = RequestsInFlight(expected=2)
+    in_flight.watch(alice)
+    in_flight.watch(bob)
+    y = x + x
+    assert in_flight.max_count == 2
+    alice._pending_responses, bob._pending_responses = {}, {}
+
+    assert (y.get() == torch.tensor([2, 4, 6])).all()
+    assert ((x - 1).get() == torch.tensor([0, 1, 2])).all()
+    assert ((x * 3).get() == torch.tensor([3, 6, 9])).all()
+    assert ((x * x).get() == torch.tensor([1, 4, 9])).all()
+
+    for remote_proxy, server in [(alice, server_alice), (bob, server_bob)]:
+        remote_proxy.close()
+        time.sleep(0.1)
+        remote_proxy.remove_worker_from_local_worker_registry()
+        server.terminate()
+
+
+def test_websocket_server_concurrent_clients(hook, start_remote_worker):
+    """Evaluates that the responses of a server with several clients go back to
+    the client which sent the message."""
+    server, remote_proxy = start_remote_worker(id="fed_concurrent", hook=hook, port=8776)
+    n_clients = 10
+    results = {}
+
+    def run_client(i):
+        ws = websocket.create_connection(remote_proxy.url, subprotocols=[BINARY_FRAMES_SUBPROTOCOL])
+        tensor = torch.ones(1000) * i
+        ws.send_binary(sy.serde.serialize(ObjectMessage(tensor)))
+        ws.recv()
+        ws.send_binary(sy.serde.serialize(ObjectRequestMessage(tensor.id)))
+        results[i] = sy.serde.deserialize(ws.recv())
+        ws.close()
+
+    threads = [threading.Thread(target=run_client, args=(i,)) for i in range(n_clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for i in range(n_clients):
+        assert (results[i] == torch.ones(1000) * i).all()
+
+    remote_proxy.close()
+    time.sleep(0.1)
+    remote_proxy.remove_worker_from_local_worker_registry()
+    server.terminate()
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_websocket_server_processes_messages_in_order(hook, max_workers):
+    """Evaluates that the messages of several connections are processed by at most
+    max_workers threads at a time, and answered in order on each connection."""
+    server = WebsocketServerWorker(
+        hook, host="localhost", port=8777, id="fed_serial", max_workers=max_workers
+    )
+    running = []
+    n_running = []
+
+    def recv_msg(message):
+        running.append(message)
+        n_running.append(len(running))
+        time.sleep(0.01)
+        running.remove(message)
+        return message
+
+    server._recv_msg = recv_msg
+
+    class Connection:
+        subprotocol = BINARY_FRAMES_SUBPROTOCOL
+
+        def __init__(self):
+            self.responses = []
+
+        async def send(self, response):
+            self.responses.append(response)
+
+    n_connections, n_messages = 4, 3
+    connections = [Connection() for _ in range(n_connections)]
+
+    async def serve():
+        producers = []
+        for i, connection in enumerate(connections):
+            queue = asyncio.Queue()
+            for j in range(n_messages):
+                queue.put_nowait(bytes([i, j]))
+            producers.append(asyncio.ensure_future(server._producer_handler(connection, queue)))
+
+        n_responses = n_connections * n_messages
+        while sum(len(connection.responses) for connection in connections) < n_responses:
+            await asyncio.sleep(0.01)
+        for producer in producers:
+            producer.cancel()
+
+    server.loop.run_until_complete(serve())
+
+    assert len(n_running) == n_connections * n_messages
+    assert max(n_running) <= max_workers
+    if max_workers > 1:
+        # a long command doesn't hold the messages of the other connections
+        assert max(n_running) > 1
+    for i, connection in enumerate(connections):
+        assert connection.responses == [bytes([i, j]) for j in range(n_messages)]
+
+    server.remove_worker_from_local_worker_registry()
+
+
 def test_websocket_workers_search(hook, start_remote_worker):
     """Evaluates that a client can search and find tensors that belong
     to another party"""